@@ -0,0 +1,6 @@
+"""
+Micro-benchmarks for backend hot paths.
+
+Run a benchmark as a module from the repo root, e.g.:
+    python -m backend.benchmarks.bench_serialization
+"""
@@ -0,0 +1,116 @@
+"""
+List Serialization Benchmark
+
+Compares the two ways of producing a car list page:
+
+- model: query(Car) -> CarResponse.model_validate per row -> JSON
+  (what FastAPI does for response_model=List[CarResponse])
+- fast:  query(*columns) -> row tuples -> orjson
+  (backend/services/serialization.py)
+
+Runs against an in-memory SQLite DB with realistic descriptions.
+
+Usage:
+    python -m backend.benchmarks.bench_serialization
+"""
+
+import json
+import time
+from datetime import datetime, timezone
+from typing import List
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.database import Base
+from backend.models.car import Car, CarResponse
+from backend.services.serialization import car_response_columns, dump_car_rows
+
+PAGE_SIZES = [100, 1000]
+REPEATS = 20
+
+CAR_LIST = TypeAdapter(List[CarResponse])
+
+
+def _seed(db, count: int) -> None:
+    now = datetime.now(timezone.utc)
+    db.add_all([
+        Car(
+            id=str(uuid4()),
+            vin=f"VIN{i:014d}",
+            make="Toyota",
+            model="Camry",
+            make_normalized="toyota",
+            model_normalized="camry",
+            year=2015 + i % 10,
+            trim="SE",
+            transmission="automatic",
+            fuel_type="gasoline",
+            drivetrain="fwd",
+            price=20000.0 + i,
+            mileage=50000 + i,
+            postal_code="M5V 2T6",
+            seller_type="dealer",
+            listing_url=f"https://example.com/listing/{i}",
+            image_url=f"https://example.com/img/{i}.jpg",
+            body_type="Sedan",
+            description="One owner, clean history, winter tires included. " * 40,
+            created_at=now,
+            last_seen_at=now,
+            status="active",
+            fair_market_value=21000.0,
+            deal_grade="B",
+            ai_verdict="VERDICT: Pass. Fairly priced for the mileage.",
+        )
+        for i in range(count)
+    ])
+    db.commit()
+
+
+def _model_path(db, limit: int) -> bytes:
+    cars = db.query(Car).filter(Car.status == "active").limit(limit).all()
+    return CAR_LIST.dump_json([CarResponse.model_validate(car) for car in cars])
+
+
+def _fast_path(db, limit: int) -> bytes:
+    rows = db.query(*car_response_columns()).filter(Car.status == "active").limit(limit).all()
+    return dump_car_rows(rows)
+
+
+def _best_of(fn, db, limit: int) -> float:
+    timings = []
+    for _ in range(REPEATS):
+        db.expunge_all()  # Don't let the identity map hide hydration cost
+        start = time.perf_counter()
+        fn(db, limit)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    engine = create_engine(
+        "sqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    _seed(db, max(PAGE_SIZES))
+
+    # Same JSON either way
+    assert json.loads(_model_path(db, 10)) == json.loads(_fast_path(db, 10))
+
+    print(f"{'rows':>6} {'model (ms)':>12} {'fast (ms)':>12} {'speedup':>9}")
+    for limit in PAGE_SIZES:
+        model_ms = _best_of(_model_path, db, limit) * 1000
+        fast_ms = _best_of(_fast_path, db, limit) * 1000
+        print(f"{limit:>6} {model_ms:>12.2f} {fast_ms:>12.2f} {model_ms / fast_ms:>8.1f}x")
+
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
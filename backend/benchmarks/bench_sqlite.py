@@ -0,0 +1,155 @@
+"""
+SQLite Concurrency Benchmark
+
+Concurrent scraper ingest + search against a file-backed SQLite DB, with and
+without the tuned connection profile from backend/database.py
+(sqlite_pragmas: WAL, synchronous=NORMAL, page cache, mmap, busy_timeout).
+
+- writers: insert one car per commit, like the scraper's create_car calls
+- readers: run a search-style query (make + price range, sorted, page of 20)
+
+Each profile runs on a fresh DB seeded with the same inventory.
+
+Usage:
+    python -m backend.benchmarks.bench_sqlite
+
+Sample run (1 vCPU container, 5 s per profile, 2 writers, 4 readers):
+
+    profile      writes/s   searches/s   errors
+    default         256.6        123.2        0
+    tuned           304.6        256.4        0
+
+Searches roughly double because WAL readers no longer wait on the writer's
+lock. Numbers vary by disk and core count; rerun on the target node.
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, install_sqlite_pragmas
+from backend.models.car import Car
+
+SEED_CARS = 5000
+WRITERS = 2
+READERS = 4
+DURATION_SECONDS = 5.0
+
+MAKES = ["Toyota", "Honda", "Ford", "Tesla", "Mazda"]
+
+
+def _car(i: int) -> Car:
+    make = MAKES[i % len(MAKES)]
+    now = datetime.now(timezone.utc)
+    return Car(
+        id=str(uuid4()),
+        vin=f"VIN{uuid4().hex[:14].upper()}",
+        make=make,
+        model="Model",
+        make_normalized=make.lower(),
+        model_normalized="model",
+        year=2012 + i % 12,
+        price=10000.0 + (i * 37) % 40000,
+        mileage=20000 + (i * 101) % 150000,
+        listing_url=f"https://example.com/listing/{uuid4().hex}",
+        body_type="Sedan",
+        description="One owner, clean history, winter tires included. " * 10,
+        created_at=now,
+        last_seen_at=now,
+        status="active",
+        deal_grade="ABCDF"[i % 5],
+    )
+
+
+def _run_profile(tuned: bool) -> dict:
+    workdir = tempfile.mkdtemp(prefix="undercut-bench-")
+    path = os.path.join(workdir, "bench.db")
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False},
+        pool_size=WRITERS + READERS,
+    )
+    try:
+        if tuned:
+            install_sqlite_pragmas(engine)
+        Session = sessionmaker(bind=engine)
+
+        Base.metadata.create_all(bind=engine)
+        with Session() as db:
+            db.add_all([_car(i) for i in range(SEED_CARS)])
+            db.commit()
+
+        counts = {"writes": 0, "searches": 0, "errors": 0}
+        lock = threading.Lock()
+        deadline = time.perf_counter() + DURATION_SECONDS
+
+        def bump(key: str) -> None:
+            with lock:
+                counts[key] += 1
+
+        def writer(offset: int) -> None:
+            i = offset
+            with Session() as db:
+                while time.perf_counter() < deadline:
+                    try:
+                        db.add(_car(i))
+                        db.commit()
+                        bump("writes")
+                    except OperationalError:
+                        db.rollback()
+                        bump("errors")
+                    i += WRITERS
+
+        def reader(offset: int) -> None:
+            i = offset
+            with Session() as db:
+                while time.perf_counter() < deadline:
+                    try:
+                        (
+                            db.query(Car)
+                            .filter(Car.status == "active")
+                            .filter(Car.make_normalized == MAKES[i % len(MAKES)].lower())
+                            .filter(Car.price.between(15000, 30000))
+                            .order_by(Car.price)
+                            .limit(20)
+                            .all()
+                        )
+                        db.rollback()  # End the read transaction like a request would
+                        bump("searches")
+                    except OperationalError:
+                        db.rollback()
+                        bump("errors")
+                    i += 1
+
+        threads = [threading.Thread(target=writer, args=(n,)) for n in range(WRITERS)]
+        threads += [threading.Thread(target=reader, args=(n,)) for n in range(READERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)  # The database and its -wal/-shm files
+    return counts
+
+
+def main() -> None:
+    print(f"{'profile':<10} {'writes/s':>10} {'searches/s':>12} {'errors':>8}")
+    for name, tuned in (("default", False), ("tuned", True)):
+        counts = _run_profile(tuned)
+        print(
+            f"{name:<10} {counts['writes'] / DURATION_SECONDS:>10.1f} "
+            f"{counts['searches'] / DURATION_SECONDS:>12.1f} {counts['errors']:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Cold Start Benchmark
+
+Times fresh interpreter processes, the way a serverless or autoscaled
+instance pays for them:
+
+- import:      import backend.main (app built, no DB or AI work)
+- import+ai:   ... plus import backend.services.ai (Gemini SDK stays unloaded)
+- startup:     ... plus the startup hook (schema check on a new SQLite DB)
+
+Usage:
+    python -m backend.benchmarks.bench_startup
+
+Sample run (1 vCPU container, median of 7; noisy, +/- 0.15 s), before -> after:
+
+    import        ~1.0 s -> ~1.1 s   (dominated by fastapi/sqlalchemy imports)
+    import+ai      1.96 s -> ~1.1 s  (google.generativeai no longer imported)
+    startup        n/a    -> ~1.3 s  (schema check now in the startup hook)
+
+The Gemini SDK (~1 s to import) now loads on the first AI call only.
+Before, importing backend.main also ran create_all; that now happens in the
+startup hook, or once per deploy with `python -m backend.migrate` and
+DB_INIT_ON_STARTUP=false.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RUNS = 7
+
+SCENARIOS = {
+    "import": "import backend.main",
+    "import+ai": "import backend.main; import backend.services.ai",
+    "startup": (
+        "from fastapi.testclient import TestClient; import backend.main; "
+        "TestClient(backend.main.app).__enter__()"
+    ),
+}
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def _time_process(code: str) -> float:
+    with tempfile.TemporaryDirectory(prefix="undercut-bench-") as workdir:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{workdir}/cold.db",
+            PYTHONPATH=REPO_ROOT,
+        )
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", code],
+            env=env,
+            check=True,
+            capture_output=True,
+        )
+        return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'scenario':<12} {'median (s)':>11} {'min (s)':>9}")
+    for name, code in SCENARIOS.items():
+        timings = [_time_process(code) for _ in range(RUNS)]
+        print(f"{name:<12} {statistics.median(timings):>11.2f} {min(timings):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""
+Runtime Configuration
+
+The root .env is loaded into the process environment once, by whichever
+module needs configuration first (database, AI, app factory). Real
+environment variables always win over .env values.
+"""
+
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load the root .env file (once per process)."""
+    load_dotenv()
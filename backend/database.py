@@ -1,10 +1,16 @@
-from sqlalchemy import create_engine
+from sqlalchemy import DateTime, TypeDecorator, create_engine, event, exc, inspect
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 import os
-from dotenv import load_dotenv
+import threading
+import time
+from datetime import timezone
+
+from backend.config import load_env
 
 # Load environment variables from the root .env file
-load_dotenv()
+load_env()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
@@ -13,14 +19,261 @@ if not DATABASE_URL:
     print("WARNING: No DATABASE_URL found. Using local SQLite database.")
     DATABASE_URL = "sqlite:///./undercut.db"
 
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+# Optional read replica for read-only endpoints (falls back to the primary)
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+
+# Connection pool settings (server databases only; SQLite uses its own pooling)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# SQLite tuning (single-node deployments without DATABASE_URL)
+SQLITE_TUNED = os.getenv("SQLITE_TUNED", "true").lower() in ("1", "true", "yes")
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))        # 64 MB page cache
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))  # 256 MB
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync DB URL to its async driver.
+
+    postgresql:// -> postgresql+asyncpg://, sqlite:// -> sqlite+aiosqlite://
+    """
+    scheme, sep, rest = url.partition("://")
+    base = scheme.split("+")[0]
+    if base in ("postgres", "postgresql"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    if base == "sqlite":
+        return f"sqlite+aiosqlite{sep}{rest}"
+    return url
+
+
+# ============================================================================
+# SQLITE TUNING
+# ============================================================================
+
+def sqlite_pragmas(in_memory: bool = False) -> list:
+    """
+    PRAGMAs applied to every new SQLite connection.
+
+    - WAL: readers don't block the writer (and vice versa); file DBs only
+    - synchronous=NORMAL: fsync at checkpoints, not every commit (safe in WAL)
+    - cache_size / mmap_size: keep hot pages in memory
+    - busy_timeout: wait for the write lock instead of failing "database is locked"
+    - foreign_keys=ON, temp_store=MEMORY
+    """
+    pragmas = []
+    if not in_memory:
+        pragmas += ["journal_mode=WAL", "synchronous=NORMAL"]
+    pragmas += [
+        f"cache_size=-{SQLITE_CACHE_SIZE_KB}",  # Negative = KiB, not pages
+        f"mmap_size={SQLITE_MMAP_SIZE}",
+        f"busy_timeout={SQLITE_BUSY_TIMEOUT_MS}",
+        "foreign_keys=ON",
+        "temp_store=MEMORY",
+    ]
+    return pragmas
+
+
+def install_sqlite_pragmas(sync_engine) -> None:
+    """Apply sqlite_pragmas() on connect (pass async_engine.sync_engine for async)."""
+    database = sync_engine.url.database
+    pragmas = sqlite_pragmas(in_memory=not database or database == ":memory:")
+
+    @event.listens_for(sync_engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+# ============================================================================
+# POOL METRICS
+# ============================================================================
+
+class PoolMetrics:
+    """
+    Cumulative checkout counters for one engine's pool.
+
+    Live gauges (checked out, overflow, ...) are read from the pool itself
+    in pool_status(); this only tracks what the pool doesn't: how long
+    callers waited for a connection and how often they timed out.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+POOL_METRICS = {}
+
+
+def _timed_pool(base, metrics: PoolMetrics):
+    """Pool subclass that times each checkout (including queueing)."""
+
+    class TimedPool(base):
+        # Pool.recreate() builds the replacement from self.__class__, so the
+        # timing survives pool rebuilds
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                connection = super()._do_get()
+            except exc.TimeoutError:
+                # Only queue timeouts; connect/auth errors aren't checkout waits
+                metrics.record(time.perf_counter() - start, timed_out=True)
+                raise
+            metrics.record(time.perf_counter() - start)
+            return connection
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def _engine_kwargs(url: str, name: str, is_async: bool) -> dict:
+    """Pool configuration shared by every engine we create."""
+    if "sqlite" in url:
+        return {"connect_args": {"check_same_thread": False}} if not is_async else {}
+
+    metrics = POOL_METRICS.setdefault(name, PoolMetrics())
+    return {
+        "poolclass": _timed_pool(AsyncAdaptedQueuePool if is_async else QueuePool, metrics),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# ============================================================================
+# ENGINES & SESSIONS
+# ============================================================================
+
+# Sync engine: schema creation, background jobs and scripts
+engine = create_engine(DATABASE_URL, **_engine_kwargs(DATABASE_URL, "primary", is_async=False))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers (queries don't block the event loop)
+async_engine = create_async_engine(
+    to_async_url(DATABASE_URL), **_engine_kwargs(DATABASE_URL, "primary_async", is_async=True)
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # Objects are serialized after commit; avoid lazy IO
+)
+
+# Read engine: read-only endpoints (read_cars, search_cars, trending, read_car)
+if READ_DATABASE_URL:
+    read_async_engine = create_async_engine(
+        to_async_url(READ_DATABASE_URL),
+        **_engine_kwargs(READ_DATABASE_URL, "read_async", is_async=True),
+    )
+else:
+    read_async_engine = async_engine
+
+if SQLITE_TUNED:
+    for _sync_engine in {engine, async_engine.sync_engine, read_async_engine.sync_engine}:
+        if _sync_engine.dialect.name == "sqlite":
+            install_sqlite_pragmas(_sync_engine)
+
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=read_async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
+
+class UTCDateTime(TypeDecorator):
+    """
+    Timestamp stored as naive UTC (TIMESTAMP WITHOUT TIME ZONE).
+
+    The code writes aware values (datetime.now(timezone.utc)). psycopg2 and
+    SQLite accept those for a naive column, but asyncpg refuses to encode an
+    aware datetime as TIMESTAMP WITHOUT TIME ZONE. Aware values are converted
+    to UTC and made naive on the way in; reads return naive UTC, as before.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+def pool_status() -> dict:
+    """Live pool gauges plus checkout timing, per engine."""
+    engines = {"primary": engine, "primary_async": async_engine}
+    if read_async_engine is not async_engine:
+        engines["read_async"] = read_async_engine
+
+    status = {}
+    for name, eng in engines.items():
+        pool = eng.pool
+        stats = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        metrics = POOL_METRICS.get(name)
+        if metrics:
+            stats.update(
+                checkouts_total=metrics.checkouts,
+                checkout_timeouts_total=metrics.timeouts,
+                checkout_wait_seconds_total=round(metrics.wait_seconds_total, 6),
+                checkout_wait_seconds_max=round(metrics.wait_seconds_max, 6),
+            )
+        status[name] = stats
+    return status
+
+
+def init_db() -> list:
+    """
+    Create missing tables and upgrade existing ones (idempotent).
+
+    Called from the app's startup hook and by python -m backend.migrate.
+    Returns the schema changes made (see backend/migrations.py).
+    """
+    from backend.models import alert, car, user  # noqa: F401  Register tables on Base
+    from backend.migrations import upgrade_schema
+
+    existing = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    changes = [
+        f"created table {table.name}"
+        for table in Base.metadata.sorted_tables
+        if table.name not in existing
+    ]
+    return changes + upgrade_schema(engine)
+
+
 # Dependency to get the DB session
 def get_db():
     db = SessionLocal()
@@ -28,3 +281,15 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency to get an async DB session (used by the routers)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency for read-only endpoints (replica when READ_DATABASE_URL is set)
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
@@ -1,54 +1,117 @@
 import os
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+
+from backend.config import load_env
 from backend.routers import cars, users, alerts
-from backend.database import engine, Base
-from backend.models import car, user, alert  # Import models to register tables
-from fastapi.middleware.cors import CORSMiddleware
-from dotenv import load_dotenv
+from backend.database import init_db, pool_status
+from backend.services.ai_pool import AIUnavailableError
+from backend.services.metrics import MetricsMiddleware, RATE_LIMITED, route_template
+from backend.services.query_stats import (
+    QueryStatsMiddleware,
+    install_query_instrumentation,
+    route_query_stats,
+)
 
 # Rate Limiting
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 
-# Load environment variables
-load_dotenv()
+# Metrics
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
-# Initialize Rate Limiter
-limiter = Limiter(key_func=get_remote_address)
 
-# Create the database tables
-Base.metadata.create_all(bind=engine)
+def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """SlowAPI's 429 response, counted per route for /metrics."""
+    RATE_LIMITED.labels(route_template(request.scope)).inc()
+    return _rate_limit_exceeded_handler(request, exc)
 
-app = FastAPI(title="Undercut API")
 
-# Attach limiter to app state (required for SlowAPI)
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+def ai_unavailable_handler(request: Request, exc: AIUnavailableError):
+    """AI pool saturated or timed out: tell the client to retry."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "5"})
 
-# CORS Configuration (Environment-based for Dev/Prod)
-# Dev: CORS_ORIGINS=http://localhost:3000
-# Prod: CORS_ORIGINS=https://undercut.com,https://www.undercut.com
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+def create_app(init_schema: bool = None) -> FastAPI:
+    """
+    Build the API application.
+
+    Nothing touches the database at import or build time. Missing tables are
+    created in the startup hook unless DB_INIT_ON_STARTUP=false (or
+    init_schema=False), e.g. when `python -m backend.migrate` runs as a
+    separate deploy step.
+    """
+    load_env()
+
+    if init_schema is None:
+        init_schema = os.getenv("DB_INIT_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if init_schema:
+            for change in init_db():
+                print(f"Schema: {change}")
+        yield
+
+    app = FastAPI(title="Undercut API", lifespan=lifespan)
+
+    # Attach limiter to app state (required for SlowAPI)
+    app.state.limiter = Limiter(key_func=get_remote_address)
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+    app.add_exception_handler(AIUnavailableError, ai_unavailable_handler)
+
+    # CORS Configuration (Environment-based for Dev/Prod)
+    # Dev: CORS_ORIGINS=http://localhost:3000
+    # Prod: CORS_ORIGINS=https://undercut.com,https://www.undercut.com
+    cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
+
+    # SQL count / DB time per request (Server-Timing header + per-route totals)
+    install_query_instrumentation()
+    app.add_middleware(QueryStatsMiddleware)
+    app.add_middleware(MetricsMiddleware)  # Outside QueryStats: reads its totals
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Include Routers
+    app.include_router(cars.router)
+    app.include_router(users.router)
+    app.include_router(alerts.router)
+
+    @app.get("/")
+    def read_root():
+        return {"message": "Undercut API - The Controller is Active"}
+
+    @app.get("/health/db-pool")
+    def read_db_pool():
+        """Connection pool gauges and checkout wait times, per engine."""
+        return pool_status()
+
+    @app.get("/health/query-stats")
+    def read_query_stats():
+        """SQL statements and DB time per route template."""
+        return route_query_stats.snapshot()
+
+    @app.get("/metrics", include_in_schema=False)
+    def read_metrics():
+        """Prometheus scrape endpoint."""
+        return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
-# Include Routers
-app.include_router(cars.router)
-app.include_router(users.router)
-app.include_router(alerts.router)
+    return app
 
 
-@app.get("/")
-def read_root():
-    return {"message": "Undercut API - The Controller is Active"}
+# Module-level app for `uvicorn backend.main:app`
+# (or skip it with `uvicorn --factory backend.main:create_app`)
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,24 @@
+"""
+Schema Setup
+
+Creates missing tables, adds missing columns and indexes to existing ones
+and backfills them (see backend/migrations.py), as a deploy step separate
+from app startup (pair with DB_INIT_ON_STARTUP=false so instances don't
+each do it). Prints every change it made.
+
+Usage:
+    python -m backend.migrate
+"""
+
+from backend.database import DATABASE_URL, init_db
+
+
+if __name__ == "__main__":
+    target = DATABASE_URL.split("@")[-1]
+    changes = init_db()
+    for change in changes:
+        print(f"  {change}")
+    if changes:
+        print(f"Applied {len(changes)} schema changes to {target}")
+    else:
+        print(f"No schema changes needed for {target}")
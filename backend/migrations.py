@@ -0,0 +1,161 @@
+"""
+Schema Upgrades
+
+Base.metadata.create_all() creates missing tables but never changes a table
+that already exists. upgrade_schema() brings an existing database up to the
+models:
+
+1. Columns declared on a model but missing from its table are added
+   (ALTER TABLE ... ADD COLUMN). New columns are always nullable.
+2. Indexes declared on a model but missing from the database are created.
+3. Backfills fill the new columns for rows written before they existed.
+
+Every step is idempotent: columns and indexes are only added if missing,
+and backfills only touch rows that still lack a value, so it is safe to run
+on every startup (init_db) and from python -m backend.migrate.
+"""
+
+from typing import Callable, List, Tuple
+
+from sqlalchemy import func, inspect, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from backend.database import Base
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+
+# ============================================================================
+# BACKFILLS
+# ============================================================================
+
+def _backfill_normalized_make_model(db: Session) -> int:
+    """Canonical make/model for cars and alerts created before the columns existed."""
+    from backend.models.alert import Alert
+    from backend.models.car import Car
+    from backend.services.catalog import canonicalize_make, canonicalize_model
+
+    updated = 0
+    for model_class in (Car, Alert):
+        last_id = ""
+        while True:
+            rows = (
+                db.query(model_class)
+                .filter(
+                    model_class.make_normalized.is_(None),
+                    model_class.make.isnot(None),
+                    model_class.id > last_id,
+                )
+                .order_by(model_class.id)
+                .limit(BACKFILL_BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                break
+            for row in rows:
+                row.make_normalized = canonicalize_make(row.make)
+                row.model_normalized = canonicalize_model(row.model, row.make)
+            db.commit()
+            updated += len(rows)
+            last_id = rows[-1].id
+    return updated
+
+
+def _backfill_car_updated_at(db: Session) -> int:
+    """Row version for ETags: the last time we know the car changed."""
+    from backend.models.car import Car
+
+    result = db.execute(
+        update(Car)
+        .where(Car.updated_at.is_(None))
+        .values(updated_at=func.coalesce(Car.last_seen_at, Car.created_at, func.current_timestamp()))
+    )
+    db.commit()
+    return result.rowcount
+
+
+def _backfill_monthly_tco_default(db: Session) -> int:
+    """Default-assumption TCO for cars listed before the column existed (see services/regrade.py)."""
+    from backend.models.car import Car
+    from backend.services.tco import default_monthly_tco
+
+    updated = 0
+    last_id = ""
+    while True:
+        cars = (
+            db.query(Car)
+            .filter(
+                Car.monthly_tco_default.is_(None),
+                Car.price > 0,
+                Car.year.isnot(None),
+                Car.id > last_id,
+            )
+            .order_by(Car.id)
+            .limit(BACKFILL_BATCH_SIZE)
+            .all()
+        )
+        if not cars:
+            break
+        for car in cars:
+            car.monthly_tco_default = default_monthly_tco(car.price, car.year, car.fuel_type, car.body_type)
+        db.commit()
+        updated += len(cars)
+        last_id = cars[-1].id
+    return updated
+
+
+# (name, function) in order; each returns the number of rows it updated
+BACKFILLS: List[Tuple[str, Callable[[Session], int]]] = [
+    ("make/model normalized", _backfill_normalized_make_model),
+    ("cars.updated_at", _backfill_car_updated_at),
+    ("cars.monthly_tco_default", _backfill_monthly_tco_default),
+]
+
+
+# ============================================================================
+# UPGRADE
+# ============================================================================
+
+def upgrade_schema(engine: Engine) -> List[str]:
+    """
+    Add missing columns and indexes to existing tables, then run backfills.
+
+    Expects the tables themselves to exist (run create_all first). Returns a
+    description of each change made (empty if the schema was up to date).
+    """
+    changes = []
+    inspector = inspect(engine)
+    existing_tables = set(inspector.get_table_names())
+
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.exec_driver_sql(
+                    f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                )
+                changes.append(f"added column {table.name}.{column.name}")
+
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(connection)
+                    changes.append(f"created index {index.name}")
+
+    with Session(engine) as db:
+        for name, backfill in BACKFILLS:
+            count = backfill(db)
+            if count:
+                changes.append(f"backfilled {name} for {count} rows")
+
+    return changes
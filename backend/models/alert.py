@@ -10,8 +10,8 @@ from pydantic import BaseModel, Field, ConfigDict
 from typing import Optional
 from datetime import datetime, timezone
 
-from backend.database import Base
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean
+from backend.database import Base, UTCDateTime
+from sqlalchemy import Column, String, Integer, Float, Boolean
 
 
 # ============================================================================
@@ -36,6 +36,8 @@ class Alert(Base):
     # Vehicle filters
     make = Column(String, nullable=True)       # e.g., "Tesla"
     model = Column(String, nullable=True)      # e.g., "Model 3"
+    make_normalized = Column(String, nullable=True, index=True)  # e.g., "tesla"
+    model_normalized = Column(String, nullable=True)             # e.g., "model 3"
     year_min = Column(Integer, nullable=True)  # e.g., 2020
     year_max = Column(Integer, nullable=True)  # e.g., 2024
 
@@ -57,8 +59,8 @@ class Alert(Base):
     is_active = Column(Boolean, default=True)  # User can pause alerts
     
     # === Timestamps ===
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    last_triggered_at = Column(DateTime, nullable=True)  # When last match found
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    last_triggered_at = Column(UTCDateTime, nullable=True)  # When last match found
 
 
 # ============================================================================
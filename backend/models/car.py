@@ -1,10 +1,10 @@
 from pydantic import BaseModel, Field, HttpUrl, ConfigDict
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime, timezone
 from enum import Enum
 
-from backend.database import Base
-from sqlalchemy import Column, String, Integer, Float, DateTime
+from backend.database import Base, UTCDateTime
+from sqlalchemy import Column, String, Integer, Float, Index, JSON
 
 # ============================================================================
 # ENUMS (For type safety and Frontend clarity)
@@ -57,6 +57,13 @@ class Car(Base):
     This defines the 'cars' table in the database.
     """
     __tablename__ = "cars"
+    __table_args__ = (
+        # Equality filters on canonical make/model (search, alerts, recommendations)
+        Index("ix_cars_make_model_normalized", "make_normalized", "model_normalized"),
+        Index("ix_cars_status_make_normalized", "status", "make_normalized"),
+        # Search filter/sort on monthly cost of ownership (tco_max, sort_by=monthly_tco)
+        Index("ix_cars_status_monthly_tco_default", "status", "monthly_tco_default"),
+    )
 
     # === Core Identifiers ===
     id = Column(String, primary_key=True, index=True)
@@ -68,6 +75,11 @@ class Car(Base):
     year = Column(Integer, index=True)
     trim = Column(String, nullable=True)  # e.g., "Sport", "Touring", "Type R"
 
+    # Canonical forms (case-folded, alias-resolved) set at ingestion.
+    # See backend/services/catalog.py
+    make_normalized = Column(String, nullable=True)   # e.g., "mercedes-benz"
+    model_normalized = Column(String, nullable=True)  # e.g., "c-class"
+
     # === Specs (For Filtering & TCO) ===
     transmission = Column(String, nullable=True)  # automatic, manual, cvt
     fuel_type = Column(String, nullable=True)     # gasoline, electric, hybrid
@@ -91,8 +103,14 @@ class Car(Base):
     description = Column(String, nullable=True)
 
     # === Timestamps ===
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    last_seen_at = Column(DateTime, nullable=True)  # When scraper last verified
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    last_seen_at = Column(UTCDateTime, nullable=True)  # When scraper last verified
+    updated_at = Column(  # Row version for ETag / Last-Modified
+        UTCDateTime,
+        index=True,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+    )
 
     # === Status (Deleted Post Logic) ===
     status = Column(String, default="active")  # active, sold, deleted
@@ -101,6 +119,39 @@ class Car(Base):
     fair_market_value = Column(Float, nullable=True)
     deal_grade = Column(String, nullable=True)  # S, A, B, C, F
     ai_verdict = Column(String, nullable=True)
+    red_flags = Column(JSON, nullable=True, default=[])  # Tags, see services/red_flags.py
+    # Monthly TCO with default assumptions, set at ingestion and by the
+    # regrade job (see services/tco.default_monthly_tco, services/regrade.py)
+    monthly_tco_default = Column(Float, nullable=True)
+    # Set while a worker is generating the verdict, so other workers wait for
+    # it instead of making their own AI call (see analysis_queue.begin_analysis)
+    analysis_started_at = Column(UTCDateTime, nullable=True)
+
+
+class AnalysisJob(Base):
+    """
+    Queued AI pre-analysis for a listing ("Pending Analysis" verdicts).
+
+    Worked by backend/services/analysis_queue.py. Workers claim jobs by
+    leasing them (leased_by / lease_expires_at), so several can share the
+    table and a crashed worker's jobs are picked up again after the lease.
+    """
+    __tablename__ = "analysis_jobs"
+    __table_args__ = (
+        Index("ix_analysis_jobs_claim", "status", "priority", "available_at"),
+    )
+
+    id = Column(String, primary_key=True, index=True)
+    car_id = Column(String, index=True)  # FK to cars.id
+    priority = Column(Integer, default=2)  # 0 = S, 1 = A, 2 = everything else
+    status = Column(String, default="queued")  # queued, leased, done, failed
+    attempts = Column(Integer, default=0)
+    available_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))  # Backoff
+    leased_by = Column(String, nullable=True)
+    lease_expires_at = Column(UTCDateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(UTCDateTime, nullable=True)
 
 # ============================================================================
 # Pydantic Schemas (API Validation)
@@ -161,5 +212,7 @@ class CarResponse(CarBase):
     fair_market_value: Optional[float] = None
     deal_grade: Optional[str] = None  # S, A, B, C, F
     ai_verdict: Optional[str] = None
+    red_flags: Optional[List[str]] = None  # e.g., ["rebuilt_title", "rust"]
+    monthly_tco_default: Optional[float] = None  # CAD/month at default TCO assumptions
 
     model_config = ConfigDict(from_attributes=True)
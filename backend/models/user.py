@@ -2,8 +2,8 @@ from pydantic import BaseModel, Field, EmailStr, ConfigDict
 from typing import Optional
 from datetime import datetime, timezone
 
-from backend.database import Base
-from sqlalchemy import Column, String, Integer, Float, DateTime, Boolean, JSON
+from backend.database import Base, UTCDateTime
+from sqlalchemy import Column, String, Integer, Float, Boolean, JSON, Index
 
 
 # ============================================================================
@@ -49,10 +49,12 @@ class User(Base):
 
     # === Status ===
     profile_complete = Column(Boolean, default=False)  # Has completed onboarding?
+    # Last full rebuild of the stored recommendation list (None = never built)
+    recommendations_computed_at = Column(UTCDateTime, nullable=True)
     
     # === Timestamps ===
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+    created_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
 
 # ============================================================================
@@ -112,11 +114,17 @@ class SavedCar(Base):
     Tracks which users have saved which cars.
     """
     __tablename__ = "saved_cars"
+    __table_args__ = (
+        # Garage listing: WHERE user_id = ? ORDER BY saved_at DESC (keyset paginated)
+        Index("ix_saved_cars_user_saved_at", "user_id", "saved_at"),
+        # "Has this user saved these cars?" lookups
+        Index("ix_saved_cars_user_car", "user_id", "car_id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     user_id = Column(String, index=True)  # FK to users.id
     car_id = Column(String, index=True)   # FK to cars.id
-    saved_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    saved_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
     
     # Note: When car.status becomes 'sold' or 'deleted',
     # we don't delete this row. Frontend shows "SOLD" badge.
@@ -135,3 +143,31 @@ class SavedCarResponse(BaseModel):
     saved_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class SavedCarLookupResponse(BaseModel):
+    """Which of the requested car ids the user has saved"""
+    saved_car_ids: list[str]
+
+
+# ============================================================================
+# Materialized Recommendations
+# ============================================================================
+
+class UserRecommendation(Base):
+    """
+    Precomputed recommendation candidates per user.
+
+    Maintained in the background by backend/services/recommendations.py:
+    rebuilt when the profile changes, merged into when new cars are ingested.
+    """
+    __tablename__ = "user_recommendations"
+    __table_args__ = (
+        Index("ix_user_recommendations_user_score", "user_id", "score"),
+    )
+
+    id = Column(String, primary_key=True, index=True)
+    user_id = Column(String, index=True)  # FK to users.id
+    car_id = Column(String, index=True)   # FK to cars.id
+    score = Column(Float)
+    computed_at = Column(UTCDateTime, default=lambda: datetime.now(timezone.utc))
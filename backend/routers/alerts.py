@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends, Request, Header
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from datetime import datetime, timezone
 from uuid import uuid4
@@ -10,7 +11,8 @@ from backend.models.alert import (
     AlertUpdate,
     AlertResponse,
 )
-from backend.database import get_db
+from backend.database import get_async_db
+from backend.services.catalog import canonicalize_make, canonicalize_model
 
 # Rate Limiting
 from slowapi import Limiter
@@ -54,7 +56,7 @@ async def create_alert(
     request: Request,
     alert_data: AlertCreate,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Create a new sniper alert.
@@ -79,6 +81,8 @@ async def create_alert(
         name=alert_data.name,
         make=alert_data.make,
         model=alert_data.model,
+        make_normalized=canonicalize_make(alert_data.make),
+        model_normalized=canonicalize_model(alert_data.model, alert_data.make),
         year_min=alert_data.year_min,
         year_max=alert_data.year_max,
         price_max=alert_data.price_max,
@@ -92,8 +96,8 @@ async def create_alert(
     )
 
     db.add(db_alert)
-    db.commit()
-    db.refresh(db_alert)
+    await db.commit()
+    await db.refresh(db_alert)
     return db_alert
 
 
@@ -102,14 +106,14 @@ async def create_alert(
 async def get_alerts(
     request: Request,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get all alerts for the current user.
     
     Returns both active and paused alerts.
     """
-    alerts = db.query(Alert).filter(Alert.user_id == user_id).all()
+    alerts = (await db.scalars(select(Alert).where(Alert.user_id == user_id))).all()
     return alerts
 
 
@@ -119,15 +123,17 @@ async def get_alert(
     request: Request,
     alert_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get a specific alert by ID.
     """
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == user_id,
-    ).first()
+    alert = await db.scalar(
+        select(Alert).where(
+            Alert.id == alert_id,
+            Alert.user_id == user_id,
+        )
+    )
     
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
@@ -142,7 +148,7 @@ async def update_alert(
     alert_id: str,
     alert_update: AlertUpdate,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update an alert's criteria or status.
@@ -152,10 +158,12 @@ async def update_alert(
     - Change search criteria
     - Rename the alert
     """
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == user_id,
-    ).first()
+    alert = await db.scalar(
+        select(Alert).where(
+            Alert.id == alert_id,
+            Alert.user_id == user_id,
+        )
+    )
     
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
@@ -165,8 +173,12 @@ async def update_alert(
     for field, value in update_data.items():
         setattr(alert, field, value)
 
-    db.commit()
-    db.refresh(alert)
+    # Keep canonical criteria in sync with the raw make/model
+    alert.make_normalized = canonicalize_make(alert.make)
+    alert.model_normalized = canonicalize_model(alert.model, alert.make)
+
+    await db.commit()
+    await db.refresh(alert)
     return alert
 
 
@@ -176,19 +188,21 @@ async def delete_alert(
     request: Request,
     alert_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Delete an alert.
     """
-    alert = db.query(Alert).filter(
-        Alert.id == alert_id,
-        Alert.user_id == user_id,
-    ).first()
+    alert = await db.scalar(
+        select(Alert).where(
+            Alert.id == alert_id,
+            Alert.user_id == user_id,
+        )
+    )
     
     if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
 
-    db.delete(alert)
-    db.commit()
+    await db.delete(alert)
+    await db.commit()
     return None
@@ -1,11 +1,24 @@
-from fastapi import APIRouter, HTTPException, Depends, Request
-from typing import List
+import asyncio
+import time
+
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, BackgroundTasks, Query
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional, Tuple
 from uuid import uuid4
 from datetime import datetime, timezone
-from sqlalchemy.orm import Session
+from sqlalchemy import String, cast, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.models.car import Car, CarCreate, CarResponse
-from backend.database import get_db
+from backend.models.user import User
+from backend.database import get_async_db, get_async_read_db
+from backend.services.http_cache import (
+    HTTP_CACHE_CONTROL_TRENDING,
+    make_etag,
+    is_not_modified,
+    cache_headers,
+    not_modified_response,
+)
 
 # Rate Limiting
 from slowapi import Limiter
@@ -20,8 +33,28 @@ router = APIRouter(
 )
 
 
+def get_car_fields(
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated CarResponse fields to return (e.g. id,make,model,price). "
+                    "Only these columns are read. Defaults to all fields.",
+    ),
+) -> Tuple[str, ...]:
+    """Sparse fieldset dependency for list endpoints."""
+    from backend.services.serialization import parse_fields
+
+    try:
+        return parse_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post("/", response_model=CarResponse)
-async def create_car(car: CarCreate, db: Session = Depends(get_db)):
+async def create_car(
+    car: CarCreate,
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Ingest a new car listing.
     Used by: The Hunter (Scraper)
@@ -30,25 +63,46 @@ async def create_car(car: CarCreate, db: Session = Depends(get_db)):
     Deduplication Strategy:
     1. Primary: Check by listing_url (always unique per listing)
     2. Secondary: Check by VIN (if provided)
+
+    Cached trending lists are invalidated when the listing changes their top.
+    New listings are merged into stored per-user recommendations in the background
+    and queued for AI pre-analysis (S/A deals first), unless red flags in the
+    description already decide the verdict (services/red_flags.py).
     """
+    from backend.services.trending import trending_cache
+    from backend.services.metrics import CARS_INGESTED
+
     # Primary dedup: Check by listing URL
-    existing_by_url = db.query(Car).filter(Car.listing_url == str(car.listing_url)).first()
+    existing_by_url = await db.scalar(
+        select(Car).where(Car.listing_url == str(car.listing_url)).limit(1)
+    )
     if existing_by_url:
         # Update timestamp and image if missing
+        # A re-see only moves last_seen_at, which doesn't affect trending
+        # ranking, so cached lists are kept (a filled-in image is shown, so
+        # that does refresh them)
         existing_by_url.last_seen_at = datetime.now(timezone.utc)
-        if not existing_by_url.image_url and car.image_url:
+        image_added = not existing_by_url.image_url and bool(car.image_url)
+        if image_added:
             existing_by_url.image_url = str(car.image_url)
-        db.commit()
+        await db.commit()
+        if image_added:
+            trending_cache.notify_car_changed(existing_by_url)
+        CARS_INGESTED.labels("deduped").inc()
         return existing_by_url
     
     # Secondary dedup: Check by VIN
     if car.vin and len(car.vin) >= 10:
-        existing_by_vin = db.query(Car).filter(Car.vin == car.vin).first()
+        existing_by_vin = await db.scalar(select(Car).where(Car.vin == car.vin).limit(1))
         if existing_by_vin:
             existing_by_vin.last_seen_at = datetime.now(timezone.utc)
-            if not existing_by_vin.image_url and car.image_url:
+            image_added = not existing_by_vin.image_url and bool(car.image_url)
+            if image_added:
                 existing_by_vin.image_url = str(car.image_url)
-            db.commit()
+            await db.commit()
+            if image_added:
+                trending_cache.notify_car_changed(existing_by_vin)
+            CARS_INGESTED.labels("deduped").inc()
             return existing_by_vin
 
     new_car_data = car.model_dump()
@@ -61,6 +115,18 @@ async def create_car(car: CarCreate, db: Session = Depends(get_db)):
     db_car.status = "active"
     db_car.ai_verdict = "Pending Analysis"
 
+    # Canonical make/model for indexed equality filters
+    from backend.services.catalog import canonicalize_make, canonicalize_model
+    db_car.make_normalized = canonicalize_make(db_car.make)
+    db_car.model_normalized = canonicalize_model(db_car.model, db_car.make)
+
+    # Red-flag tags; clear-cut listings get their verdict without the AI
+    from backend.services.red_flags import rule_based_verdict, scan_description
+    db_car.red_flags = scan_description(db_car.description)
+    rule_verdict = rule_based_verdict(db_car.red_flags)
+    if rule_verdict:
+        db_car.ai_verdict = rule_verdict
+
     # --- Quant Service Integration ---
     from backend.services.quant.fmv import estimate_fair_market_value
     from backend.services.quant.deal_grader import calculate_deal_grade
@@ -81,11 +147,29 @@ async def create_car(car: CarCreate, db: Session = Depends(get_db)):
         listed_price=db_car.price,
         fair_market_value=fmv
     )
+
+    # 3. Monthly TCO at default assumptions (search filter/sort)
+    from backend.services.tco import default_monthly_tco
+    db_car.monthly_tco_default = default_monthly_tco(
+        db_car.price, db_car.year, db_car.fuel_type, db_car.body_type
+    )
     # ---------------------------------
 
     db.add(db_car)
-    db.commit()
-    db.refresh(db_car)
+
+    # Pre-analyze in the background (python -m backend.services.analysis_queue)
+    if not rule_verdict:
+        from backend.services.analysis_queue import enqueue_analysis
+        enqueue_analysis(db, db_car)
+
+    await db.commit()
+    await db.refresh(db_car)
+    trending_cache.notify_car_changed(db_car)
+    CARS_INGESTED.labels("created").inc()
+
+    from backend.services.recommendations import add_car_to_recommendations_job
+    background_tasks.add_task(add_car_to_recommendations_job, db_car.id)
+
     return db_car
 
 
@@ -95,15 +179,41 @@ async def read_cars(
     request: Request,  # Required for rate limiter
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    fields: Tuple[str, ...] = Depends(get_car_fields),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """
     Get all available cars.
     Used by: The Integrator (Frontend)
     Rate Limited: 30 requests/minute (Guest protection)
+
+    Conditional GET: the ETag is the inventory generation (row count + latest
+    update). A matching If-None-Match gets a 304 after that one aggregate
+    query, without loading any rows.
+
+    Rows are serialized on the fast path (services/serialization.py);
+    the JSON matches List[CarResponse], or just the requested `fields`.
     """
-    cars = db.query(Car).filter(Car.status == "active").offset(skip).limit(limit).all()
-    return cars
+    count, last_modified = (
+        await db.execute(select(func.count(Car.id), func.max(Car.updated_at)))
+    ).one()
+    etag = make_etag("cars", count, last_modified, skip, limit, ",".join(fields))
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    # Fast path: project the response columns and encode rows directly
+    from backend.services.serialization import car_response_columns, car_list_response
+
+    rows = (
+        await db.execute(
+            select(*car_response_columns(fields))
+            .filter(Car.status == "active")
+            .offset(skip)
+            .limit(limit)
+        )
+    ).all()
+    return car_list_response(rows, fields, headers=headers)
 
 
 from pydantic import BaseModel
@@ -124,7 +234,7 @@ async def get_recommendations(
     request: Request,
     preferences: RecommendationRequest,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get personalized car recommendations based on user preferences.
@@ -142,132 +252,211 @@ async def get_recommendations(
     Used by: Frontend after questionnaire completion
     Rate Limited: 30 requests/minute
     """
-    # Start with active cars within budget
-    query = db.query(Car).filter(
-        Car.status == "active",
-        Car.price <= preferences.max_budget
+    from backend.services.recommendations import get_top_recommendations
+
+    # Scored and ranked in SQL - only the top N rows are loaded
+    return await db.run_sync(
+        get_top_recommendations,
+        max_budget=preferences.max_budget,
+        body_types=preferences.body_types,
+        priority=preferences.priority,
+        limit=limit,
     )
-    
-    # Filter by body type if specified
-    if preferences.body_types:
-        query = query.filter(Car.body_type.in_(preferences.body_types))
-    
-    # Get all matching cars
-    matching_cars = query.all()
-    
-    # Score each car
-    scored_cars = []
-    for car in matching_cars:
-        score = 0
-        
-        # Deal grade scoring (higher is better)
-        grade_scores = {"S": 100, "A": 75, "B": 50, "C": 25, "D": 10, "F": 0}
-        score += grade_scores.get(car.deal_grade, 0)
-        
-        # Budget efficiency bonus (more room = better)
-        if preferences.max_budget > 0:
-            budget_ratio = (preferences.max_budget - car.price) / preferences.max_budget
-            score += int(budget_ratio * 30)  # Up to 30 bonus points for being under budget
-        
-        # Priority-based adjustments
-        if preferences.priority == "deal":
-            # Already weighted by deal grade above
-            pass
-        elif preferences.priority == "reliability":
-            # Boost Toyota, Honda, Lexus
-            reliable_makes = ["Toyota", "Honda", "Lexus", "Mazda", "Subaru"]
-            if car.make in reliable_makes:
-                score += 25
-        elif preferences.priority == "performance":
-            # Boost sports cars and certain makes
-            if car.body_type in ["Coupe", "Convertible"]:
-                score += 20
-            performance_makes = ["BMW", "Audi", "Mercedes-Benz", "Tesla", "Porsche"]
-            if car.make in performance_makes:
-                score += 15
-        
-        scored_cars.append((score, car))
-    
-    # Sort by score descending
-    scored_cars.sort(key=lambda x: x[0], reverse=True)
-    
-    # Return top N
-    top_cars = [car for (score, car) in scored_cars[:limit]]
-    return top_cars
 
 
 @router.get("/trending", response_model=List[CarResponse])
 @limiter.limit("30/minute")
 async def get_trending_cars(
     request: Request,
+    response: Response,
     limit: int = 10,
-    db: Session = Depends(get_db),
+    make: Optional[str] = None,
+    body_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """
     Get trending/best deals for the landing page.
     
-    Returns top S and A tier deals, ordered by:
-    1. Deal grade (S first, then A)
+    Returns top S and A tier deals (B tier as filler), ordered by:
+    1. Deal grade (S first, then A, then B)
     2. Most recently added
     
+    Optional segments: `make` (e.g. Toyota) and/or `body_type` (e.g. SUV).
+    
+    Served from an in-memory list that is only recomputed when ingestion
+    or an update changes the top of the market (see services/trending.py).
+    The ETag is the list's content version, so a fresh list answers
+    If-None-Match with a 304 without touching the DB.
+    
     Rate Limited: 30 requests/minute
     
     Used by: Frontend landing page "Top Deals" section
     """
-    cars = (
-        db.query(Car)
-        .filter(Car.status == "active")
-        .filter(Car.deal_grade.in_(["S", "A"]))  # Only good deals
-        .order_by(
-            Car.deal_grade.asc(),  # S before A
-            Car.created_at.desc()  # Newest first within grade
-        )
-        .limit(limit)
-        .all()
+    from backend.services.trending import trending_cache
+
+    # The DB is only touched (via run_sync) when the cached list must be rebuilt
+    cars, version = await db.run_sync(
+        trending_cache.get_versioned, limit, make=make, body_type=body_type
     )
+    etag = make_etag("trending", version)
+    headers = cache_headers(etag, cache_control=HTTP_CACHE_CONTROL_TRENDING)
+    if is_not_modified(request, etag):
+        return not_modified_response(headers)
+
+    response.headers.update(headers)
+    return cars
+
+
+# Upper bound on ids per batch lookup
+BATCH_MAX_IDS = 100
+
+
+class CarBatchResponse(BaseModel):
+    """Response for batch car lookup"""
+    cars: List[CarResponse]
+    missing: List[str]
+
+
+@router.get("/batch", response_model=CarBatchResponse)
+@limiter.limit("60/minute")
+async def read_cars_batch(
+    request: Request,
+    ids: str = Query(..., description=f"Comma-separated car ids (max {BATCH_MAX_IDS})"),
+    fields: Tuple[str, ...] = Depends(get_car_fields),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Get many cars by ID in one request.
     
-    # If we don't have enough S/A deals, fill with B tier
-    if len(cars) < limit:
-        remaining = limit - len(cars)
-        existing_ids = [c.id for c in cars]
-        
-        filler_cars = (
-            db.query(Car)
-            .filter(Car.status == "active")
-            .filter(Car.deal_grade == "B")
-            .filter(Car.id.notin_(existing_ids))
-            .order_by(Car.created_at.desc())
-            .limit(remaining)
-            .all()
-        )
-        cars.extend(filler_cars)
+    Resolves all ids with a single IN query. Cars come back in the requested
+    order (duplicates collapsed); ids that don't exist are listed in `missing`.
+    Includes sold/deleted cars, like GET /cars/{car_id}.
     
-    return cars
+    Used by: Saved cars view, comparison pages
+    Rate Limited: 60 requests/minute
+    """
+    from backend.services.serialization import car_response_columns, car_rows_to_dicts, json_response
+
+    requested = list(dict.fromkeys(car_id.strip() for car_id in ids.split(",") if car_id.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="Provide at least one car id")
+    if len(requested) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per request")
+
+    rows = (
+        await db.execute(select(*car_response_columns(fields)).filter(Car.id.in_(requested)))
+    ).all()
+    by_id = {car["id"]: car for car in car_rows_to_dicts(rows, fields)}
+
+    return json_response({
+        "cars": [by_id[car_id] for car_id in requested if car_id in by_id],
+        "missing": [car_id for car_id in requested if car_id not in by_id],
+    })
 
 
 @router.get("/{car_id}", response_model=CarResponse)
 @limiter.limit("60/minute")  # Higher limit for detail views
-async def read_car(request: Request, car_id: str, db: Session = Depends(get_db)):
+async def read_car(
+    request: Request,
+    response: Response,
+    car_id: str,
+    db: AsyncSession = Depends(get_async_read_db),
+):
     """
     Get a single car by ID.
     Rate Limited: 60 requests/minute
+
+    Conditional GET: the ETag is the car's update version. Revalidation
+    only reads that column; the full row is loaded on a miss.
     """
-    car = db.query(Car).filter(Car.id == car_id).first()
+    version = (
+        await db.execute(
+            select(func.coalesce(Car.updated_at, Car.created_at)).filter(Car.id == car_id)
+        )
+    ).first()
+    if version is None:
+        raise HTTPException(status_code=404, detail="Car not found")
+
+    last_modified = version[0]
+    etag = make_etag("car", car_id, last_modified)
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return not_modified_response(headers)
+
+    car = await db.scalar(select(Car).where(Car.id == car_id))
     if car is None:
         raise HTTPException(status_code=404, detail="Car not found")
+    response.headers.update(headers)
     return car
 
 
+# How often a request waiting on another worker's analysis re-checks the car
+ANALYSIS_POLL_SECONDS = 0.25
+
+
+async def _run_car_analysis(db: AsyncSession, car: Car, user_instructions: Optional[str] = None, **listing) -> str:
+    """
+    Run analyze_car_listing() for a car and store the verdict.
+
+    Concurrent requests for the same car share one Gemini call: within this
+    process through the AI pool's single-flight, across workers through the
+    car's analysis_started_at marker. A request that finds the marker set
+    waits for that verdict instead of starting its own (503 if it takes
+    longer than the AI timeout). Personalized analyses (user instructions)
+    skip the marker since their result is specific to one user.
+    """
+    from backend.services.ai import ANALYSIS_FAILED_VERDICT, NO_API_KEY_VERDICT, analyze_car_listing
+    from backend.services.ai_pool import AIUnavailableError, ai_pool, run_ai
+    from backend.services.analysis_queue import PENDING_VERDICT, begin_analysis, finish_analysis
+
+    car_id = car.id
+    if user_instructions:
+        verdict = await run_ai(
+            "analyze", analyze_car_listing, user_instructions=user_instructions, **listing
+        )
+        car.ai_verdict = verdict
+        await db.commit()
+        return verdict
+
+    deadline = time.monotonic() + ai_pool.timeout
+    while not await db.run_sync(lambda session: begin_analysis(session, car_id)):
+        # Another worker is analyzing this car; wait for its verdict
+        await asyncio.sleep(ANALYSIS_POLL_SECONDS)
+        started_at, verdict = (
+            await db.execute(select(Car.analysis_started_at, Car.ai_verdict).where(Car.id == car_id))
+        ).one()
+        await db.commit()  # Don't hold the connection between polls
+        if started_at is None and verdict not in (
+            None, PENDING_VERDICT, ANALYSIS_FAILED_VERDICT, NO_API_KEY_VERDICT
+        ):
+            return verdict
+        if time.monotonic() > deadline:
+            raise AIUnavailableError("Analysis already in progress, try again shortly.")
+
+    try:
+        verdict = await run_ai("analyze", analyze_car_listing, **listing)
+    except BaseException:
+        await db.run_sync(lambda session: finish_analysis(session, car_id))
+        raise
+    await db.run_sync(lambda session: finish_analysis(session, car_id, verdict))
+    return verdict
+
+
 @router.post("/{car_id}/analyze", response_model=CarResponse)
 @limiter.limit("10/minute")  # Strict limit - AI calls are expensive
-async def analyze_car(request: Request, car_id: str, db: Session = Depends(get_db)):
+async def analyze_car(
+    request: Request,
+    car_id: str,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Trigger Gemini AI analysis for a specific car.
     Rate Limited: 10 requests/minute (AI cost protection)
-    """
-    from backend.services.ai import analyze_car_listing
 
-    car = db.query(Car).filter(Car.id == car_id).first()
+    The Gemini call runs on the AI worker pool (never on the event loop);
+    503 if it times out or the pool is saturated.
+    """
+    car = await db.scalar(select(Car).where(Car.id == car_id))
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
 
@@ -275,27 +464,31 @@ async def analyze_car(request: Request, car_id: str, db: Session = Depends(get_d
     user_instructions = None
     user_id = request.headers.get("X-User-Id")
     if user_id:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
         if user:
             user_instructions = user.additional_instructions
 
-    # Perform Analysis
+    # Release the DB connection while waiting on the AI
+    await db.commit()
+
+    # Perform Analysis (stores the verdict)
     description_text = car.description if car.description else "No description provided."
 
-    verdict = analyze_car_listing(
+    await _run_car_analysis(
+        db,
+        car,
+        user_instructions=user_instructions,
         make=car.make,
         model_name=car.model,
         year=car.year,
         price=car.price,
         mileage=car.mileage,
         description=description_text,
-        user_instructions=user_instructions,
     )
+    await db.refresh(car)
 
-    # Update DB
-    car.ai_verdict = verdict
-    db.commit()
-    db.refresh(car)
+    from backend.services.trending import trending_cache
+    trending_cache.notify_car_changed(car)
 
     return car
 
@@ -307,6 +500,8 @@ async def analyze_car(request: Request, car_id: str, db: Session = Depends(get_d
 from pydantic import BaseModel, Field
 from typing import Optional
 
+from backend.services.red_flags import RedFlag
+
 
 class CarSearchFilters(BaseModel):
     """
@@ -340,6 +535,19 @@ class CarSearchFilters(BaseModel):
     # Deal filters
     deal_grade: Optional[str] = Field(None, description="S, A, B, C, F")
     only_good_deals: Optional[bool] = Field(False, description="Only show S and A grades")
+
+    # Red-flag filters (tags from services/red_flags.py)
+    red_flags: Optional[List[RedFlag]] = Field(None, description="Only cars with any of these red flags")
+    exclude_red_flags: Optional[List[RedFlag]] = Field(None, description="Hide cars with any of these red flags")
+    no_red_flags: Optional[bool] = Field(False, description="Only cars with no red flags")
+
+    # Cost of ownership (monthly TCO at default assumptions, see services/tco.py)
+    tco_max: Optional[float] = Field(None, description="Maximum monthly cost of ownership (CAD)", ge=0)
+
+    # Ordering
+    sort_by: Literal["deal_grade", "monthly_tco"] = Field(
+        "deal_grade", description="deal_grade (best deals first) or monthly_tco (cheapest to own first)"
+    )
     
     # Pagination
     skip: int = Field(0, description="Number of results to skip", ge=0)
@@ -351,7 +559,8 @@ class CarSearchFilters(BaseModel):
 async def search_cars(
     request: Request,
     filters: CarSearchFilters,
-    db: Session = Depends(get_db),
+    fields: Tuple[str, ...] = Depends(get_car_fields),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
     """
     Advanced car search with filters.
@@ -362,8 +571,17 @@ async def search_cars(
     - Send POST with JSON body containing filter criteria
     - Omit fields to skip those filters
     - Use only_good_deals=true for S/A tier deals only
+    - Use exclude_red_flags=["salvage_title", ...] or no_red_flags=true to hide risky listings
+    - Use tco_max=600 and/or sort_by="monthly_tco" for cheapest to own (default assumptions)
+
+    - Use ?fields=id,make,price to return (and read) only those columns
+
+    Rows are serialized on the fast path (services/serialization.py);
+    the JSON matches List[CarResponse], or just the requested `fields`.
     """
-    query = db.query(Car).filter(Car.status == "active")
+    from backend.services.serialization import car_response_columns, car_list_response
+
+    query = select(*car_response_columns(fields)).filter(Car.status == "active")
 
     # Free text search (make or model contains query)
     if filters.query:
@@ -372,16 +590,18 @@ async def search_cars(
             (Car.make.ilike(search_term)) | (Car.model.ilike(search_term))
         )
 
-    # Make filter (List)
-    if filters.make and len(filters.make) > 0:
-        # Create an OR condition for multiple makes (case-insensitive)
-        from sqlalchemy import or_
-        make_conditions = [Car.make.ilike(f"%{make}%") for make in filters.make]
-        query = query.filter(or_(*make_conditions))
+    # Make filter (List) - equality on the canonical, indexed column
+    from backend.services.catalog import canonicalize_make, canonicalize_model
+    makes = {canonicalize_make(make) for make in filters.make or []} - {None}
+    if makes:
+        query = query.filter(Car.make_normalized.in_(sorted(makes)))
 
-    # Model filter
+    # Model filter (aliases resolved against the make when exactly one is given)
     if filters.model:
-        query = query.filter(Car.model.ilike(f"%{filters.model}%"))
+        make_hint = filters.make[0] if filters.make and len(filters.make) == 1 else None
+        query = query.filter(
+            Car.model_normalized == canonicalize_model(filters.model, make_hint)
+        )
 
     # Year range
     if filters.year_min:
@@ -421,16 +641,33 @@ async def search_cars(
     elif filters.only_good_deals:
         query = query.filter(Car.deal_grade.in_(["S", "A"]))
 
-    # Order by best deals first, then newest
-    query = query.order_by(
-        Car.deal_grade.asc(),  # S, A, B, C, F
-        Car.created_at.desc()
-    )
+    # Red flags: tags are stored as a JSON array, so match the quoted tag
+    # in its text form (works the same on SQLite and PostgreSQL)
+    red_flags_text = cast(Car.red_flags, String)
+    if filters.red_flags:
+        query = query.filter(or_(*(red_flags_text.like(f'%"{tag}"%') for tag in filters.red_flags)))
+    for tag in filters.exclude_red_flags or []:
+        query = query.filter(or_(Car.red_flags.is_(None), ~red_flags_text.like(f'%"{tag}"%')))
+    if filters.no_red_flags:
+        query = query.filter(or_(Car.red_flags.is_(None), ~red_flags_text.like('%"%')))
+
+    # Monthly cost of ownership (indexed with status)
+    if filters.tco_max is not None:
+        query = query.filter(Car.monthly_tco_default <= filters.tco_max)
+
+    # Order by best deals first (default) or cheapest to own, then newest
+    if filters.sort_by == "monthly_tco":
+        query = query.order_by(Car.monthly_tco_default.asc().nulls_last(), Car.created_at.desc())
+    else:
+        query = query.order_by(
+            Car.deal_grade.asc(),  # S, A, B, C, F
+            Car.created_at.desc()
+        )
 
     # Pagination
-    cars = query.offset(filters.skip).limit(filters.limit).all()
+    rows = (await db.execute(query.offset(filters.skip).limit(filters.limit))).all()
 
-    return cars
+    return car_list_response(rows, fields)
 
 
 # ============================================================================
@@ -458,13 +695,116 @@ class TCOResponse(BaseModel):
     assumptions: dict
 
 
+class TCOBatchRequest(TCORequest):
+    """Request body for batch TCO: many cars, one set of assumptions"""
+    car_ids: List[str] = Field(..., description=f"Car ids to price (max {BATCH_MAX_IDS})", min_length=1)
+
+
+class TCOBatchItem(BaseModel):
+    """TCO for one car in a batch"""
+    car_id: str
+    car_title: str
+    purchase_price: float
+    fuel_type: str
+    monthly_total: float
+    monthly_fuel: float
+    monthly_depreciation: float
+    monthly_insurance: float
+    monthly_maintenance: float
+    annual_total: float
+
+
+class TCOBatchResponse(BaseModel):
+    """Response for batch TCO calculation"""
+    results: List[TCOBatchItem]
+    missing: List[str]
+    assumptions: dict
+
+
+@router.post("/tco/batch", response_model=TCOBatchResponse)
+@limiter.limit("30/minute")
+async def calculate_tco_batch(
+    request: Request,
+    tco_request: TCOBatchRequest,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    """
+    Total Cost of Ownership for many cars in one request.
+
+    Same breakdown as POST /cars/{car_id}/tco, for up to 100 cars sharing
+    one set of assumptions: one DB query, and every component computed for
+    all cars at once (services/tco.py calculate_tco_batch). Results come back
+    in the requested order; unknown ids are listed in `missing`.
+
+    Used by: comparison pages
+    Rate Limited: 30 requests/minute (one call covers the whole page)
+    """
+    from backend.services.serialization import json_response
+    from backend.services.tco import calculate_tco_batch as tco_batch
+
+    requested = list(dict.fromkeys(car_id.strip() for car_id in tco_request.car_ids if car_id.strip()))
+    if not requested:
+        raise HTTPException(status_code=400, detail="Provide at least one car id")
+    if len(requested) > BATCH_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {BATCH_MAX_IDS} ids per request")
+
+    rows = (
+        await db.execute(
+            select(Car.id, Car.year, Car.make, Car.model, Car.price, Car.fuel_type)
+            .filter(Car.id.in_(requested))
+        )
+    ).all()
+    by_id = {row.id: row for row in rows}
+    cars = [by_id[car_id] for car_id in requested if car_id in by_id]
+
+    fuel_types = [car.fuel_type or "gasoline" for car in cars]
+    tco = tco_batch(
+        purchase_prices=[car.price for car in cars],
+        vehicle_years=[car.year for car in cars],
+        fuel_types=fuel_types,
+        annual_km=tco_request.annual_km,
+        fuel_price=tco_request.fuel_price,
+        vehicle_type=tco_request.vehicle_type,
+    )
+    components = zip(
+        tco.monthly_total.tolist(),
+        tco.monthly_fuel.tolist(),
+        tco.monthly_depreciation.tolist(),
+        tco.monthly_insurance.tolist(),
+        tco.monthly_maintenance.tolist(),
+        tco.annual_total.tolist(),
+    )
+    results = [
+        {
+            "car_id": car.id,
+            "car_title": f"{car.year} {car.make} {car.model}",
+            "purchase_price": car.price,
+            "fuel_type": fuel_type,
+            "monthly_total": total,
+            "monthly_fuel": fuel,
+            "monthly_depreciation": depreciation,
+            "monthly_insurance": insurance,
+            "monthly_maintenance": maintenance,
+            "annual_total": annual,
+        }
+        for car, fuel_type, (total, fuel, depreciation, insurance, maintenance, annual)
+        in zip(cars, fuel_types, components)
+    ]
+
+    return json_response({
+        "results": results,
+        "missing": [car_id for car_id in requested if car_id not in by_id],
+        "assumptions": tco.assumptions,
+    })
+
+
 @router.post("/{car_id}/tco", response_model=TCOResponse)
 @limiter.limit("30/minute")
 async def calculate_car_tco(
     request: Request,
     car_id: str,
     tco_request: TCORequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Calculate Total Cost of Ownership for a specific car.
@@ -485,7 +825,7 @@ async def calculate_car_tco(
     """
     from backend.services.tco import calculate_tco
     
-    car = db.query(Car).filter(Car.id == car_id).first()
+    car = await db.scalar(select(Car).where(Car.id == car_id))
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
     
@@ -538,28 +878,22 @@ class NegotiationResponse(BaseModel):
     quick_tips: list
 
 
-@router.post("/{car_id}/negotiate", response_model=NegotiationResponse)
-@limiter.limit("10/minute")  # Stricter limit - AI calls are expensive
-async def generate_negotiation(
+async def _negotiation_context(
     request: Request,
     car_id: str,
-    neg_request: NegotiationRequest = None,
-    db: Session = Depends(get_db),
-):
+    neg_request: Optional[NegotiationRequest],
+    db: AsyncSession,
+) -> Tuple[dict, dict]:
     """
-    Generate a negotiation script for a specific car.
-    
-    Uses AI to create personalized talking points based on:
-    - Price vs fair market value
-    - Deal grade
-    - Known issues
-    
-    Rate Limited: 10 requests/minute (AI cost protection)
+    Everything a negotiation needs except the AI script.
+
+    Returns the NegotiationResponse fields (price math, quick tips) and the
+    keyword arguments for the script generator. Releases the DB connection.
     """
-    from backend.services.ai import generate_negotiation_script, generate_quick_tips
+    from backend.services.ai import generate_quick_tips
     from backend.services.quant.fmv import estimate_fair_market_value
     
-    car = db.query(Car).filter(Car.id == car_id).first()
+    car = await db.scalar(select(Car).where(Car.id == car_id))
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
     
@@ -575,43 +909,133 @@ async def generate_negotiation(
     price_diff = car.price - fmv
     price_diff_pct = (price_diff / fmv) * 100 if fmv > 0 else 0
     
-    # Get issues from request or use None
+    # Get issues from request, else the red flags found at ingestion
     known_issues = neg_request.known_issues if neg_request else None
+    if not known_issues and car.red_flags:
+        from backend.services.red_flags import describe_red_flags
+        known_issues = describe_red_flags(car.red_flags)
     
     # Fetch user instructions if available
     user_instructions = None
     user_id = request.headers.get("X-User-Id")
     if user_id:
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
         if user:
             user_instructions = user.additional_instructions
 
-    # Generate the AI script
-    script = generate_negotiation_script(
-        make=car.make,
-        model_name=car.model,
-        year=car.year,
-        listed_price=car.price,
-        fair_market_value=fmv,
-        mileage=car.mileage or 0,
-        deal_grade=car.deal_grade or "B",
-        issues=known_issues,
-        user_instructions=user_instructions,
-    )
+    # Release the DB connection while waiting on the AI
+    await db.commit()
+
+    summary = {
+        "car_id": car.id,
+        "car_title": f"{car.year} {car.make} {car.model}",
+        "deal_grade": car.deal_grade or "B",
+        "listed_price": car.price,
+        "fair_market_value": round(fmv, 2),
+        "price_difference": round(price_diff, 2),
+        "price_difference_pct": round(price_diff_pct, 2),
+        # Quick tips (no AI, instant)
+        "quick_tips": generate_quick_tips(car.deal_grade or "B", price_diff_pct),
+    }
+    script_kwargs = {
+        "make": car.make,
+        "model_name": car.model,
+        "year": car.year,
+        "listed_price": car.price,
+        "fair_market_value": fmv,
+        "mileage": car.mileage or 0,
+        "deal_grade": car.deal_grade or "B",
+        "issues": known_issues,
+        "user_instructions": user_instructions,
+    }
+    return summary, script_kwargs
+
+
+@router.post("/{car_id}/negotiate", response_model=NegotiationResponse)
+@limiter.limit("10/minute")  # Stricter limit - AI calls are expensive
+async def generate_negotiation(
+    request: Request,
+    car_id: str,
+    neg_request: NegotiationRequest = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Generate a negotiation script for a specific car.
     
-    # Get quick tips (no AI, instant)
-    tips = generate_quick_tips(car.deal_grade or "B", price_diff_pct)
+    Uses AI to create personalized talking points based on:
+    - Price vs fair market value
+    - Deal grade
+    - Known issues
     
-    return NegotiationResponse(
-        car_id=car.id,
-        car_title=f"{car.year} {car.make} {car.model}",
-        deal_grade=car.deal_grade or "B",
-        listed_price=car.price,
-        fair_market_value=round(fmv, 2),
-        price_difference=round(price_diff, 2),
-        price_difference_pct=round(price_diff_pct, 2),
-        script=script,
-        quick_tips=tips,
+    Rate Limited: 10 requests/minute (AI cost protection)
+    The script is generated on the AI worker pool; 503 if it is saturated or times out.
+    See /negotiate/stream for a streamed variant.
+    """
+    from backend.services.ai import generate_negotiation_script
+    from backend.services.ai_pool import run_ai
+    
+    summary, script_kwargs = await _negotiation_context(request, car_id, neg_request, db)
+
+    # Generate the AI script
+    script = await run_ai("negotiate", generate_negotiation_script, **script_kwargs)
+    
+    return NegotiationResponse(script=script, **summary)
+
+
+def _sse_event(event: str, data) -> bytes:
+    """One Server-Sent Events message with a JSON payload."""
+    from backend.services.serialization import dump_json
+    return b"event: " + event.encode() + b"\ndata: " + dump_json(data) + b"\n\n"
+
+
+@router.post("/{car_id}/negotiate/stream")
+@limiter.limit("10/minute")  # Same budget as /negotiate
+async def stream_negotiation(
+    request: Request,
+    car_id: str,
+    neg_request: NegotiationRequest = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Negotiation script streamed as Server-Sent Events (text/event-stream).
+
+    The price math and quick tips go out first, before any AI work, then
+    the script arrives as the model writes it:
+
+    - event: summary  - NegotiationResponse fields except `script`
+    - event: script   - {"text": "..."} chunk of the script, in order
+    - event: done     - {"script": "..."} the complete script
+    - event: error    - {"detail": "...", "retry_after": 5} the script failed
+      (AI busy, timed out or errored); the summary still stands
+
+    Rate Limited: 10 requests/minute (AI cost protection)
+    """
+    from backend.services.ai import NEGOTIATION_FAILED_SCRIPT, stream_negotiation_script
+    from backend.services.ai_pool import AIUnavailableError, ai_pool
+
+    summary, script_kwargs = await _negotiation_context(request, car_id, neg_request, db)
+
+    async def events():
+        yield _sse_event("summary", summary)
+        parts = []
+        try:
+            async for text in ai_pool.stream("negotiate", stream_negotiation_script, **script_kwargs):
+                parts.append(text)
+                yield _sse_event("script", {"text": text})
+        except AIUnavailableError as e:
+            yield _sse_event("error", {"detail": str(e), "retry_after": 5})
+            return
+        except Exception as e:
+            print(f"Gemini Error: {e}")
+            yield _sse_event("error", {"detail": NEGOTIATION_FAILED_SCRIPT, "retry_after": 5})
+            return
+        yield _sse_event("done", {"script": "".join(parts)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # No proxy buffering, so each chunk reaches the client as it's sent
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
@@ -626,7 +1050,7 @@ class AIAnalysisResponse(BaseModel):
 async def analyze_car_with_ai(
     request: Request,
     car_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     🧠 Gemini Vibe Check - AI-powered deal analysis.
@@ -636,14 +1060,15 @@ async def analyze_car_with_ai(
     
     Rate Limited: 10 requests/minute (AI costs)
     """
-    from backend.services.ai import analyze_car_listing
-    
-    car = db.query(Car).filter(Car.id == car_id).first()
+    car = await db.scalar(select(Car).where(Car.id == car_id))
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
+    await db.commit()  # Release the DB connection while waiting on the AI
     
-    # Call Gemini
-    verdict = analyze_car_listing(
+    # Call Gemini (the verdict is saved to the car record)
+    verdict = await _run_car_analysis(
+        db,
+        car,
         make=car.make,
         model_name=car.model,
         year=car.year or 2020,
@@ -651,10 +1076,10 @@ async def analyze_car_with_ai(
         mileage=car.mileage or 0,
         description=car.description or "No description available."
     )
-    
-    # Optionally save the verdict to the car record
-    car.ai_verdict = verdict
-    db.commit()
+
+    await db.refresh(car)
+    from backend.services.trending import trending_cache
+    trending_cache.notify_car_changed(car)
     
     return AIAnalysisResponse(
         car_id=car.id,
@@ -1,6 +1,7 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, Header
-from sqlalchemy.orm import Session
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Depends, Request, Header, BackgroundTasks, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, List
 from datetime import datetime, timezone
 from uuid import uuid4
 
@@ -10,7 +11,8 @@ from backend.models.user import (
     UserProfileUpdate,
     UserResponse,
 )
-from backend.database import get_db
+from backend.models.car import CarResponse
+from backend.database import get_async_db
 
 # Rate Limiting
 from slowapi import Limiter
@@ -53,7 +55,7 @@ async def get_current_user_id(
 # ============================================================================
 
 @router.post("/", response_model=UserResponse, status_code=201)
-async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create a new user after OAuth signup.
     Called by frontend after Supabase Auth returns.
@@ -61,7 +63,7 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     Note: This should only be called once per user.
     """
     # Check if user already exists
-    existing_user = db.query(User).filter(User.id == user_data.id).first()
+    existing_user = await db.scalar(select(User).where(User.id == user_data.id))
     if existing_user:
         return existing_user
 
@@ -75,19 +77,23 @@ async def create_user(user_data: UserCreate, db: Session = Depends(get_db)):
     )
 
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 
 @router.get("/by-email/{email}", response_model=UserResponse)
 @limiter.limit("10/minute")
-async def get_user_by_email(request: Request, email: str, db: Session = Depends(get_db)):
+async def get_user_by_email(
+    request: Request,
+    email: str,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get user by email.
     Useful for login simulation when auth is not fully implemented.
     """
-    user = db.query(User).filter(User.email == email).first()
+    user = await db.scalar(select(User).where(User.email == email))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
@@ -98,7 +104,7 @@ async def get_user_by_email(request: Request, email: str, db: Session = Depends(
 async def get_current_user(
     request: Request,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get the current user's profile.
@@ -106,7 +112,7 @@ async def get_current_user(
     DEMO MVP: If user doesn't exist, auto-create a guest profile.
     This ensures zero-friction for hackathon judges.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     
     if not user:
         # Auto-create guest
@@ -118,8 +124,8 @@ async def get_current_user(
             updated_at=datetime.now(timezone.utc),
         )
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
     return user
 
@@ -129,16 +135,19 @@ async def get_current_user(
 async def update_current_user(
     request: Request,
     profile_update: UserProfileUpdate,
+    background_tasks: BackgroundTasks,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Update the current user's profile.
     
     On first completion (when first_name is set), marks profile_complete=true.
     This unblocks the user from the onboarding flow.
+
+    Stored recommendations are rebuilt from the new profile in the background.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -154,28 +163,70 @@ async def update_current_user(
 
     user.updated_at = datetime.now(timezone.utc)
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
+
+    from backend.services.recommendations import refresh_user_recommendations_job
+    background_tasks.add_task(refresh_user_recommendations_job, user.id)
+
     return user
 
 
+@router.get("/me/recommendations", response_model=List[CarResponse])
+@limiter.limit("60/minute")
+async def get_my_recommendations(
+    request: Request,
+    limit: int = 10,
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Get the current user's recommendations from their profile.
+    
+    Served from the precomputed candidate list (no inventory scoring pass).
+    The list is built on first request if it has never been built; a list
+    that was built and came out empty stays empty until the profile changes
+    or new cars are merged in.
+    Returns an empty list until the profile is complete with a buying power.
+    """
+    from backend.services.recommendations import (
+        get_stored_recommendations,
+        refresh_user_recommendations,
+    )
+
+    cars = await db.run_sync(get_stored_recommendations, user_id, limit)
+    if cars:
+        return cars
+
+    user = await db.scalar(select(User).where(User.id == user_id))
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    # Cold start: materialize once, then serve from the stored list
+    if user.recommendations_computed_at is None and await db.run_sync(
+        refresh_user_recommendations, user
+    ):
+        cars = await db.run_sync(get_stored_recommendations, user_id, limit)
+    return cars
+
+
 @router.delete("/me", status_code=204)
 async def delete_current_user(
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Delete the current user's account.
     
     Warning: This also deletes all saved cars for this user.
     """
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Delete user (cascade will handle saved_cars if configured)
-    db.delete(user)
-    db.commit()
+    await db.delete(user)
+    await db.commit()
     return None
 
 
@@ -183,9 +234,15 @@ async def delete_current_user(
 # SAVED CARS ENDPOINTS
 # ============================================================================
 
-from backend.models.user import SavedCar, SavedCarCreate, SavedCarResponse
-from backend.models.car import Car, CarResponse
-from typing import List
+from backend.models.user import (
+    SavedCar,
+    SavedCarCreate,
+    SavedCarResponse,
+    SavedCarLookupResponse,
+)
+from backend.models.car import Car
+from sqlalchemy import and_, or_
+import base64
 
 
 class SavedCarWithDetails(SavedCarResponse):
@@ -199,7 +256,7 @@ async def save_car(
     request: Request,
     car_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Save a car to user's garage.
@@ -207,15 +264,17 @@ async def save_car(
     If car is already saved, returns the existing entry.
     """
     # Check if car exists
-    car = db.query(Car).filter(Car.id == car_id).first()
+    car = await db.scalar(select(Car).where(Car.id == car_id))
     if not car:
         raise HTTPException(status_code=404, detail="Car not found")
 
     # Check if already saved
-    existing = db.query(SavedCar).filter(
-        SavedCar.user_id == user_id,
-        SavedCar.car_id == car_id,
-    ).first()
+    existing = await db.scalar(
+        select(SavedCar).where(
+            SavedCar.user_id == user_id,
+            SavedCar.car_id == car_id,
+        )
+    )
     
     if existing:
         return existing
@@ -229,38 +288,108 @@ async def save_car(
     )
 
     db.add(saved_car)
-    db.commit()
-    db.refresh(saved_car)
+    await db.commit()
+    await db.refresh(saved_car)
     return saved_car
 
 
+# Page size bounds for the garage and id lookups
+SAVED_CARS_PAGE_MAX = 100
+SAVED_LOOKUP_MAX_IDS = 100
+
+
+def _encode_cursor(saved_at: datetime, saved_id: str) -> str:
+    """Opaque keyset cursor: position after (saved_at, id)."""
+    raw = f"{saved_at.isoformat()}|{saved_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str):
+    try:
+        saved_at, saved_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(saved_at), saved_id
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/saved-cars", response_model=List[CarResponse])
 @limiter.limit("30/minute")
 async def get_saved_cars(
     request: Request,
+    limit: Optional[int] = Query(None, ge=1, le=SAVED_CARS_PAGE_MAX, description="Page size (omit for all)"),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
-    Get all cars saved by the current user.
+    Get cars saved by the current user, most recently saved first.
+    
+    One JOIN query per page, keyset-paginated on (saved_at, id).
+    Without `limit` the whole garage is returned, as existing clients expect.
+    With `limit`, when more results exist the response carries an
+    `X-Next-Cursor` header; pass it back as `?cursor=` to get the next page.
     
     IMPORTANT: This returns cars even if they are sold/deleted.
     The frontend should check the 'status' field and show a "SOLD" badge.
     Cars with status 'sold' or 'deleted' should NOT allow clicking to details.
     """
-    # Get all saved car entries for this user
-    saved_entries = db.query(SavedCar).filter(SavedCar.user_id == user_id).all()
-    
-    if not saved_entries:
-        return []
+    from backend.services.serialization import car_response_columns, car_list_response
 
-    # Get the car IDs
-    car_ids = [entry.car_id for entry in saved_entries]
-    
-    # Fetch all cars (including sold/deleted ones)
-    cars = db.query(Car).filter(Car.id.in_(car_ids)).all()
+    query = (
+        select(*car_response_columns(), SavedCar.saved_at, SavedCar.id)
+        .join(SavedCar, SavedCar.car_id == Car.id)
+        .filter(SavedCar.user_id == user_id)
+    )
+
+    if cursor:
+        after_saved_at, after_id = _decode_cursor(cursor)
+        query = query.filter(
+            or_(
+                SavedCar.saved_at < after_saved_at,
+                and_(SavedCar.saved_at == after_saved_at, SavedCar.id < after_id),
+            )
+        )
+
+    query = query.order_by(SavedCar.saved_at.desc(), SavedCar.id.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)  # One extra row tells us whether another page exists
+    rows = (await db.execute(query)).all()
+
+    headers = {}
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = _encode_cursor(rows[-1][-2], rows[-1][-1])
+
+    return car_list_response((row[:-2] for row in rows), headers=headers)
+
+
+@router.get("/saved-cars/lookup", response_model=SavedCarLookupResponse)
+@limiter.limit("60/minute")
+async def lookup_saved_cars(
+    request: Request,
+    car_ids: str = Query(..., description=f"Comma-separated car ids (max {SAVED_LOOKUP_MAX_IDS})"),
+    user_id: str = Depends(get_current_user_id),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Which of these cars has the current user saved?
     
-    return cars
+    One indexed query for a whole results page, so search grids can
+    render heart icons without a lookup per card.
+    """
+    requested = list(dict.fromkeys(car_id.strip() for car_id in car_ids.split(",") if car_id.strip()))
+    if len(requested) > SAVED_LOOKUP_MAX_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {SAVED_LOOKUP_MAX_IDS} ids per request")
+
+    saved = set(
+        await db.scalars(
+            select(SavedCar.car_id)
+            .where(SavedCar.user_id == user_id, SavedCar.car_id.in_(requested))
+        )
+    )
+    return SavedCarLookupResponse(
+        saved_car_ids=[car_id for car_id in requested if car_id in saved]
+    )
 
 
 @router.delete("/saved-cars/{car_id}", status_code=204)
@@ -269,19 +398,21 @@ async def unsave_car(
     request: Request,
     car_id: str,
     user_id: str = Depends(get_current_user_id),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Remove a car from user's saved list.
     """
-    saved_entry = db.query(SavedCar).filter(
-        SavedCar.user_id == user_id,
-        SavedCar.car_id == car_id,
-    ).first()
+    saved_entry = await db.scalar(
+        select(SavedCar).where(
+            SavedCar.user_id == user_id,
+            SavedCar.car_id == car_id,
+        )
+    )
     
     if not saved_entry:
         raise HTTPException(status_code=404, detail="Saved car not found")
 
-    db.delete(saved_entry)
-    db.commit()
+    await db.delete(saved_entry)
+    await db.commit()
     return None
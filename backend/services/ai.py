@@ -1,27 +1,106 @@
-import google.generativeai as genai
-import os
-from dotenv import load_dotenv
+import time
+from typing import Iterator, Tuple
 
-load_dotenv()
+from backend.services.ai_breaker import AICircuitOpenError, ai_breaker
+from backend.services.ai_cache import ai_cache, prompt_fingerprint
+from backend.services.ai_pool import AI_TIMEOUT_SECONDS
+from backend.services.ai_providers import get_provider
+from backend.services.metrics import AI_CALL_FAILURES, AI_CALL_LATENCY, AI_FALLBACKS
+from backend.services.red_flags import describe_red_flags, rule_based_verdict, scan_description
 
-API_KEY = os.getenv("GEMINI_API_KEY")
+# Bump when a prompt template changes, so cached responses aren't reused
+ANALYZE_PROMPT_VERSION = "2"
+NEGOTIATE_PROMPT_VERSION = "1"
 
-if not API_KEY:
-    print("WARNING: GEMINI_API_KEY not found. AI features will fail.")
+# Verdicts that mean no analysis happened (see analysis_queue.py)
+NO_API_KEY_VERDICT = "AI Error: No API Key"
+ANALYSIS_FAILED_VERDICT = "AI Analysis Failed"
 
-# Configure Gemini
-genai.configure(api_key=API_KEY)
+NO_API_KEY_SCRIPT = "AI Error: No API Key configured."
+NEGOTIATION_FAILED_SCRIPT = "Failed to generate negotiation script. Please try again."
+
+
+def _ai_configured() -> bool:
+    """False if the AI provider can't be called (Gemini without an API key)."""
+    return get_provider().configured()
+
+
+def _generate(operation: str, prompt: str) -> str:
+    """
+    One provider call (Gemini unless AI_PROVIDER says otherwise), timed for
+    /metrics. Raises AICircuitOpenError without calling while the breaker is open.
+    """
+    token = ai_breaker.before_call()
+    start = time.perf_counter()
+    failed = True
+    try:
+        text = get_provider().generate(operation, prompt, timeout=AI_TIMEOUT_SECONDS)
+        failed = False
+        return text
+    except Exception:
+        AI_CALL_FAILURES.labels(operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        ai_breaker.record(token, failed, elapsed)
+        AI_CALL_LATENCY.labels(operation).observe(elapsed)
+
+
+def _generate_stream(operation: str, prompt: str) -> Iterator[str]:
+    """_generate(), yielding text chunks as the model produces them."""
+    token = ai_breaker.before_call()
+    start = time.perf_counter()
+    failed = None  # Stays None if the consumer stops reading early
+    try:
+        yield from get_provider().generate_stream(operation, prompt, timeout=AI_TIMEOUT_SECONDS)
+        failed = False
+    except Exception:
+        failed = True
+        AI_CALL_FAILURES.labels(operation).inc()
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        if failed is None:
+            ai_breaker.release(token)  # Says nothing about the provider
+        else:
+            ai_breaker.record(token, failed, elapsed)
+        AI_CALL_LATENCY.labels(operation).observe(elapsed)
+
+
+def _generate_cached(operation: str, cache_key: str, prompt: str) -> str:
+    """_generate() behind the response cache; only successes are stored."""
+    cached = ai_cache.get(cache_key, operation)
+    if cached is not None:
+        return cached
+
+    text = _generate(operation, prompt)
+    ai_cache.set(cache_key, text, operation)
+    return text
 
-# Use the fast, cost-effective Flash model
-model = genai.GenerativeModel('gemini-1.5-flash')
 
 def analyze_car_listing(make: str, model_name: str, year: int, price: float, mileage: int, description: str, user_instructions: str = None):
     """
     Sends car data to Gemini for a "Vibe Check" / Deal Analysis.
     Returns a short string verdict.
+
+    Clear-cut listings (severe red flags in the description) get a
+    rule-based verdict without a Gemini call, unless the user gave
+    instructions; otherwise the red flags found are passed into the prompt.
     """
-    if not API_KEY:
-        return "AI Error: No API Key"
+    red_flags = scan_description(description)
+    if not user_instructions:
+        verdict = rule_based_verdict(red_flags)
+        if verdict:
+            return verdict
+
+    if not _ai_configured():
+        return NO_API_KEY_VERDICT
+
+    cache_key = prompt_fingerprint(
+        "analyze", ANALYZE_PROMPT_VERSION,
+        make=make, model=model_name, year=year, price=price, mileage=mileage,
+        description=description, user_instructions=user_instructions,
+    )
 
     prompt = f"""
     You are a ruthless, expert car flipper. You only care about profit.
@@ -31,6 +110,7 @@ def analyze_car_listing(make: str, model_name: str, year: int, price: float, mil
     Price: ${price}
     Mileage: {mileage} miles
     Seller Description: "{description}"
+    Red Flags Found In Description: {describe_red_flags(red_flags) or 'None'}
     User Specific Interests: "{user_instructions if user_instructions else 'None provided'}"
 
     Task:
@@ -43,14 +123,16 @@ def analyze_car_listing(make: str, model_name: str, year: int, price: float, mil
     """
 
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return _generate_cached("analyze", cache_key, prompt)
+    except AICircuitOpenError:
+        AI_FALLBACKS.labels("analyze").inc()
+        return ANALYSIS_FAILED_VERDICT  # Fails fast; the queue retries later
     except Exception as e:
         print(f"Gemini Error: {e}")
-        return "AI Analysis Failed"
+        return ANALYSIS_FAILED_VERDICT
 
 
-def generate_negotiation_script(
+def _negotiation_prompt(
     make: str,
     model_name: str,
     year: int,
@@ -60,31 +142,8 @@ def generate_negotiation_script(
     deal_grade: str,
     issues: str = None,
     user_instructions: str = None,
-) -> str:
-    """
-    Generate a negotiation script for a buyer.
-    
-    Uses AI to create personalized talking points based on:
-    - Price vs FMV gap
-    - Deal grade
-    - Known issues
-    
-    Args:
-        make: Car make
-        model_name: Car model
-        year: Model year
-        listed_price: Seller's asking price
-        fair_market_value: Our calculated FMV
-        mileage: Odometer reading
-        deal_grade: S/A/B/C/F
-        issues: Optional known issues from description
-    
-    Returns:
-        Negotiation script text
-    """
-    if not API_KEY:
-        return "AI Error: No API Key configured."
-    
+) -> Tuple[str, str]:
+    """Cache key and prompt for a negotiation script."""
     price_diff = listed_price - fair_market_value
     price_diff_pct = (price_diff / fair_market_value) * 100 if fair_market_value > 0 else 0
     
@@ -97,6 +156,13 @@ def generate_negotiation_script(
         price_context = "priced at market value"
     
     issues_context = issues if issues else "No specific issues identified."
+
+    cache_key = prompt_fingerprint(
+        "negotiate", NEGOTIATE_PROMPT_VERSION,
+        make=make, model=model_name, year=year, listed_price=listed_price,
+        fair_market_value=fair_market_value, mileage=mileage, deal_grade=deal_grade,
+        issues=issues, user_instructions=user_instructions,
+    )
     
     prompt = f"""
     You are a skilled negotiation coach helping a car buyer.
@@ -126,13 +192,106 @@ def generate_negotiation_script(
     
     Format as a script they can practice before calling the seller.
     """
+    return cache_key, prompt
+
+
+def generate_negotiation_script(
+    make: str,
+    model_name: str,
+    year: int,
+    listed_price: float,
+    fair_market_value: float,
+    mileage: int,
+    deal_grade: str,
+    issues: str = None,
+    user_instructions: str = None,
+) -> str:
+    """
+    Generate a negotiation script for a buyer.
+    
+    Uses AI to create personalized talking points based on:
+    - Price vs FMV gap
+    - Deal grade
+    - Known issues
+    
+    Args:
+        make: Car make
+        model_name: Car model
+        year: Model year
+        listed_price: Seller's asking price
+        fair_market_value: Our calculated FMV
+        mileage: Odometer reading
+        deal_grade: S/A/B/C/F
+        issues: Optional known issues from description
+    
+    Returns:
+        Negotiation script text (a rule-based outline while the AI circuit
+        breaker is open, see generate_negotiation_outline)
+    """
+    if not _ai_configured():
+        return NO_API_KEY_SCRIPT
+
+    cache_key, prompt = _negotiation_prompt(
+        make, model_name, year, listed_price, fair_market_value, mileage,
+        deal_grade, issues, user_instructions,
+    )
     
     try:
-        response = model.generate_content(prompt)
-        return response.text.strip()
+        return _generate_cached("negotiate", cache_key, prompt)
+    except AICircuitOpenError:
+        AI_FALLBACKS.labels("negotiate").inc()
+        return generate_negotiation_outline(
+            make, model_name, year, listed_price, fair_market_value, deal_grade, issues,
+        )
     except Exception as e:
         print(f"Gemini Error: {e}")
-        return "Failed to generate negotiation script. Please try again."
+        return NEGOTIATION_FAILED_SCRIPT
+
+
+def stream_negotiation_script(
+    make: str,
+    model_name: str,
+    year: int,
+    listed_price: float,
+    fair_market_value: float,
+    mileage: int,
+    deal_grade: str,
+    issues: str = None,
+    user_instructions: str = None,
+) -> Iterator[str]:
+    """
+    generate_negotiation_script(), yielding the script as it is generated.
+
+    A cached script (or the rule-based outline, while the AI circuit breaker
+    is open) is yielded in one piece; a fresh one is cached once the
+    stream completes. Gemini errors propagate (part of the script may
+    already have been sent, so there is no failure text to fall back to).
+    """
+    if not _ai_configured():
+        yield NO_API_KEY_SCRIPT
+        return
+
+    cache_key, prompt = _negotiation_prompt(
+        make, model_name, year, listed_price, fair_market_value, mileage,
+        deal_grade, issues, user_instructions,
+    )
+    cached = ai_cache.get(cache_key, "negotiate")
+    if cached is not None:
+        yield cached
+        return
+
+    parts = []
+    try:
+        for text in _generate_stream("negotiate", prompt):
+            parts.append(text)
+            yield text
+    except AICircuitOpenError:
+        AI_FALLBACKS.labels("negotiate").inc()
+        yield generate_negotiation_outline(
+            make, model_name, year, listed_price, fair_market_value, deal_grade, issues,
+        )
+        return
+    ai_cache.set(cache_key, "".join(parts).strip(), "negotiate")
 
 
 def generate_quick_tips(deal_grade: str, price_diff_pct: float) -> list:
@@ -163,3 +322,57 @@ def generate_quick_tips(deal_grade: str, price_diff_pct: float) -> list:
     
     return tips
 
+
+def _round_to_hundred(amount: float) -> int:
+    return int(round(amount / 100.0)) * 100
+
+
+def generate_negotiation_outline(
+    make: str,
+    model_name: str,
+    year: int,
+    listed_price: float,
+    fair_market_value: float,
+    deal_grade: str,
+    issues: str = None,
+) -> str:
+    """
+    Negotiation outline from the FMV numbers alone (instant, no API call).
+
+    Served instead of the AI script while the AI circuit breaker is open.
+    """
+    price_diff = listed_price - fair_market_value
+    price_diff_pct = (price_diff / fair_market_value) * 100 if fair_market_value > 0 else 0
+
+    if price_diff > 0:
+        # Overpriced: anchor just under market value, walk away above it
+        target = _round_to_hundred(fair_market_value * 0.97)
+        walk_away = _round_to_hundred(fair_market_value)
+        leverage = (
+            f"Similar {year} {make} {model_name}s are worth about ${fair_market_value:,.0f}; "
+            f"this one is listed {price_diff_pct:.0f}% above that."
+        )
+    else:
+        # At or below market: ask for a small discount, don't lose the car over it
+        discount = 0.03 if deal_grade in ("S", "A") else 0.07
+        target = _round_to_hundred(listed_price * (1 - discount))
+        walk_away = _round_to_hundred(listed_price)
+        leverage = (
+            f"The asking price is at or below market value (about ${fair_market_value:,.0f}), "
+            "so focus on condition and paying promptly rather than the price gap."
+        )
+
+    lines = [
+        "Negotiation outline (quick version - the AI coach is temporarily unavailable):",
+        f"1. Opening: \"Hi, I'm interested in your {year} {make} {model_name}. "
+        "I've compared similar listings and would like to talk about the price.\"",
+        f"2. Leverage: {leverage}",
+    ]
+    if issues:
+        lines.append(f"   Also raise: {issues}.")
+    lines += [
+        f"3. Target offer: ${target:,}",
+        f"4. Walk-away point: ${walk_away:,}",
+        f"5. Close: \"If we can agree on ${target:,}, I can move forward today, pending an inspection.\"",
+    ]
+    return "\n".join(lines)
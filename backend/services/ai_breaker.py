@@ -0,0 +1,152 @@
+"""
+AI Circuit Breaker
+
+When Gemini is failing or crawling, every AI request used to wait out the
+full call (up to AI_TIMEOUT_SECONDS) before failing, holding an AI thread
+the whole time. The breaker watches recent calls and, once they are
+mostly failing or over the latency budget, stops making them for a while:
+
+- closed: calls go through; outcomes are kept for AI_BREAKER_WINDOW_SECONDS
+- open: after at least AI_BREAKER_MIN_CALLS calls in the window, if the
+  error rate or the share of calls slower than AI_LATENCY_BUDGET_SECONDS
+  reaches its threshold. Calls fail fast (AICircuitOpenError) and callers
+  serve their rule-based fallback instead (see backend/services/ai.py)
+- half-open: after AI_BREAKER_COOLDOWN_SECONDS one probe call is let
+  through; success closes the breaker, failure (or a slow call) reopens it
+
+before_call() returns a token that is passed back to record(). Each state
+change starts a new epoch, and outcomes from calls admitted in an earlier
+epoch are dropped: a slow call that started before the breaker opened
+can't close it again by finishing during the probe. A call that ends
+without an outcome (a stream the client stopped reading) is release()d
+instead, which frees the probe slot without recording anything.
+
+The state is exported as undercut_ai_breaker_state in /metrics. Each
+process has its own breaker.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+from backend.services.metrics import AI_BREAKER_STATE, AI_BREAKER_TRIPS
+
+
+AI_LATENCY_BUDGET_SECONDS = float(os.getenv("AI_LATENCY_BUDGET_SECONDS", "10"))
+AI_BREAKER_WINDOW_SECONDS = float(os.getenv("AI_BREAKER_WINDOW_SECONDS", "60"))
+AI_BREAKER_MIN_CALLS = int(os.getenv("AI_BREAKER_MIN_CALLS", "10"))
+AI_BREAKER_ERROR_RATE = float(os.getenv("AI_BREAKER_ERROR_RATE", "0.5"))
+AI_BREAKER_SLOW_RATE = float(os.getenv("AI_BREAKER_SLOW_RATE", "0.5"))
+AI_BREAKER_COOLDOWN_SECONDS = float(os.getenv("AI_BREAKER_COOLDOWN_SECONDS", "30"))
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class AICircuitOpenError(Exception):
+    """The AI circuit breaker is open; the call was not made."""
+
+
+class CircuitBreaker:
+    """Error-rate and latency circuit breaker (thread-safe)."""
+
+    def __init__(
+        self,
+        latency_budget: float = AI_LATENCY_BUDGET_SECONDS,
+        window: float = AI_BREAKER_WINDOW_SECONDS,
+        min_calls: int = AI_BREAKER_MIN_CALLS,
+        error_rate: float = AI_BREAKER_ERROR_RATE,
+        slow_rate: float = AI_BREAKER_SLOW_RATE,
+        cooldown: float = AI_BREAKER_COOLDOWN_SECONDS,
+        clock=time.monotonic,
+    ):
+        self.latency_budget = latency_budget
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.cooldown = cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._calls = deque()  # (timestamp, failed, slow)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probing = False
+        self._epoch = 0  # Bumped on every state change, see before_call()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._clock() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def _set_state(self, state: str) -> None:
+        self._state = state
+        self._epoch += 1
+        AI_BREAKER_STATE.set(STATE_VALUES[state])
+
+    def _trip(self, reason: str) -> None:
+        self._set_state(OPEN)
+        self._opened_at = self._clock()
+        self._probing = False
+        self._calls.clear()
+        AI_BREAKER_TRIPS.labels(reason).inc()
+        print(f"AI circuit breaker opened ({reason}); retrying in {self.cooldown:.0f}s")
+
+    def before_call(self) -> int:
+        """
+        Raise AICircuitOpenError unless a call may go ahead now.
+
+        Returns the token to pass to record() (or release()) for this call.
+        """
+        with self._lock:
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self.cooldown:
+                    raise AICircuitOpenError("AI temporarily disabled after repeated failures.")
+                self._set_state(HALF_OPEN)
+            if self._state == HALF_OPEN:
+                if self._probing:
+                    raise AICircuitOpenError("AI temporarily disabled, probe in progress.")
+                self._probing = True
+            return self._epoch
+
+    def release(self, token: int) -> None:
+        """A call allowed by before_call() ended without an outcome."""
+        with self._lock:
+            if token == self._epoch and self._state == HALF_OPEN:
+                self._probing = False  # The next call probes instead
+
+    def record(self, token: int, failed: bool, seconds: float) -> None:
+        """Record the outcome of a call allowed by before_call()."""
+        slow = seconds > self.latency_budget
+        with self._lock:
+            if token != self._epoch:
+                return  # Admitted before the last state change
+            if self._state == HALF_OPEN:  # Only the probe has this epoch
+                if failed or slow:
+                    self._trip("probe")
+                else:
+                    self._probing = False
+                    self._calls.clear()
+                    self._set_state(CLOSED)
+                return
+
+            now = self._clock()
+            self._calls.append((now, failed, slow))
+            while self._calls and self._calls[0][0] < now - self.window:
+                self._calls.popleft()
+
+            total = len(self._calls)
+            if self._state != CLOSED or total < self.min_calls:
+                return
+            if sum(call[1] for call in self._calls) / total >= self.error_rate:
+                self._trip("errors")
+            elif sum(call[2] for call in self._calls) / total >= self.slow_rate:
+                self._trip("latency")
+
+
+# Process-wide breaker for AI provider calls
+ai_breaker = CircuitBreaker()
+AI_BREAKER_STATE.set(0)
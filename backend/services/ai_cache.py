@@ -0,0 +1,156 @@
+"""
+Gemini Response Cache
+
+Identical AI requests (same listing, same description, same user
+instructions, same prompt template) get the stored response back in
+milliseconds instead of a multi-second, billed Gemini call.
+
+- Key: SHA-256 fingerprint of the normalized prompt inputs plus the prompt
+  template version (bump the version when a prompt changes).
+- Store: a local SQLite file (AI_CACHE_PATH), so entries survive restarts
+  and are shared by the workers on a node.
+- Expiry: entries older than AI_CACHE_TTL_SECONDS are misses.
+- Size: at most AI_CACHE_MAX_ENTRIES; least recently used entries go first.
+- Only successful responses are stored; failures are retried next time.
+- Store errors (locked, read-only disk) count as misses, never as AI failures.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from backend.services.metrics import CACHE_LOOKUPS
+
+
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", "./ai_cache.db")
+AI_CACHE_TTL_SECONDS = float(os.getenv("AI_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "10000"))
+
+
+def _normalize(value):
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def prompt_fingerprint(operation: str, template_version: str, **inputs) -> str:
+    """
+    Cache key for one AI request.
+
+    Strings are case/whitespace-normalized, floats rounded to cents, and the
+    free-text description is reduced to its own hash first.
+    """
+    normalized = {key: _normalize(value) for key, value in inputs.items()}
+    if normalized.get("description"):
+        normalized["description"] = hashlib.sha256(normalized["description"].encode()).hexdigest()
+    payload = json.dumps(
+        {"operation": operation, "template": template_version, "inputs": normalized},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class AIResponseCache:
+    """Durable, TTL- and size-bounded store of AI responses."""
+
+    def __init__(
+        self,
+        path: str = AI_CACHE_PATH,
+        ttl: float = AI_CACHE_TTL_SECONDS,
+        max_entries: int = AI_CACHE_MAX_ENTRIES,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._ready = False
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5)
+        if not self._ready:
+            # First use creates the store (nothing happens at import)
+            with self._lock:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS ai_responses ("
+                    " key TEXT PRIMARY KEY,"
+                    " operation TEXT NOT NULL,"
+                    " response TEXT NOT NULL,"
+                    " created_at REAL NOT NULL,"
+                    " accessed_at REAL NOT NULL)"
+                )
+                conn.execute(
+                    "CREATE INDEX IF NOT EXISTS ix_ai_responses_accessed_at ON ai_responses (accessed_at)"
+                )
+                conn.commit()
+                self._ready = True
+        return conn
+
+    def get(self, key: str, operation: str = "ai") -> Optional[str]:
+        """Stored response for a fingerprint, or None (missing or expired)."""
+        now = time.time()
+        try:
+            conn = self._connect()
+            try:
+                row = conn.execute(
+                    "SELECT response, created_at FROM ai_responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] < self.ttl:
+                    conn.execute("UPDATE ai_responses SET accessed_at = ? WHERE key = ?", (now, key))
+                    conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"AI cache error: {e}")
+            row = None
+
+        if row is None or now - row[1] >= self.ttl:
+            CACHE_LOOKUPS.labels(f"ai_{operation}", "miss").inc()
+            return None
+
+        CACHE_LOOKUPS.labels(f"ai_{operation}", "hit").inc()
+        return row[0]
+
+    def set(self, key: str, response: str, operation: str = "ai") -> None:
+        """Store a response, then drop expired and least recently used entries."""
+        now = time.time()
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"AI cache error: {e}")
+            return
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_responses (key, operation, response, created_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, operation, response, now, now),
+            )
+            conn.execute("DELETE FROM ai_responses WHERE created_at <= ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM ai_responses WHERE key IN ("
+                " SELECT key FROM ai_responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"AI cache error: {e}")
+        finally:
+            conn.close()
+
+    def clear(self) -> None:
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM ai_responses")
+            conn.commit()
+        finally:
+            conn.close()
+
+
+# Process-wide instance used by backend/services/ai.py
+ai_cache = AIResponseCache()
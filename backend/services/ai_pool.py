@@ -0,0 +1,206 @@
+"""
+AI Worker Pool
+
+The Gemini SDK calls in backend/services/ai.py are synchronous and take
+seconds. Calling them from an async endpoint would freeze the event loop
+for the whole round trip, stalling every other request on the worker.
+
+run_ai() runs them on a dedicated thread pool instead:
+
+- AI_MAX_CONCURRENCY threads, separate from the default pool that sync
+  DB work (run_sync) uses, so a Gemini backlog can't starve the read path
+- at most AI_MAX_QUEUE calls waiting for a thread; beyond that callers
+  get AIUnavailableError straight away instead of queueing
+- AI_TIMEOUT_SECONDS per call (also passed to the SDK, so a timed-out call
+  frees its thread)
+- identical concurrent calls are coalesced onto one (single-flight)
+- stream() runs a blocking generator (streamed Gemini output) the same way,
+  handing each chunk to the event loop as it arrives
+- queue depth / in-flight gauges and timeout / rejection / coalesced
+  counters in /metrics
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from backend.services.metrics import (
+    AI_COALESCED,
+    AI_IN_FLIGHT,
+    AI_QUEUE_DEPTH,
+    AI_REJECTED,
+    AI_TIMEOUTS,
+)
+
+
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+AI_MAX_QUEUE = int(os.getenv("AI_MAX_QUEUE", "32"))
+AI_TIMEOUT_SECONDS = float(os.getenv("AI_TIMEOUT_SECONDS", "30"))
+
+
+class AIUnavailableError(Exception):
+    """The AI call timed out or the pool is saturated; retry later."""
+
+
+class AIWorkerPool:
+    """Bounded thread pool for blocking AI calls."""
+
+    def __init__(
+        self,
+        max_concurrency: int = AI_MAX_CONCURRENCY,
+        max_queue: int = AI_MAX_QUEUE,
+        timeout: float = AI_TIMEOUT_SECONDS,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = None
+        self._waiting = 0
+        self._in_flight = {}  # call key -> Future of the call being run
+        self._waiters = {}  # Future -> callers awaiting it (single-flight joiners included)
+        self._lock = threading.RLock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_concurrency, thread_name_prefix="ai"
+                    )
+        return self._executor
+
+    def _run_in_thread(self, fn):
+        with self._lock:
+            self._waiting -= 1
+        AI_QUEUE_DEPTH.dec()
+        AI_IN_FLIGHT.inc()
+        try:
+            return fn()
+        finally:
+            AI_IN_FLIGHT.dec()
+
+    def _forget(self, key, future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def _submit(self, operation: str, call):
+        """Queue call() on the pool, or reject it if the queue is full."""
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                AI_REJECTED.labels(operation).inc()
+                raise AIUnavailableError("AI service is busy, try again shortly.")
+            self._waiting += 1
+            AI_QUEUE_DEPTH.inc()
+            return self._get_executor().submit(self._run_in_thread, call)
+
+    def _timed_out(self, operation: str, future, owner: bool = True) -> AIUnavailableError:
+        # A call still queued is dropped; a running one ends at the SDK timeout
+        if owner and future.cancel():
+            with self._lock:
+                self._waiting -= 1
+            AI_QUEUE_DEPTH.dec()
+        AI_TIMEOUTS.labels(operation).inc()
+        return AIUnavailableError("AI service timed out, try again shortly.")
+
+    async def run(self, operation: str, fn, *args, **kwargs):
+        """
+        Run fn(*args, **kwargs) on the pool without blocking the event loop.
+
+        Single-flight: while an identical call (same operation, function and
+        arguments) is in flight, callers share its result instead of
+        queueing their own.
+        """
+        key = (operation, fn, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            key = None  # Unhashable arguments: no coalescing
+
+        with self._lock:
+            future = self._in_flight.get(key) if key is not None else None
+            leader = future is None
+            if leader:
+                future = self._submit(operation, partial(fn, *args, **kwargs))
+                if key is not None:
+                    self._in_flight[key] = future
+                    future.add_done_callback(partial(self._forget, key))
+            self._waiters[future] = self._waiters.get(future, 0) + 1
+
+        if not leader:
+            AI_COALESCED.labels(operation).inc()
+
+        try:
+            # shield(): one caller timing out must not cancel the shared call
+            return await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                # Drop a still-queued call only if no one else is waiting for it
+                raise self._timed_out(operation, future, owner=self._waiters[future] == 1)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                raise  # This caller was cancelled, not the call
+            # Joined a queued call just as its last other caller timed out and dropped it
+            raise AIUnavailableError("AI service timed out, try again shortly.") from None
+        finally:
+            with self._lock:
+                self._waiters[future] -= 1
+                if not self._waiters[future]:
+                    del self._waiters[future]
+
+    async def stream(self, operation: str, fn, *args, **kwargs):
+        """
+        Iterate a blocking generator fn(*args, **kwargs) on the pool.
+
+        Items reach the event loop as soon as they are produced; the timeout
+        applies to the wait for each item, not the whole stream. Closing the
+        async generator early (client went away) stops the thread at the
+        next item. Streams are never coalesced.
+        """
+        loop = asyncio.get_running_loop()
+        items = asyncio.Queue()
+        stop = threading.Event()
+        end = object()
+
+        def emit(item, error=None):
+            try:
+                loop.call_soon_threadsafe(items.put_nowait, (item, error))
+            except RuntimeError:
+                stop.set()  # Event loop closed
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stop.is_set():
+                        return
+                    emit(item)
+            except Exception as e:
+                emit(end, e)
+            else:
+                emit(end)
+
+        future = self._submit(operation, produce)
+        try:
+            while True:
+                try:
+                    item, error = await asyncio.wait_for(items.get(), self.timeout)
+                except asyncio.TimeoutError:
+                    raise self._timed_out(operation, future)
+                if item is end:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stop.set()
+
+
+# Process-wide pool used by the AI endpoints
+ai_pool = AIWorkerPool()
+
+
+async def run_ai(operation: str, fn, *args, **kwargs):
+    """Shorthand for ai_pool.run()."""
+    return await ai_pool.run(operation, fn, *args, **kwargs)
@@ -0,0 +1,223 @@
+"""
+AI Providers
+
+backend/services/ai.py builds prompts, caches responses and records
+metrics; the provider is what actually turns a prompt into text. It is
+chosen by AI_PROVIDER:
+
+- gemini (default): Google Gemini via the google.generativeai SDK
+  (needs GEMINI_API_KEY; the SDK is imported on first use)
+- stub: local, deterministic canned responses with configurable latency
+  and failure rate, for load tests and benchmarks without an API key or
+  quota (see backend/benchmarks/bench_ai_endpoints.py)
+
+Stub settings:
+    AI_STUB_LATENCY_MS=800          median simulated latency
+    AI_STUB_LATENCY_DIST=lognormal  fixed | uniform (0.5x-1.5x) | lognormal
+    AI_STUB_LATENCY_SIGMA=0.5       lognormal spread (p95 ~ 2.3x median)
+    AI_STUB_FAILURE_RATE=0          fraction of calls that raise
+    AI_STUB_SEED=                   set for a reproducible sequence
+
+A new provider subclasses AIProvider and registers in PROVIDERS.
+"""
+
+import hashlib
+import logging
+import math
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from backend.config import load_env
+
+
+logger = logging.getLogger(__name__)
+
+GEMINI_MODEL = "gemini-1.5-flash"  # Fast, cost-effective Flash model
+
+
+class AIProvider(ABC):
+    """Turns a prompt into text. Subclasses implement generate()."""
+
+    name = "base"
+
+    def configured(self) -> bool:
+        """False if the provider can't be called (e.g. no API key)."""
+        return True
+
+    @abstractmethod
+    def generate(self, operation: str, prompt: str, timeout: float) -> str:
+        """The full response text for `prompt`."""
+
+    def generate_stream(self, operation: str, prompt: str, timeout: float) -> Iterator[str]:
+        """Text chunks as they are produced (default: the whole response at once)."""
+        yield self.generate(operation, prompt, timeout)
+
+
+# ============================================================================
+# GEMINI
+# ============================================================================
+
+class GeminiProvider(AIProvider):
+    """Google Gemini through the google.generativeai SDK."""
+
+    name = "gemini"
+
+    def __init__(self, model_name: str = GEMINI_MODEL):
+        self.model_name = model_name
+        self._model = None
+
+    def _api_key(self) -> Optional[str]:
+        load_env()
+        return os.getenv("GEMINI_API_KEY")
+
+    def configured(self) -> bool:
+        return bool(self._api_key())
+
+    def model(self):
+        """
+        Gemini client, configured on first use.
+
+        The SDK import alone takes about a second, so it is deferred until an
+        endpoint actually calls the AI (rule-based paths never pay for it).
+        """
+        if self._model is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=self._api_key())
+            self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def generate(self, operation: str, prompt: str, timeout: float) -> str:
+        response = self.model().generate_content(prompt, request_options={"timeout": timeout})
+        return response.text.strip()
+
+    def generate_stream(self, operation: str, prompt: str, timeout: float) -> Iterator[str]:
+        response = self.model().generate_content(
+            prompt, stream=True, request_options={"timeout": timeout}
+        )
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+# ============================================================================
+# STUB (load testing)
+# ============================================================================
+
+class StubProviderError(RuntimeError):
+    """Simulated provider failure (see AI_STUB_FAILURE_RATE)."""
+
+
+class StubProvider(AIProvider):
+    """
+    Offline provider with realistic timing and no real output.
+
+    Responses are deterministic per prompt (same prompt, same text) so the
+    response cache behaves as it would in production. Latency and failures
+    are drawn from the configured distribution.
+    """
+
+    name = "stub"
+
+    STREAM_CHUNKS = 8
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        distribution: str = "lognormal",
+        sigma: float = 0.5,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        if distribution not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown AI_STUB_LATENCY_DIST: {distribution}")
+        self.latency_ms = latency_ms
+        self.distribution = distribution
+        self.sigma = sigma
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_env(cls) -> "StubProvider":
+        seed = os.getenv("AI_STUB_SEED")
+        return cls(
+            latency_ms=float(os.getenv("AI_STUB_LATENCY_MS", "800")),
+            distribution=os.getenv("AI_STUB_LATENCY_DIST", "lognormal"),
+            sigma=float(os.getenv("AI_STUB_LATENCY_SIGMA", "0.5")),
+            failure_rate=float(os.getenv("AI_STUB_FAILURE_RATE", "0")),
+            seed=int(seed) if seed else None,
+        )
+
+    def sample_latency(self) -> float:
+        """Seconds for one simulated call."""
+        median = self.latency_ms / 1000
+        if self.distribution == "fixed":
+            return median
+        if self.distribution == "uniform":
+            return self._random.uniform(0.5 * median, 1.5 * median)
+        return self._random.lognormvariate(math.log(median), self.sigma) if median > 0 else 0.0
+
+    def _call(self, timeout: float) -> float:
+        """Draw this call's outcome: raises on a simulated failure/timeout, else its latency."""
+        latency = self.sample_latency()
+        if latency > timeout:
+            time.sleep(timeout)
+            raise StubProviderError(f"Simulated timeout after {timeout}s")
+        if self._random.random() < self.failure_rate:
+            time.sleep(latency)
+            raise StubProviderError("Simulated provider failure")
+        return latency
+
+    def _response(self, operation: str, prompt: str) -> str:
+        digest = hashlib.sha256(prompt.encode()).hexdigest()[:8]
+        if operation == "analyze":
+            return f"VERDICT: Risky. Stub analysis {digest} - no real model was called."
+        return (
+            f"[Stub {operation} {digest}] Opening: Hi, I'm interested in the car. "
+            "Leverage: comparable listings are priced lower. "
+            "Offer: I can do a fair price today. "
+            "Walk-away: I'll keep looking if we can't meet in the middle."
+        )
+
+    def generate(self, operation: str, prompt: str, timeout: float) -> str:
+        time.sleep(self._call(timeout))
+        return self._response(operation, prompt)
+
+    def generate_stream(self, operation: str, prompt: str, timeout: float) -> Iterator[str]:
+        latency = self._call(timeout)
+        words = self._response(operation, prompt).split(" ")
+        size = math.ceil(len(words) / self.STREAM_CHUNKS)
+        for start in range(0, len(words), size):
+            time.sleep(latency / self.STREAM_CHUNKS)
+            yield " ".join(words[start:start + size]) + (" " if start + size < len(words) else "")
+
+
+# ============================================================================
+# SELECTION
+# ============================================================================
+
+PROVIDERS = {
+    "gemini": GeminiProvider,
+    "stub": StubProvider.from_env,
+}
+
+
+@lru_cache(maxsize=None)
+def get_provider() -> AIProvider:
+    """
+    The provider named by AI_PROVIDER (default gemini), created once.
+
+    Warns (once, here rather than on every AI call) if it can't be called.
+    """
+    load_env()
+    name = os.getenv("AI_PROVIDER", "gemini").lower()
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown AI_PROVIDER {name!r} (expected one of: {', '.join(PROVIDERS)})")
+    provider = PROVIDERS[name]()
+    if not provider.configured():
+        logger.warning("AI provider %r is not configured (GEMINI_API_KEY not found). AI features will fail.", name)
+    return provider
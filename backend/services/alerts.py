@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from backend.models.alert import Alert
 from backend.models.car import Car
+from backend.services.catalog import canonicalize_make, canonicalize_model
 
 
 def check_alerts_for_car(car: Car, db: Session) -> List[Alert]:
@@ -26,8 +27,14 @@ def check_alerts_for_car(car: Car, db: Session) -> List[Alert]:
     Returns:
         List of Alert objects that match this car
     """
-    # Get all active alerts
-    active_alerts = db.query(Alert).filter(Alert.is_active == True).all()
+    # Get active alerts whose make is unset or equals the car's canonical make
+    car_make = car.make_normalized or canonicalize_make(car.make)
+    active_alerts = (
+        db.query(Alert)
+        .filter(Alert.is_active == True)
+        .filter((Alert.make_normalized.is_(None)) | (Alert.make_normalized == car_make))
+        .all()
+    )
     
     matching_alerts = []
     
@@ -52,14 +59,17 @@ def _car_matches_alert(car: Car, alert: Alert) -> bool:
     Logic: Car must match ALL specified criteria.
     If a criteria is None/null, it matches any value.
     """
-    # Make filter (case-insensitive partial match)
+    # Make filter (canonical equality, e.g. "Mercedes" == "Mercedes-Benz")
     if alert.make:
-        if not car.make or alert.make.lower() not in car.make.lower():
+        if not car.make or canonicalize_make(alert.make) != canonicalize_make(car.make):
             return False
     
-    # Model filter (case-insensitive partial match)
+    # Model filter (canonical equality, aliases resolved per make)
     if alert.model:
-        if not car.model or alert.model.lower() not in car.model.lower():
+        if not car.model or (
+            canonicalize_model(alert.model, alert.make or car.make)
+            != canonicalize_model(car.model, car.make)
+        ):
             return False
     
     # Year range
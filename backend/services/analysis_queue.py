@@ -0,0 +1,356 @@
+"""
+Background AI Pre-Analysis Queue
+
+New listings are ingested with ai_verdict = "Pending Analysis". Each one
+gets a row in analysis_jobs, and workers fill in the verdict ahead of the
+first detail-page view, so visitors don't wait on Gemini.
+
+- Priority: S deals first, then A, then the rest (oldest first within each).
+- Leasing: a worker claims a job with a compare-and-set UPDATE, so any
+  number of workers (processes or machines) can share the table. A lease
+  that expires (crashed worker) makes the job claimable again.
+- Budget: at most AI_QUEUE_RPM Gemini calls per minute per worker.
+- Retries: failed calls back off exponentially (AI_QUEUE_BACKOFF_SECONDS,
+  doubled per attempt) up to AI_QUEUE_MAX_ATTEMPTS, then the job is failed.
+- Jobs whose car was sold, deleted or already analyzed on demand finish
+  without an AI call. While the AI circuit breaker is open, jobs wait out
+  the cooldown without using up an attempt.
+
+Run a worker:
+    python -m backend.services.analysis_queue [--once]
+"""
+
+import os
+import socket
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from uuid import uuid4
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models.car import AnalysisJob, Car
+
+
+PENDING_VERDICT = "Pending Analysis"
+
+# Grade -> queue priority (lower runs first)
+GRADE_PRIORITY = {"S": 0, "A": 1}
+DEFAULT_PRIORITY = 2
+
+AI_QUEUE_RPM = float(os.getenv("AI_QUEUE_RPM", "30"))
+AI_QUEUE_MAX_ATTEMPTS = int(os.getenv("AI_QUEUE_MAX_ATTEMPTS", "5"))
+AI_QUEUE_BACKOFF_SECONDS = float(os.getenv("AI_QUEUE_BACKOFF_SECONDS", "60"))
+AI_QUEUE_LEASE_SECONDS = float(os.getenv("AI_QUEUE_LEASE_SECONDS", "300"))
+AI_QUEUE_POLL_SECONDS = float(os.getenv("AI_QUEUE_POLL_SECONDS", "5"))
+AI_QUEUE_BATCH_SIZE = int(os.getenv("AI_QUEUE_BATCH_SIZE", "10"))
+
+# Cap for the exponential backoff
+MAX_BACKOFF_SECONDS = 6 * 3600
+
+# An "analysis in progress" marker older than this is abandoned (crashed worker)
+ANALYSIS_MARKER_TTL_SECONDS = float(os.getenv("ANALYSIS_MARKER_TTL_SECONDS", "90"))
+
+# Jobs whose car is being analyzed elsewhere are retried after this delay
+IN_PROGRESS_RETRY_SECONDS = 30
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ============================================================================
+# ENQUEUE
+# ============================================================================
+
+def enqueue_analysis(db: Session, car: Car) -> AnalysisJob:
+    """Queue pre-analysis for a car (added to the session; caller commits)."""
+    job = AnalysisJob(
+        id=str(uuid4()),
+        car_id=car.id,
+        priority=GRADE_PRIORITY.get(car.deal_grade, DEFAULT_PRIORITY),
+        status="queued",
+        attempts=0,
+        available_at=_now(),
+        created_at=_now(),
+    )
+    db.add(job)
+    return job
+
+
+def enqueue_missing(db: Session) -> int:
+    """Backfill jobs for pending cars that have none (e.g. ingested before the queue)."""
+    queued = db.query(AnalysisJob.car_id)
+    cars = (
+        db.query(Car)
+        .filter(Car.status == "active")
+        .filter(Car.ai_verdict == PENDING_VERDICT)
+        .filter(Car.id.not_in(queued))
+        .all()
+    )
+    for car in cars:
+        enqueue_analysis(db, car)
+    db.commit()
+    return len(cars)
+
+
+# ============================================================================
+# IN-PROGRESS MARKER
+# ============================================================================
+
+def begin_analysis(db: Session, car_id: str) -> bool:
+    """
+    Mark a car's analysis as in progress, if nobody else is on it.
+
+    Atomic across workers: True means this caller owns the analysis and must
+    finish with finish_analysis(); False means another worker is already
+    generating the verdict. Stale markers (older than the TTL) are taken over.
+    """
+    now = _now()
+    stale = now - timedelta(seconds=ANALYSIS_MARKER_TTL_SECONDS)
+    result = db.execute(
+        update(Car)
+        .where(
+            Car.id == car_id,
+            or_(Car.analysis_started_at.is_(None), Car.analysis_started_at < stale),
+        )
+        # Keep updated_at: the marker isn't a content change (ETags stay valid)
+        .values(analysis_started_at=now, updated_at=Car.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def finish_analysis(db: Session, car_id: str, verdict: Optional[str] = None) -> None:
+    """Store the verdict (if any) and clear the marker in one commit."""
+    values = {"analysis_started_at": None}
+    if verdict is not None:
+        values["ai_verdict"] = verdict
+    else:
+        values["updated_at"] = Car.updated_at
+    db.execute(
+        update(Car)
+        .where(Car.id == car_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+# ============================================================================
+# LEASING
+# ============================================================================
+
+def _claimable(now: datetime):
+    return or_(
+        and_(AnalysisJob.status == "queued", AnalysisJob.available_at <= now),
+        and_(AnalysisJob.status == "leased", AnalysisJob.lease_expires_at < now),
+    )
+
+
+def lease_jobs(
+    db: Session,
+    worker_id: str,
+    limit: int = AI_QUEUE_BATCH_SIZE,
+    lease_seconds: float = AI_QUEUE_LEASE_SECONDS,
+) -> List[AnalysisJob]:
+    """
+    Claim up to `limit` due jobs for this worker, highest priority first.
+
+    Each claim is an UPDATE guarded by the same "still claimable" condition,
+    so when two workers race for a job exactly one UPDATE matches.
+    """
+    now = _now()
+    candidate_ids = [
+        job_id
+        for (job_id,) in db.query(AnalysisJob.id)
+        .filter(_claimable(now))
+        .order_by(AnalysisJob.priority, AnalysisJob.available_at, AnalysisJob.id)
+        .limit(limit)
+    ]
+
+    claimed = []
+    for job_id in candidate_ids:
+        result = db.execute(
+            update(AnalysisJob)
+            .where(AnalysisJob.id == job_id, _claimable(now))
+            .values(
+                status="leased",
+                leased_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                updated_at=now,
+            )
+        )
+        if result.rowcount == 1:
+            claimed.append(job_id)
+    db.commit()
+
+    if not claimed:
+        return []
+    return (
+        db.query(AnalysisJob)
+        .filter(AnalysisJob.id.in_(claimed))
+        .order_by(AnalysisJob.priority, AnalysisJob.available_at, AnalysisJob.id)
+        .all()
+    )
+
+
+# ============================================================================
+# PROCESSING
+# ============================================================================
+
+def _backoff_seconds(attempts: int) -> float:
+    return min(AI_QUEUE_BACKOFF_SECONDS * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS)
+
+
+def _finish(db: Session, job: AnalysisJob, status: str, error: Optional[str] = None) -> None:
+    job.status = status
+    job.last_error = error
+    job.leased_by = None
+    job.lease_expires_at = None
+    job.updated_at = _now()
+    db.commit()
+
+
+def _pending_car(db: Session, car_id: str) -> Optional[Car]:
+    """The job's car, freshly loaded, if it is active and still awaiting a verdict."""
+    car = db.query(Car).filter(Car.id == car_id).populate_existing().first()
+    if car is None or car.status != "active" or car.ai_verdict != PENDING_VERDICT:
+        return None
+    return car
+
+
+def process_job(db: Session, job: AnalysisJob, budget: Optional["RateBudget"] = None) -> str:
+    """
+    Analyze the job's car and record the outcome.
+
+    Waits on `budget` (if given) once the job is known to need an AI call,
+    so skipped jobs don't use it up, and before taking the in-progress
+    marker, so on-demand requests never wait on a worker that is only
+    sleeping (the car is re-checked after the wait). Returns the job's new
+    status: done, queued (retry later) or failed.
+    """
+    from backend.services.ai import (
+        ANALYSIS_FAILED_VERDICT,
+        NO_API_KEY_VERDICT,
+        analyze_car_listing,
+    )
+
+    car = _pending_car(db, job.car_id)
+    if car is None:
+        _finish(db, job, "done")  # Gone, or analyzed on demand meanwhile
+        return job.status
+
+    from backend.services.ai_breaker import OPEN, ai_breaker
+    if ai_breaker.state == OPEN:
+        # AI is failing fast right now; don't spend an attempt on it
+        job.available_at = _now() + timedelta(seconds=ai_breaker.cooldown)
+        _finish(db, job, "queued")
+        return job.status
+
+    if budget is not None:
+        budget.acquire()
+        car = _pending_car(db, job.car_id)
+        if car is None:
+            _finish(db, job, "done")  # Analyzed on demand while we waited
+            return job.status
+
+    if not begin_analysis(db, car.id):
+        # An on-demand request is analyzing it right now; check back later
+        job.available_at = _now() + timedelta(seconds=IN_PROGRESS_RETRY_SECONDS)
+        _finish(db, job, "queued")
+        return job.status
+
+    try:
+        verdict = analyze_car_listing(
+            make=car.make,
+            model_name=car.model,
+            year=car.year,
+            price=car.price,
+            mileage=car.mileage,
+            description=car.description or "No description provided.",
+        )
+    except BaseException:
+        finish_analysis(db, car.id)
+        raise
+
+    if verdict in (ANALYSIS_FAILED_VERDICT, NO_API_KEY_VERDICT):
+        finish_analysis(db, car.id)
+        job.attempts = (job.attempts or 0) + 1
+        if job.attempts >= AI_QUEUE_MAX_ATTEMPTS:
+            _finish(db, job, "failed", verdict)
+        else:
+            job.available_at = _now() + timedelta(seconds=_backoff_seconds(job.attempts))
+            _finish(db, job, "queued", verdict)
+        return job.status
+
+    finish_analysis(db, car.id, verdict)
+    _finish(db, job, "done")
+
+    from backend.services.trending import trending_cache
+    db.refresh(car)
+    trending_cache.notify_car_changed(car)
+    return job.status
+
+
+# ============================================================================
+# WORKER
+# ============================================================================
+
+class RateBudget:
+    """Spaces calls evenly to stay under a requests-per-minute budget."""
+
+    def __init__(self, rpm: float = AI_QUEUE_RPM, clock=time.monotonic, sleep=time.sleep):
+        self.interval = 60.0 / rpm if rpm > 0 else 0.0
+        self._clock = clock
+        self._sleep = sleep
+        self._next = 0.0
+
+    def acquire(self) -> None:
+        now = self._clock()
+        if now < self._next:
+            self._sleep(self._next - now)
+            now = self._next
+        self._next = now + self.interval
+
+
+def run_worker(worker_id: Optional[str] = None, once: bool = False) -> int:
+    """
+    Work the queue until interrupted (or until it is empty, with once=True).
+
+    Returns the number of jobs processed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    budget = RateBudget()
+    processed = 0
+
+    # Lease no more than the budget can get through in half a lease
+    batch_size = AI_QUEUE_BATCH_SIZE
+    if AI_QUEUE_RPM > 0:
+        batch_size = max(1, min(batch_size, int(AI_QUEUE_RPM * AI_QUEUE_LEASE_SECONDS / 120)))
+
+    db = SessionLocal()
+    try:
+        enqueue_missing(db)
+        while True:
+            jobs = lease_jobs(db, worker_id, limit=batch_size)
+            if not jobs:
+                if once:
+                    return processed
+                time.sleep(AI_QUEUE_POLL_SECONDS)
+                continue
+            for job in jobs:
+                process_job(db, job, budget)
+                processed += 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # --once: drain the queue and exit (e.g. from cron) instead of polling
+    count = run_worker(once="--once" in sys.argv)
+    print(f"Processed {count} analysis jobs")
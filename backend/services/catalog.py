@@ -0,0 +1,140 @@
+"""
+Vehicle Catalog Canonicalization
+
+Scrapers and users spell the same vehicle many ways ("Mercedes",
+"mercedes benz", "Mercedes-Benz"; "CRV", "CR-V"). This module maps raw
+make/model strings to one canonical, case-folded form so the database can
+filter with plain equality on the indexed *_normalized columns instead of
+ILIKE / substring matching.
+
+Canonical values are computed once at ingestion (cars) or on write (alerts).
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+
+# ============================================================================
+# CANONICALIZATION TABLES
+# ============================================================================
+
+# Alias -> canonical make. Keys are already whitespace-collapsed and case-folded.
+MAKE_ALIASES = {
+    "mercedes": "mercedes-benz",
+    "mercedes benz": "mercedes-benz",
+    "merc": "mercedes-benz",
+    "benz": "mercedes-benz",
+    "mb": "mercedes-benz",
+    "vw": "volkswagen",
+    "volks wagen": "volkswagen",
+    "chevy": "chevrolet",
+    "land rover": "land-rover",
+    "range rover": "land-rover",
+    "alfa": "alfa-romeo",
+    "alfa romeo": "alfa-romeo",
+    "rolls royce": "rolls-royce",
+    "aston martin": "aston-martin",
+    "mini cooper": "mini",
+    "bmw motorrad": "bmw",
+}
+
+# (canonical make, alias) -> canonical model. Keys are already normalized.
+MODEL_ALIASES = {
+    "honda": {
+        "crv": "cr-v",
+        "cr v": "cr-v",
+        "hrv": "hr-v",
+        "hr v": "hr-v",
+    },
+    "mazda": {
+        "mazda 3": "mazda3",
+        "mazda 6": "mazda6",
+        "cx5": "cx-5",
+        "cx 5": "cx-5",
+        "cx30": "cx-30",
+        "cx 30": "cx-30",
+        "mx5": "mx-5",
+        "mx 5": "mx-5",
+        "miata": "mx-5",
+    },
+    "tesla": {
+        "model3": "model 3",
+        "modely": "model y",
+        "models": "model s",
+        "modelx": "model x",
+    },
+    "toyota": {
+        "rav 4": "rav4",
+        "rav-4": "rav4",
+    },
+    "bmw": {
+        "3-series": "3 series",
+        "3series": "3 series",
+        "5-series": "5 series",
+        "5series": "5 series",
+    },
+    "mercedes-benz": {
+        "c class": "c-class",
+        "cclass": "c-class",
+        "e class": "e-class",
+        "eclass": "e-class",
+    },
+}
+
+# Flattened view used when the make is unknown (e.g. a bare model search).
+_ANY_MAKE_MODEL_ALIASES = {
+    alias: canonical
+    for make_aliases in MODEL_ALIASES.values()
+    for alias, canonical in make_aliases.items()
+}
+
+_WHITESPACE = re.compile(r"[\s_]+")
+
+
+def _fold(value: Optional[str]) -> Optional[str]:
+    """Case-fold, trim and collapse internal whitespace. Empty -> None."""
+    if value is None:
+        return None
+    folded = _WHITESPACE.sub(" ", value).strip().casefold()
+    return folded or None
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+@lru_cache(maxsize=4096)
+def canonicalize_make(make: Optional[str]) -> Optional[str]:
+    """
+    Map a raw make to its canonical form.
+
+    Examples:
+        "Mercedes" -> "mercedes-benz"
+        " TOYOTA " -> "toyota"
+    """
+    folded = _fold(make)
+    if folded is None:
+        return None
+    return MAKE_ALIASES.get(folded, folded)
+
+
+@lru_cache(maxsize=4096)
+def canonicalize_model(model: Optional[str], make: Optional[str] = None) -> Optional[str]:
+    """
+    Map a raw model to its canonical form.
+
+    Model aliases are resolved per make when the make is known, otherwise
+    against every make's aliases.
+
+    Examples:
+        ("CRV", "Honda") -> "cr-v"
+        ("Model 3", "Tesla") -> "model 3"
+    """
+    folded = _fold(model)
+    if folded is None:
+        return None
+    canonical_make = canonicalize_make(make)
+    if canonical_make is None:
+        return _ANY_MAKE_MODEL_ALIASES.get(folded, folded)
+    return MODEL_ALIASES.get(canonical_make, {}).get(folded, folded)
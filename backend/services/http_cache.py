@@ -0,0 +1,90 @@
+"""
+HTTP Conditional GET Helpers
+
+ETag / Last-Modified / Cache-Control support for read endpoints, so browsers
+and CDNs can revalidate with If-None-Match / If-Modified-Since and get a
+bodyless 304 when nothing changed.
+
+Cache-Control is configurable from env:
+- HTTP_CACHE_CONTROL: default for car reads (default: "public, no-cache",
+  i.e. cache but always revalidate)
+- HTTP_CACHE_CONTROL_TRENDING: override for /cars/trending
+"""
+
+import hashlib
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import Request, Response
+
+from backend.services.metrics import CACHE_LOOKUPS
+
+
+HTTP_CACHE_CONTROL = os.getenv("HTTP_CACHE_CONTROL", "public, no-cache")
+HTTP_CACHE_CONTROL_TRENDING = os.getenv("HTTP_CACHE_CONTROL_TRENDING", HTTP_CACHE_CONTROL)
+
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the values that version a response."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def _as_utc(value: datetime) -> datetime:
+    """DB timestamps come back naive (stored as UTC)."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime] = None,
+) -> bool:
+    """
+    Evaluate the request's conditional headers (RFC 9110 precedence).
+
+    If-None-Match wins when present; If-Modified-Since is only consulted
+    without it.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return _count_revalidation("*" in tags or etag in tags or f"W/{etag}" in tags)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return _count_revalidation(False)
+        # HTTP dates have one-second resolution
+        return _count_revalidation(_as_utc(last_modified).replace(microsecond=0) <= _as_utc(since))
+
+    return False
+
+
+def _count_revalidation(not_modified: bool) -> bool:
+    """Conditional requests answered with a 304 count as cache hits."""
+    CACHE_LOOKUPS.labels("http_conditional", "hit" if not_modified else "miss").inc()
+    return not_modified
+
+
+def cache_headers(
+    etag: str,
+    last_modified: Optional[datetime] = None,
+    cache_control: str = HTTP_CACHE_CONTROL,
+) -> dict:
+    """Validator and caching headers for a response."""
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+    return headers
+
+
+def not_modified_response(headers: dict) -> Response:
+    """Bodyless 304 carrying the same validators as a 200 would."""
+    return Response(status_code=304, headers=headers)
@@ -0,0 +1,222 @@
+"""
+Prometheus Metrics
+
+Exported at GET /metrics in the standard text format:
+
+- undercut_http_requests_total{method,route,status}
+- undercut_http_request_duration_seconds{method,route} (histogram)
+- undercut_db_queries_total / undercut_db_query_seconds_total{method,route}
+- undercut_db_pool_* {engine} (read from the pools at scrape time)
+- undercut_cache_lookups_total{cache,result} (hit ratio = hit / all)
+- undercut_ai_call_duration_seconds / undercut_ai_call_failures_total{operation}
+- undercut_ai_queue_depth / undercut_ai_in_flight, plus timeouts, rejections
+  and coalesced calls
+- undercut_ai_breaker_state (0 closed, 1 half-open, 2 open), breaker trips
+  and rule-based fallbacks served{operation}
+- undercut_rate_limited_total{route}
+- undercut_cars_ingested_total{result} (created / deduped)
+
+Routes are labelled by template ("/cars/{car_id}"), never by concrete
+path, so label cardinality stays bounded. Counters are per process; with
+several workers, scrape each one (or aggregate in Prometheus).
+"""
+
+import time
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+HTTP_REQUESTS = Counter(
+    "undercut_http_requests_total",
+    "HTTP requests by route template and status code",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = Histogram(
+    "undercut_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+DB_QUERIES = Counter(
+    "undercut_db_queries_total",
+    "SQL statements issued, by route template",
+    ["method", "route"],
+)
+DB_QUERY_SECONDS = Counter(
+    "undercut_db_query_seconds_total",
+    "Time spent in SQL statements, by route template",
+    ["method", "route"],
+)
+CACHE_LOOKUPS = Counter(
+    "undercut_cache_lookups_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+AI_CALL_LATENCY = Histogram(
+    "undercut_ai_call_duration_seconds",
+    "Gemini call latency by operation",
+    ["operation"],
+    buckets=(0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0, 32.0),
+)
+AI_CALL_FAILURES = Counter(
+    "undercut_ai_call_failures_total",
+    "Failed Gemini calls by operation",
+    ["operation"],
+)
+AI_QUEUE_DEPTH = Gauge(
+    "undercut_ai_queue_depth",
+    "AI calls waiting for a worker thread",
+)
+AI_IN_FLIGHT = Gauge(
+    "undercut_ai_in_flight",
+    "AI calls currently running",
+)
+AI_TIMEOUTS = Counter(
+    "undercut_ai_call_timeouts_total",
+    "AI calls abandoned after AI_TIMEOUT_SECONDS, by operation",
+    ["operation"],
+)
+AI_REJECTED = Counter(
+    "undercut_ai_calls_rejected_total",
+    "AI calls refused because the queue was full, by operation",
+    ["operation"],
+)
+AI_COALESCED = Counter(
+    "undercut_ai_calls_coalesced_total",
+    "AI requests served by joining an identical in-flight call, by operation",
+    ["operation"],
+)
+AI_BREAKER_STATE = Gauge(
+    "undercut_ai_breaker_state",
+    "AI circuit breaker state: 0 closed, 1 half-open, 2 open",
+)
+AI_BREAKER_TRIPS = Counter(
+    "undercut_ai_breaker_trips_total",
+    "Times the AI circuit breaker opened, by reason (errors/latency/probe)",
+    ["reason"],
+)
+AI_FALLBACKS = Counter(
+    "undercut_ai_fallbacks_total",
+    "AI requests answered by the rule-based fallback, by operation",
+    ["operation"],
+)
+RATE_LIMITED = Counter(
+    "undercut_rate_limited_total",
+    "Requests rejected by the rate limiter, by route template",
+    ["route"],
+)
+CARS_INGESTED = Counter(
+    "undercut_cars_ingested_total",
+    "Scraper ingest calls by result (created/deduped)",
+    ["result"],
+)
+
+
+def route_template(scope) -> str:
+    """Route template for a request scope ("unmatched" for 404s)."""
+    route = scope.get("route")
+    return route.path if route is not None else "unmatched"
+
+
+# Anything else a client sends is labelled "other", so it can't add label values
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def method_label(scope) -> str:
+    """Request method for labels: a standard HTTP method or "other"."""
+    method = scope["method"]
+    return method if method in HTTP_METHODS else "other"
+
+
+# ============================================================================
+# DB POOL COLLECTOR
+# ============================================================================
+
+class PoolCollector:
+    """Pool gauges and checkout counters, read from the engines at scrape time."""
+
+    GAUGES = ("size", "checked_out", "checked_in", "overflow")
+    COUNTERS = ("checkouts", "checkout_timeouts", "checkout_wait_seconds")
+
+    def collect(self):
+        from backend.database import pool_status
+
+        gauges = {
+            name: GaugeMetricFamily(f"undercut_db_pool_{name}", f"Connection pool {name}", labels=["engine"])
+            for name in self.GAUGES
+        }
+        counters = {
+            name: CounterMetricFamily(f"undercut_db_pool_{name}", f"Connection pool {name}", labels=["engine"])
+            for name in self.COUNTERS
+        }
+        for engine, stats in pool_status().items():
+            for name, family in gauges.items():
+                if name in stats:
+                    family.add_metric([engine], stats[name])
+            for name, family in counters.items():
+                if f"{name}_total" in stats:
+                    family.add_metric([engine], stats[f"{name}_total"])
+
+        yield from gauges.values()
+        yield from counters.values()
+
+
+REGISTRY.register(PoolCollector())
+
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class MetricsMiddleware:
+    """
+    Request count, latency and SQL totals per route template.
+
+    Plain ASGI: per request it reads the clock twice and updates cached
+    labelled children (a few microseconds). Must wrap QueryStatsMiddleware
+    so the request's query stats are complete when it records.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # (method, route, status) -> metric children; labels() lookups are the slow part
+        self._children = {}
+
+    def _metrics_for(self, method: str, route: str, status: int):
+        key = (method, route, status)
+        children = self._children.get(key)
+        if children is None:
+            children = self._children[key] = (
+                HTTP_LATENCY.labels(method, route),
+                HTTP_REQUESTS.labels(method, route, str(status)),
+                DB_QUERIES.labels(method, route),
+                DB_QUERY_SECONDS.labels(method, route),
+            )
+        return children
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500  # Unhandled exceptions never send a response start
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            latency, requests, queries, query_seconds = self._metrics_for(
+                method_label(scope), route_template(scope), status
+            )
+            latency.observe(time.perf_counter() - start)
+            requests.inc()
+            query_stats = scope.get("query_stats")  # Set by QueryStatsMiddleware
+            if query_stats is not None and query_stats.count:
+                queries.inc(query_stats.count)
+                query_seconds.inc(query_stats.db_seconds)
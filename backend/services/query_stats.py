@@ -0,0 +1,198 @@
+"""
+Per-Request Query Instrumentation
+
+SQLAlchemy cursor events count every SQL statement and time it. While a
+request is in flight the numbers accumulate on that request, and:
+
+- the response carries `Server-Timing: db;dur=<ms>;desc="<n> queries"`
+  (visible in browser devtools),
+- totals are aggregated per route template ("GET /cars/{car_id}") and
+  served by GET /health/query-stats,
+- statements slower than SLOW_QUERY_MS are printed with their
+  bound-parameter shapes (types, never values) and the EXPLAIN plan.
+
+Works for sync and async sessions alike (the async drivers run the same
+cursor events underneath). BackgroundTasks that run after the response
+get their own stats, totalled as "<route> [background]". Jobs outside a
+request are still checked against the slow threshold but not counted.
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+# Statements slower than this are printed with their plan (0 disables)
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+
+class RequestQueryStats:
+    """SQL statement count and DB time for one request."""
+
+    __slots__ = ("count", "db_seconds", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.db_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, seconds: float) -> None:
+        # Threadpool and AI-pool threads share the request's stats
+        with self._lock:
+            self.count += 1
+            self.db_seconds += seconds
+
+
+_current: ContextVar[Optional[RequestQueryStats]] = ContextVar("request_query_stats", default=None)
+
+
+class RouteQueryStats:
+    """Per-route totals across requests."""
+
+    def __init__(self):
+        self._routes: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, stats: RequestQueryStats) -> None:
+        with self._lock:
+            entry = self._routes.get(route)
+            if entry is None:
+                entry = self._routes[route] = {
+                    "requests": 0,
+                    "queries_total": 0,
+                    "queries_max": 0,
+                    "db_seconds_total": 0.0,
+                }
+            entry["requests"] += 1
+            entry["queries_total"] += stats.count
+            entry["queries_max"] = max(entry["queries_max"], stats.count)
+            entry["db_seconds_total"] += stats.db_seconds
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Totals plus per-request averages, keyed by "METHOD /route/{template}"."""
+        with self._lock:
+            routes = {route: dict(entry) for route, entry in self._routes.items()}
+        for entry in routes.values():
+            entry["queries_avg"] = round(entry["queries_total"] / entry["requests"], 2)
+            entry["db_ms_avg"] = round(entry["db_seconds_total"] * 1000 / entry["requests"], 3)
+            entry["db_seconds_total"] = round(entry["db_seconds_total"], 6)
+        return routes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_query_stats = RouteQueryStats()
+
+
+# ============================================================================
+# SQLALCHEMY EVENTS
+# ============================================================================
+
+def _parameter_shapes(parameters) -> str:
+    """Bound-parameter types only, so slow logs never leak values."""
+    if isinstance(parameters, dict):
+        return "{" + ", ".join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + "}"
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"[{len(parameters)} x {_parameter_shapes(parameters[0])}]"
+        return "(" + ", ".join(type(value).__name__ for value in parameters) + ")"
+    return type(parameters).__name__
+
+
+def _explain(cursor, dialect_name: str, statement: str, parameters) -> str:
+    """EXPLAIN a SELECT on the connection that just ran it (plan only, not executed)."""
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return "(not a SELECT)"
+    prefix = "EXPLAIN QUERY PLAN " if dialect_name == "sqlite" else "EXPLAIN "
+    try:
+        explain_cursor = cursor.connection.cursor()
+        explain_cursor.execute(prefix + statement, parameters)
+        plan = explain_cursor.fetchall()
+        explain_cursor.close()
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+    return "\n".join("    " + " | ".join(str(col) for col in row) for row in plan)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+
+    stats = _current.get()
+    if stats is not None:
+        stats.add(elapsed)
+
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        plan = _explain(cursor, conn.dialect.name, statement, parameters)
+        print(
+            f"SLOW QUERY ({elapsed * 1000:.1f} ms): {' '.join(statement.split())}\n"
+            f"  params: {_parameter_shapes(parameters)}\n"
+            f"  plan:\n{plan}"
+        )
+
+
+def install_query_instrumentation() -> None:
+    """Hook the cursor events on every engine (idempotent)."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class QueryStatsMiddleware:
+    """
+    Collects query stats per HTTP request.
+
+    Plain ASGI (not BaseHTTPMiddleware) so the per-request cost is a
+    ContextVar set plus one header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestQueryStats()
+        background = RequestQueryStats()
+        scope["query_stats"] = stats  # For outer middleware (metrics)
+        token = _current.set(stats)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                header = f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.count} queries"'
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", header.encode("latin-1"))
+                ]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Response sent: what runs from here on (BackgroundTasks) is not the request's
+                _current.set(background)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            if route is not None:
+                from backend.services.metrics import method_label
+
+                key = f"{method_label(scope)} {route.path}"  # Client-chosen methods share "other"
+                route_query_stats.record(key, stats)
+                if background.count:
+                    route_query_stats.record(f"{key} [background]", background)
@@ -0,0 +1,344 @@
+"""
+Recommendation Scoring Service
+
+Ranks active listings for the questionnaire-driven recommendations.
+The score is expressed as a SQL CASE expression so the database can
+ORDER BY ... LIMIT and only the top N rows are ever loaded.
+
+Scoring:
+- Deal grade: S=100, A=75, B=50, C=25, D=10, F=0
+- Budget efficiency: up to 30 points for room left under budget
+- Priority "reliability": +25 for reliable makes
+- Priority "performance": +20 for coupes/convertibles, +15 for performance makes
+
+Profile-driven extras (stored per-user lists only):
+- Preferred brands: +20
+- Long commute (40+ km): +10 for hybrid/electric
+- Large family (5+): +10 for SUVs/minivans
+
+For users with a completed profile the ranked list is materialized in the
+user_recommendations table and refreshed in the background: in full when
+the profile changes, incrementally when a new car is ingested.
+"""
+
+from typing import List, Optional
+from uuid import uuid4
+from datetime import datetime, timezone
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models.car import Car
+from backend.models.user import User, UserRecommendation
+from backend.services.catalog import canonicalize_make
+
+
+GRADE_SCORES = {"S": 100, "A": 75, "B": 50, "C": 25, "D": 10, "F": 0}
+
+# Canonical makes (see backend/services/catalog.py) boosted by priority
+RELIABLE_MAKES = ["toyota", "honda", "lexus", "mazda", "subaru"]
+PERFORMANCE_MAKES = ["bmw", "audi", "mercedes-benz", "tesla", "porsche"]
+PERFORMANCE_BODY_TYPES = ["Coupe", "Convertible"]
+EFFICIENT_FUEL_TYPES = ["hybrid", "plugin_hybrid", "electric"]
+FAMILY_BODY_TYPES = ["SUV", "Minivan", "Van"]
+
+LONG_COMMUTE_KM = 40
+LARGE_FAMILY_SIZE = 5
+
+# Number of ranked candidates kept per user
+CANDIDATES_PER_USER = 50
+
+# Most points the profile can add on top of grade + budget (see recommendation_score):
+# performance priority (20 + 15) + preferred brand + efficient + family
+MAX_PROFILE_BONUS = 35 + 20 + 10 + 10
+
+
+def recommendation_score(
+    max_budget: float,
+    priority: str = "deal",
+    preferred_makes: Optional[List[str]] = None,
+    prefer_efficient: bool = False,
+    prefer_family: bool = False,
+):
+    """
+    Build the SQL score expression for a budget and priority.
+
+    The budget bonus is left fractional (not truncated) so ties on the
+    integer score are broken by how far under budget the car is.
+    """
+    score = case(GRADE_SCORES, value=Car.deal_grade, else_=0)
+
+    if max_budget > 0:
+        score = score + (literal(max_budget) - Car.price) / max_budget * 30
+
+    if priority == "reliability":
+        score = score + case((Car.make_normalized.in_(RELIABLE_MAKES), 25), else_=0)
+    elif priority == "performance":
+        score = score + case((Car.body_type.in_(PERFORMANCE_BODY_TYPES), 20), else_=0)
+        score = score + case((Car.make_normalized.in_(PERFORMANCE_MAKES), 15), else_=0)
+
+    if preferred_makes:
+        score = score + case((Car.make_normalized.in_(preferred_makes), 20), else_=0)
+    if prefer_efficient:
+        score = score + case((Car.fuel_type.in_(EFFICIENT_FUEL_TYPES), 10), else_=0)
+    if prefer_family:
+        score = score + case((Car.body_type.in_(FAMILY_BODY_TYPES), 10), else_=0)
+
+    return score
+
+
+def get_top_recommendations(
+    db: Session,
+    max_budget: float,
+    body_types: Optional[List[str]] = None,
+    priority: str = "deal",
+    limit: int = 10,
+) -> List[Car]:
+    """
+    Return the top `limit` active cars under budget, best score first.
+
+    Only `limit` rows are fetched; scoring and sorting happen in the database.
+    """
+    query = db.query(Car).filter(
+        Car.status == "active",
+        Car.price <= max_budget,
+    )
+
+    if body_types:
+        query = query.filter(Car.body_type.in_(body_types))
+
+    return (
+        query.order_by(
+            recommendation_score(max_budget, priority).desc(),
+            Car.created_at.desc(),
+            Car.id,
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+# ============================================================================
+# PER-USER MATERIALIZED CANDIDATES
+# ============================================================================
+
+def _profile_scoring(user: User) -> Optional[dict]:
+    """
+    Derive scoring inputs from a user's profile.
+
+    Returns None when the profile can't drive recommendations yet
+    (onboarding incomplete or no budget).
+    """
+    if not user.profile_complete or not user.buying_power:
+        return None
+
+    preferred_makes = sorted(
+        {canonicalize_make(brand) for brand in user.preferred_brands or []} - {None}
+    )
+    return {
+        "max_budget": float(user.buying_power),
+        "body_types": user.preferred_body_types or [],
+        "score": recommendation_score(
+            float(user.buying_power),
+            priority=(user.preferences or {}).get("priority", "deal"),
+            preferred_makes=preferred_makes,
+            prefer_efficient=(user.commute_distance_km or 0) >= LONG_COMMUTE_KM,
+            prefer_family=(user.family_size or 0) >= LARGE_FAMILY_SIZE,
+        ),
+    }
+
+
+def _candidate_query(db: Session, scoring: dict):
+    """Active cars matching a user's budget/body types, with their score."""
+    query = db.query(Car.id, scoring["score"].label("score")).filter(
+        Car.status == "active",
+        Car.price <= scoring["max_budget"],
+    )
+    if scoring["body_types"]:
+        query = query.filter(Car.body_type.in_(scoring["body_types"]))
+    return query
+
+
+def refresh_user_recommendations(db: Session, user: User) -> int:
+    """
+    Recompute a user's full ranked candidate list.
+
+    Called when the profile changes. Returns the number of candidates stored.
+    Marks the list as computed (users.recommendations_computed_at) even when
+    it comes out empty, so readers don't rebuild it on every request.
+    """
+    db.query(UserRecommendation).filter(UserRecommendation.user_id == user.id).delete()
+    now = datetime.now(timezone.utc)
+    user.recommendations_computed_at = now
+
+    scoring = _profile_scoring(user)
+    if scoring is None:
+        db.commit()
+        return 0
+
+    rows = (
+        _candidate_query(db, scoring)
+        .order_by(scoring["score"].desc(), Car.created_at.desc(), Car.id)
+        .limit(CANDIDATES_PER_USER)
+        .all()
+    )
+
+    db.add_all([
+        UserRecommendation(
+            id=str(uuid4()),
+            user_id=user.id,
+            car_id=car_id,
+            score=float(score),
+            computed_at=now,
+        )
+        for car_id, score in rows
+    ])
+    db.commit()
+    return len(rows)
+
+
+def add_car_to_recommendations(db: Session, car: Car) -> int:
+    """
+    Incrementally merge a newly ingested car into every stored candidate list.
+
+    The car is inserted for a user when their list isn't full yet or it
+    outscores their current lowest candidate (which is then evicted).
+    Returns the number of lists the car was added to.
+
+    One query picks the users whose list the car could enter: list already
+    built (users without one get it built whole on their first request, see
+    routers/users.py), in budget, not already listing it, and either not full or with a lowest score below
+    the best score the car could get for them (grade + budget room +
+    MAX_PROFILE_BONUS). Only those users have the car scored exactly, so
+    ingestion cost follows the lists the car can enter, not the user count.
+    """
+    if not car.price or car.status != "active":
+        return 0
+
+    lists = (
+        db.query(
+            UserRecommendation.user_id.label("user_id"),
+            func.count(UserRecommendation.id).label("entries"),
+            func.min(UserRecommendation.score).label("lowest"),
+            func.max(case((UserRecommendation.car_id == car.id, 1), else_=0)).label("has_car"),
+        )
+        .group_by(UserRecommendation.user_id)
+        .subquery()
+    )
+    best_possible = (
+        GRADE_SCORES.get(car.deal_grade, 0)
+        + (User.buying_power - car.price) * 30.0 / User.buying_power
+        + MAX_PROFILE_BONUS
+    )
+    candidates = (
+        db.query(User, func.coalesce(lists.c.entries, 0), lists.c.lowest)
+        .outerjoin(lists, lists.c.user_id == User.id)
+        .filter(
+            User.profile_complete == True,
+            User.recommendations_computed_at.isnot(None),
+            User.buying_power > 0,
+            User.buying_power >= car.price,
+            func.coalesce(lists.c.has_car, 0) == 0,
+            or_(
+                func.coalesce(lists.c.entries, 0) < CANDIDATES_PER_USER,
+                lists.c.lowest < best_possible,
+            ),
+        )
+        .all()
+    )
+
+    added = 0
+    now = datetime.now(timezone.utc)
+    for user, entries, lowest in candidates:
+        scoring = _profile_scoring(user)
+        if scoring is None:
+            continue
+
+        row = _candidate_query(db, scoring).filter(Car.id == car.id).first()
+        if row is None:
+            continue  # Body type doesn't match this user
+        score = float(row.score)
+
+        if entries >= CANDIDATES_PER_USER:
+            if lowest >= score:
+                continue
+            evicted = (
+                db.query(UserRecommendation)
+                .filter(UserRecommendation.user_id == user.id)
+                .order_by(UserRecommendation.score.asc())
+                .first()
+            )
+            db.delete(evicted)
+
+        db.add(UserRecommendation(
+            id=str(uuid4()),
+            user_id=user.id,
+            car_id=car.id,
+            score=score,
+            computed_at=now,
+        ))
+        added += 1
+
+    db.commit()
+    return added
+
+
+def get_stored_recommendations(db: Session, user_id: str, limit: int = 10) -> List[Car]:
+    """
+    Read a user's materialized candidates, best first.
+
+    Candidates that have since been sold or deleted are skipped.
+    """
+    return (
+        db.query(Car)
+        .join(UserRecommendation, UserRecommendation.car_id == Car.id)
+        .filter(UserRecommendation.user_id == user_id, Car.status == "active")
+        .order_by(UserRecommendation.score.desc(), Car.created_at.desc())
+        .limit(limit)
+        .all()
+    )
+
+
+# ============================================================================
+# BACKGROUND JOBS
+# ============================================================================
+# Each job opens its own sync session (the request session is closed by the
+# time the job runs; BackgroundTasks run sync jobs in the threadpool).
+
+def refresh_user_recommendations_job(user_id: str) -> None:
+    """Background job: full refresh after a profile change."""
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.id == user_id).first()
+        if user:
+            refresh_user_recommendations(db, user)
+    finally:
+        db.close()
+
+
+def add_car_to_recommendations_job(car_id: str) -> None:
+    """Background job: incremental merge after a car is ingested."""
+    db = SessionLocal()
+    try:
+        car = db.query(Car).filter(Car.id == car_id).first()
+        if car:
+            add_car_to_recommendations(db, car)
+    finally:
+        db.close()
+
+
+def refresh_all_recommendations(db: Session) -> int:
+    """Full rebuild for every user with a completed profile (e.g. nightly)."""
+    users = db.query(User).filter(User.profile_complete == True).all()
+    for user in users:
+        refresh_user_recommendations(db, user)
+    return len(users)
+
+
+if __name__ == "__main__":
+    session = SessionLocal()
+    try:
+        count = refresh_all_recommendations(session)
+        print(f"Refreshed recommendations for {count} users")
+    finally:
+        session.close()
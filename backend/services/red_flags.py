@@ -0,0 +1,235 @@
+"""
+Red-Flag Pre-Screener
+
+Many AI verdicts hinge on a handful of obvious phrases in the seller's
+description ("rebuilt title", "salvage", "needs work", "sold as is").
+This module finds them locally, at ingestion, without an LLM call:
+
+- A curated phrase list per tag (RED_FLAG_PHRASES) is compiled once into a
+  word-level Aho-Corasick automaton, so a description is scanned in one
+  pass no matter how many phrases there are (microseconds per listing).
+- Text is case-folded and split into words first, so punctuation doesn't
+  matter and phrases only match whole words ("rust" doesn't match "trust").
+- A match directly preceded by a negation ("no rust", "not salvage",
+  "never flooded", "free of rust") or followed by one ("rust free") in the
+  same clause is ignored, and so are the items of a list it heads ("never
+  flooded or salvaged", "no rust or rot"). Clauses end at sentence and
+  clause punctuation, so "No rust. Rebuilt title." still flags the title.
+- Phrases that are themselves negations ("no start", "not running") don't
+  count when they only qualify what follows ("no start issues", "not
+  running rough").
+
+The tags are stored on the car (cars.red_flags) and filterable in search.
+Severe tags (branded title, flood/frame damage, not running) give a
+rule-based verdict without calling Gemini; the rest are passed into the
+AI prompt.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, Iterable, List, Literal, Optional, Tuple
+
+
+# ============================================================================
+# PHRASE LIST
+# ============================================================================
+
+# Tag -> phrases. Phrases are split into words like descriptions (see
+# _words), so "doesn t run" also matches "doesn't run" and "as is" "AS-IS".
+RED_FLAG_PHRASES: Dict[str, Tuple[str, ...]] = {
+    # Severe: clear-cut pass for a flip
+    "salvage_title": ("salvage", "salvaged", "salvage title", "branded title"),
+    "rebuilt_title": (
+        "rebuilt title", "rebuild title", "rebuilt status", "rebuilt vehicle",
+        "reconstructed title", "irs rebuilt",
+    ),
+    "flood_damage": ("flood damage", "flood damaged", "flooded", "flood car", "water damage"),
+    "frame_damage": ("frame damage", "bent frame", "frame rust", "rusted frame", "frame is rusted"),
+    "not_running": (
+        "not running", "does not run", "doesn t run", "non running", "non runner",
+        "won t start", "does not start", "doesn t start", "no start",
+    ),
+    "engine_failure": (
+        "blown engine", "engine blown", "seized engine", "engine seized",
+        "needs engine", "needs new engine", "needs an engine", "rod knock",
+        "blown head gasket",
+    ),
+    # Moderate: worth a closer look
+    "needs_work": (
+        "needs work", "needs some work", "needs tlc", "project car",
+        "mechanic special", "mechanics special", "mechanic s special", "handyman special",
+    ),
+    "as_is": ("sold as is", "as is where is", "as is condition", "as is no warranty"),
+    "running_rough": ("running rough", "runs rough", "rough idle", "misfire", "misfiring"),
+    "check_engine_light": ("check engine light", "engine light on", "cel on"),
+    "transmission_issue": (
+        "transmission slipping", "slipping transmission", "transmission issue",
+        "transmission issues", "transmission problem", "transmission problems",
+        "needs transmission", "hard shifting",
+    ),
+    "accident_history": (
+        "accident damage", "previous accident", "was in an accident", "collision damage",
+        "minor accident", "major accident", "accident history",
+    ),
+    "rust": ("rust", "rusty", "heavy rust", "rust holes", "rust issues", "rot"),
+    "no_safety": ("no safety", "not certified", "without safety", "needs safety", "uncertified"),
+    "odometer_issue": (
+        "tmu", "true mileage unknown", "mileage unknown", "odometer rollback",
+        "odometer broken", "odometer not working",
+    ),
+}
+
+# Any one of these decides the verdict without an AI call
+SEVERE_RED_FLAGS = frozenset({
+    "salvage_title", "rebuilt_title", "flood_damage", "frame_damage", "not_running", "engine_failure",
+})
+
+# For request validation (e.g. search filters)
+RedFlag = Literal[tuple(RED_FLAG_PHRASES)]
+
+# Words that cancel a match right after them ("no rust", "not salvage")
+NEGATIONS = frozenset({"no", "not", "never", "without", "zero", "non", "isn t", "wasn t", "free of"})
+NEGATION_WINDOW = 2  # Words looked back for a negation (within the clause)
+
+# Words that cancel a match right before them ("rust free")
+TRAILING_NEGATIONS = frozenset({"free"})
+
+# Words that carry a negated match on to the next one ("no rust or rot")
+LIST_CONJUNCTIONS = frozenset({"or", "and", "nor"})
+
+# Words after a phrase starting with a negation that make it mean the
+# opposite ("no start issues", "not running rough")
+QUALIFIERS = frozenset({"issue", "issues", "problem", "problems", "rough"})
+
+# Punctuation that ends a clause; negations don't reach across it
+CLAUSE_BREAK = re.compile(r"[.,;:!?()\[\]\n]+")
+
+
+# ============================================================================
+# AHO-CORASICK AUTOMATON
+# ============================================================================
+
+def _words(text: str) -> List[str]:
+    """Case-fold and split on everything but letters/digits."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class PhraseMatcher:
+    """
+    Multi-phrase matcher (Aho-Corasick) over word sequences.
+
+    Built once from (phrase, tag) pairs; find() reports every phrase
+    occurrence in a single left-to-right pass over the words. Working on
+    words rather than characters keeps matches on word boundaries and makes
+    the pass several times shorter.
+    """
+
+    def __init__(self, phrases: Iterable[Tuple[str, str]]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]  # (phrase length in words, tag)
+
+        for phrase, tag in phrases:
+            words = _words(phrase)
+            state = 0
+            for word in words:
+                if word not in self._goto[state]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[state][word] = len(self._goto) - 1
+                state = self._goto[state][word]
+            self._out[state].append((len(words), tag))
+
+        # Breadth-first failure links
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for word, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and word not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(word, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find(self, words: List[str]) -> List[Tuple[int, int, str]]:
+        """(index of the first word, index after the last word, tag) of every match."""
+        goto, fail, out = self._goto, self._fail, self._out
+        matches = []
+        state = 0
+        for index, word in enumerate(words):
+            while state and word not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(word, 0)
+            for length, tag in out[state]:
+                matches.append((index - length + 1, index + 1, tag))
+        return matches
+
+
+@lru_cache(maxsize=None)
+def _matcher() -> PhraseMatcher:
+    return PhraseMatcher(
+        (phrase, tag) for tag, phrases in RED_FLAG_PHRASES.items() for phrase in phrases
+    )
+
+
+def _negated(words: List[str], start: int) -> bool:
+    """True if a negation is among the NEGATION_WINDOW words before `start`."""
+    preceding = words[max(start - NEGATION_WINDOW, 0):start]
+    pairs = [" ".join(preceding[i:i + 2]) for i in range(len(preceding) - 1)]
+    return any(word in NEGATIONS for word in preceding + pairs)
+
+
+def _clause_tags(words: List[str]) -> set:
+    """Tags of the matches in one clause that aren't negated or qualified."""
+    tags = set()
+    negated_ends = set()  # Where negated matches end, for the list rule
+    for start, end, tag in sorted(_matcher().find(words)):
+        following = words[end] if end < len(words) else None
+        if words[start] in NEGATIONS and following in QUALIFIERS:
+            continue
+        if (
+            _negated(words, start)
+            or following in TRAILING_NEGATIONS
+            or (start and words[start - 1] in LIST_CONJUNCTIONS and start - 1 in negated_ends)
+        ):
+            negated_ends.add(end)
+            continue
+        tags.add(tag)
+    return tags
+
+
+# ============================================================================
+# PUBLIC API
+# ============================================================================
+
+def scan_description(description: Optional[str]) -> List[str]:
+    """Red-flag tags found in a listing description, sorted (empty if none)."""
+    if not description:
+        return []
+    tags = set()
+    for clause in CLAUSE_BREAK.split(description):
+        tags |= _clause_tags(_words(clause))
+    return sorted(tags)
+
+
+def describe_red_flags(tags: Iterable[str]) -> str:
+    """Human-readable list for prompts and verdicts ("salvage title, rust")."""
+    return ", ".join(tag.replace("_", " ") for tag in tags)
+
+
+def rule_based_verdict(tags: Iterable[str]) -> Optional[str]:
+    """
+    Verdict for clear-cut listings (any severe red flag), else None.
+
+    Uses the same "VERDICT: ..." format as the AI analysis.
+    """
+    severe = [tag for tag in tags if tag in SEVERE_RED_FLAGS]
+    if not severe:
+        return None
+    return (
+        f"VERDICT: Pass. Listing mentions {describe_red_flags(severe)}, "
+        "which wipes out resale value for a flip."
+    )
@@ -0,0 +1,87 @@
+"""
+Regrade Job
+
+Recomputes the values derived at ingestion for every active listing:
+fair market value, deal grade and the default-assumption monthly TCO
+(cars.monthly_tco_default). Run it after changing the FMV model, the
+grading scale or the TCO defaults, and once a year: depreciation and
+maintenance depend on the car's age, so stored TCOs drift every January.
+
+Cars are walked in id order in batches, each batch committed on its own,
+and only rows whose values actually changed are written (so their
+updated_at / ETag only moves when something did).
+
+Running servers keep serving their cached trending lists (each process has
+its own, see services/trending.py) until the lists expire, so new grades
+show up there within TRENDING_MAX_AGE_SECONDS.
+
+Usage:
+    python -m backend.services.regrade
+"""
+
+from sqlalchemy.orm import Session
+
+from backend.database import SessionLocal
+from backend.models.car import Car
+
+
+REGRADE_BATCH_SIZE = 500
+
+
+def regrade_cars(db: Session, batch_size: int = REGRADE_BATCH_SIZE) -> int:
+    """
+    Recompute FMV, deal grade and default TCO for active cars.
+
+    Returns the number of cars that changed.
+    """
+    from backend.services.quant.deal_grader import calculate_deal_grade
+    from backend.services.quant.fmv import estimate_fair_market_value
+    from backend.services.tco import default_monthly_tco
+
+    changed = 0
+    last_id = ""
+    while True:
+        cars = (
+            db.query(Car)
+            .filter(Car.status == "active", Car.id > last_id)
+            .order_by(Car.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not cars:
+            break
+
+        for car in cars:
+            fmv = estimate_fair_market_value(
+                make=car.make,
+                model=car.model,
+                year=car.year,
+                mileage=car.mileage,
+                trim=car.trim,
+                fuel_type=car.fuel_type,
+            )
+            values = {
+                "fair_market_value": fmv,
+                "deal_grade": calculate_deal_grade(listed_price=car.price, fair_market_value=fmv),
+                "monthly_tco_default": default_monthly_tco(
+                    car.price, car.year, car.fuel_type, car.body_type
+                ),
+            }
+            if any(getattr(car, name) != value for name, value in values.items()):
+                for name, value in values.items():
+                    setattr(car, name, value)
+                changed += 1
+
+        db.commit()
+        last_id = cars[-1].id
+
+    return changed
+
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        count = regrade_cars(db)
+    finally:
+        db.close()
+    print(f"Regraded {count} cars")
@@ -0,0 +1,92 @@
+"""
+Fast JSON Serialization for Car Lists
+
+The default FastAPI path hydrates a Car ORM object per row, validates it
+through CarResponse (from_attributes) and then serializes it. For list pages
+that is most of the request time.
+
+The fast path selects only the CarResponse columns as plain row tuples and
+encodes them directly with orjson. The JSON is identical to the
+response_model path (same keys, same order, same value formats), so the
+declared response_model stays accurate for the OpenAPI docs.
+
+Sparse fieldsets (?fields=id,make,price) narrow the SELECT itself, so large
+unrequested columns like description / ai_verdict are never read.
+
+Benchmark: python -m backend.benchmarks.bench_serialization
+"""
+
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import orjson
+from fastapi import Response
+
+from backend.models.car import Car, CarResponse
+
+
+# Field order matches CarResponse serialization order
+CAR_RESPONSE_FIELDS = tuple(CarResponse.model_fields)
+
+
+def parse_fields(fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Parse a sparse fieldset ("id,make,price") into response field names.
+
+    Keeps CarResponse order, always includes "id", and defaults to every
+    field. Raises ValueError on unknown names.
+    """
+    if not fields:
+        return CAR_RESPONSE_FIELDS
+
+    requested = {name.strip() for name in fields.split(",") if name.strip()}
+    unknown = requested - set(CAR_RESPONSE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    requested.add("id")
+    return tuple(field for field in CAR_RESPONSE_FIELDS if field in requested)
+
+
+def car_response_columns(fields: Sequence[str] = CAR_RESPONSE_FIELDS) -> List:
+    """Car columns to SELECT for the given response fields."""
+    return [getattr(Car, field) for field in fields]
+
+
+def car_rows_to_dicts(
+    rows: Iterable[Sequence],
+    fields: Sequence[str] = CAR_RESPONSE_FIELDS,
+) -> List[dict]:
+    """Row tuples (in `fields` order) as plain dicts, ready for dump_json."""
+    return [dict(zip(fields, row)) for row in rows]
+
+
+def dump_json(content) -> bytes:
+    """
+    orjson encode with response_model-compatible formatting.
+
+    OPT_UTC_Z renders UTC datetimes with a "Z" suffix, like pydantic does.
+    """
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def dump_car_rows(rows: Iterable[Sequence], fields: Sequence[str] = CAR_RESPONSE_FIELDS) -> bytes:
+    """Encode row tuples (in `fields` order) as a JSON array of objects."""
+    return dump_json(car_rows_to_dicts(rows, fields))
+
+
+def json_response(content, headers: Optional[dict] = None) -> Response:
+    """Pre-encoded JSON response (bypasses response_model validation)."""
+    return Response(content=dump_json(content), media_type="application/json", headers=headers)
+
+
+def car_list_response(
+    rows: Iterable[Sequence],
+    fields: Sequence[str] = CAR_RESPONSE_FIELDS,
+    headers: Optional[dict] = None,
+) -> Response:
+    """JSON response for a page of car rows, skipping per-row model validation."""
+    return Response(
+        content=dump_car_rows(rows, fields),
+        media_type="application/json",
+        headers=headers,
+    )
@@ -8,11 +8,16 @@ Calculates the REAL monthly cost of owning a vehicle, including:
 - Maintenance estimate
 
 This helps buyers understand the true cost beyond just the purchase price.
+
+calculate_tco() prices one car; calculate_tco_batch() prices many at once
+with NumPy array operations (same formulas, same results).
 """
 
-from typing import Optional
+from typing import Optional, Sequence
 from dataclasses import dataclass
 
+import numpy as np
+
 
 @dataclass
 class TCOResult:
@@ -281,3 +286,147 @@ def calculate_tco(
             "note": "Estimates only. Actual costs may vary based on driving habits, location, and vehicle condition.",
         },
     )
+
+
+# ============================================================================
+# DEFAULT TCO (stored for search)
+# ============================================================================
+
+# Listing body type (case-folded) -> insurance vehicle type; anything else is "sedan"
+BODY_TYPE_VEHICLE_TYPES = {
+    "suv": "suv",
+    "crossover": "suv",
+    "minivan": "suv",
+    "van": "suv",
+    "truck": "truck",
+    "pickup": "truck",
+    "pickup truck": "truck",
+    "coupe": "sports",
+    "convertible": "sports",
+    "roadster": "sports",
+}
+
+
+def vehicle_type_for_body(body_type: Optional[str]) -> str:
+    """Insurance vehicle type for a listing's body type (default: sedan)."""
+    return BODY_TYPE_VEHICLE_TYPES.get((body_type or "").strip().lower(), "sedan")
+
+
+def default_monthly_tco(
+    purchase_price: Optional[float],
+    vehicle_year: Optional[int],
+    fuel_type: Optional[str] = None,
+    body_type: Optional[str] = None,
+) -> Optional[float]:
+    """
+    Monthly TCO under the default assumptions, stored as cars.monthly_tco_default.
+
+    Uses the default annual_km and fuel price, with the vehicle type derived
+    from the body type. None if the listing has no price or year.
+    """
+    if not purchase_price or not vehicle_year:
+        return None
+    return calculate_tco(
+        purchase_price=purchase_price,
+        vehicle_year=vehicle_year,
+        fuel_type=fuel_type or "gasoline",
+        vehicle_type=vehicle_type_for_body(body_type),
+    ).monthly_total
+
+
+# ============================================================================
+# BATCH TCO (vectorized)
+# ============================================================================
+
+@dataclass
+class TCOBatchResult:
+    """TCO for many cars: one array per component, in input order"""
+    monthly_total: np.ndarray
+    monthly_fuel: np.ndarray
+    monthly_depreciation: np.ndarray
+    monthly_insurance: np.ndarray
+    monthly_maintenance: np.ndarray
+    annual_total: np.ndarray
+    assumptions: dict
+
+
+def calculate_tco_batch(
+    purchase_prices: Sequence[float],
+    vehicle_years: Sequence[int],
+    fuel_types: Sequence[Optional[str]],
+    annual_km: int = 15000,
+    fuel_price: Optional[float] = None,
+    vehicle_type: str = "sedan",
+) -> TCOBatchResult:
+    """
+    calculate_tco() for many cars sharing one set of assumptions.
+
+    Each component is computed for all cars in one NumPy expression, using
+    the same formulas as the scalar functions above (missing fuel types
+    count as gasoline).
+
+    Args:
+        purchase_prices: Price per car
+        vehicle_years: Model year per car
+        fuel_types: Fuel type per car
+        annual_km, fuel_price, vehicle_type: As for calculate_tco()
+
+    Returns:
+        TCOBatchResult with rounded monthly breakdown arrays
+    """
+    from datetime import datetime
+    current_year = datetime.now().year
+
+    prices = np.asarray(purchase_prices, dtype=float)
+    ages = current_year - np.asarray(vehicle_years, dtype=float)
+    fuel_types = [fuel_type or "gasoline" for fuel_type in fuel_types]
+
+    # Per-car lookups on the distinct fuel types only
+    kinds, kind_index = np.unique(np.asarray(fuel_types, dtype=object).astype(str), return_inverse=True)
+    electric = (kinds == "electric")[kind_index]
+    efficiency = np.array(
+        [FUEL_EFFICIENCY.get(kind.lower(), FUEL_EFFICIENCY["gasoline"]) for kind in kinds]
+    )[kind_index]
+
+    # Fuel / electricity
+    monthly_km = annual_km / 12
+    price = fuel_price if fuel_price else FUEL_PRICE_PER_LITER
+    monthly_fuel = np.where(
+        electric,
+        (monthly_km / 100) * EV_EFFICIENCY_KWH_PER_100KM * ELECTRICITY_PRICE_PER_KWH,
+        (monthly_km / 100) * efficiency * price,
+    )
+
+    # Depreciation (first matching rate wins, like the if/elif chain)
+    annual_rate = np.select([ages == 0, ages <= 5], [0.15, 0.10], default=0.05)
+    monthly_depreciation = prices * annual_rate / 12
+
+    # Insurance
+    base = np.where(electric, INSURANCE_BASE.get("electric", 2200), INSURANCE_BASE.get(vehicle_type.lower(), 1800))
+    value_factor = np.select(
+        [prices > 50000, prices > 75000, prices > 100000], [1.2, 1.4, 1.6], default=1.0
+    )
+    monthly_insurance = base * value_factor / 12
+
+    # Maintenance
+    base_per_1000km = np.where(electric, 15, 40)
+    age_multiplier = np.minimum(1.0 + ages * 0.05, 2.0)
+    monthly_maintenance = (annual_km / 1000) * base_per_1000km * age_multiplier / 12
+
+    monthly_total = monthly_fuel + monthly_depreciation + monthly_insurance + monthly_maintenance
+
+    return TCOBatchResult(
+        monthly_total=np.round(monthly_total, 2),
+        monthly_fuel=np.round(monthly_fuel, 2),
+        monthly_depreciation=np.round(monthly_depreciation, 2),
+        monthly_insurance=np.round(monthly_insurance, 2),
+        monthly_maintenance=np.round(monthly_maintenance, 2),
+        annual_total=np.round(monthly_total * 12, 2),
+        assumptions={
+            "annual_km": annual_km,
+            "fuel_price_per_liter": fuel_price or FUEL_PRICE_PER_LITER,
+            "vehicle_type": vehicle_type,
+            "current_year": current_year,
+            "note": "Estimates only. Actual costs may vary based on driving habits, location, and vehicle condition.",
+        },
+    )
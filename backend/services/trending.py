@@ -0,0 +1,192 @@
+"""
+Trending Deals Cache
+
+The landing page "Top Deals" list is the most-hit read on the site, so it is
+kept materialized in memory instead of being queried on every request.
+
+- One ranked query builds a list: S, then A, then B (filler), newest first.
+- Lists are held per segment: global, per make, per body type.
+- A list is only recomputed when ingestion or an update changes its top
+  (see notify_car_changed), or after TRENDING_MAX_AGE_SECONDS as a safety net
+  for changes made by other workers.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import case
+from sqlalchemy.orm import Session
+
+from backend.models.car import Car, CarResponse
+from backend.services.catalog import canonicalize_make
+from backend.services.metrics import CACHE_LOOKUPS
+
+
+# Trending order: best grade first. Anything below B never trends.
+GRADE_RANK = {"S": 0, "A": 1, "B": 2}
+
+# How many cars each cached list holds (larger limits bypass the cache)
+TRENDING_CACHE_SIZE = int(os.getenv("TRENDING_CACHE_SIZE", "50"))
+
+# Upper bound on staleness for changes made by other processes
+TRENDING_MAX_AGE_SECONDS = float(os.getenv("TRENDING_MAX_AGE_SECONDS", "60"))
+
+SegmentKey = Tuple[Optional[str], Optional[str]]  # (make_normalized, body_type)
+
+
+def _naive_utc(value: Optional[datetime]) -> datetime:
+    """Compare DB (naive) and freshly-set (aware) timestamps on one scale."""
+    if value is None:
+        return datetime.min
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def query_trending(
+    db: Session,
+    limit: int,
+    make: Optional[str] = None,
+    body_type: Optional[str] = None,
+) -> List[Car]:
+    """Single ranked query for a trending segment."""
+    query = (
+        db.query(Car)
+        .filter(Car.status == "active")
+        .filter(Car.deal_grade.in_(list(GRADE_RANK)))
+    )
+    if make:
+        query = query.filter(Car.make_normalized == make)
+    if body_type:
+        query = query.filter(Car.body_type == body_type)
+
+    return (
+        query.order_by(
+            case(GRADE_RANK, value=Car.deal_grade),  # S, A, then B fillers
+            Car.created_at.desc(),                   # Newest first within grade
+            Car.id,
+        )
+        .limit(limit)
+        .all()
+    )
+
+
+def _content_version(cars: List[CarResponse]) -> str:
+    """Digest of a list's serialized content."""
+    digest = hashlib.sha1()
+    for car in cars:
+        digest.update(car.model_dump_json().encode())
+    return digest.hexdigest()
+
+
+class TrendingCache:
+    """In-process store of materialized trending lists, one per segment."""
+
+    def __init__(self, size: int = TRENDING_CACHE_SIZE, max_age: float = TRENDING_MAX_AGE_SECONDS):
+        self.size = size
+        self.max_age = max_age
+        # key -> (cars, content version, monotonic build time)
+        self._lists: Dict[SegmentKey, Tuple[List[CarResponse], str, float]] = {}
+        # Guards _lists only, never held across a query: rebuilds run inside
+        # db.run_sync, where the query yields to the event loop mid-call
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every invalidation
+
+    def get(
+        self,
+        db: Session,
+        limit: int,
+        make: Optional[str] = None,
+        body_type: Optional[str] = None,
+    ) -> List[CarResponse]:
+        """
+        Serve a trending list, touching the DB only if it must be rebuilt.
+        """
+        cars, _ = self.get_versioned(db, limit, make, body_type)
+        return cars
+
+    def get_versioned(
+        self,
+        db: Session,
+        limit: int,
+        make: Optional[str] = None,
+        body_type: Optional[str] = None,
+    ) -> Tuple[List[CarResponse], str]:
+        """
+        Like get(), plus a content version (for ETags) of the returned slice.
+
+        The version is a digest of the list's content computed once per
+        rebuild, so identical data yields identical versions across workers.
+        """
+        key = (canonicalize_make(make), body_type or None)
+
+        if limit > self.size:
+            CACHE_LOOKUPS.labels("trending", "bypass").inc()
+            cars = [CarResponse.model_validate(car) for car in query_trending(db, limit, *key)]
+            return cars, _content_version(cars)
+
+        entry = self._lists.get(key)
+        if entry is None or time.monotonic() - entry[2] >= self.max_age:
+            CACHE_LOOKUPS.labels("trending", "miss").inc()
+            generation = self._generation
+            cars = [CarResponse.model_validate(car) for car in query_trending(db, self.size, *key)]
+            entry = (cars, _content_version(cars), time.monotonic())
+            with self._lock:
+                # Don't store a list that an invalidation during the query made stale
+                if generation == self._generation:
+                    self._lists[key] = entry
+        else:
+            CACHE_LOOKUPS.labels("trending", "hit").inc()
+
+        cars, version, _ = entry
+        return cars[:limit], f"{version}:{min(limit, len(cars))}"
+
+    def notify_car_changed(self, car: Car) -> None:
+        """
+        Drop every cached list whose top this car changes.
+
+        That is: lists already containing the car (its data or status changed),
+        and lists of its segment it would now rank into.
+        """
+        qualifies = car.status == "active" and car.deal_grade in GRADE_RANK
+        car_rank = (GRADE_RANK.get(car.deal_grade), _naive_utc(car.created_at))
+
+        with self._lock:
+            self._generation += 1
+            for key, (cars, _, _) in list(self._lists.items()):
+                if any(cached.id == car.id for cached in cars):
+                    self._lists.pop(key, None)
+                    continue
+
+                make, body_type = key
+                if not qualifies:
+                    continue
+                if make and car.make_normalized != make:
+                    continue
+                if body_type and car.body_type != body_type:
+                    continue
+
+                if len(cars) < self.size:
+                    self._lists.pop(key, None)
+                    continue
+
+                last = cars[-1]
+                last_rank = GRADE_RANK[last.deal_grade]
+                if car_rank[0] < last_rank or (
+                    car_rank[0] == last_rank and car_rank[1] >= _naive_utc(last.created_at)
+                ):
+                    self._lists.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all cached lists (e.g. after a bulk regrade)."""
+        with self._lock:
+            self._generation += 1
+            self._lists.clear()
+
+
+# Process-wide instance used by the cars router
+trending_cache = TrendingCache()
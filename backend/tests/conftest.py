@@ -4,26 +4,62 @@ Pytest Configuration and Fixtures
 This module provides shared fixtures for all tests.
 """
 
+import os
+import shutil
+import tempfile
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-
-from backend.main import app
-from backend.database import Base, get_db
+from sqlalchemy.pool import NullPool
+
+from backend.main import create_app
+from backend.database import (
+    Base,
+    get_db,
+    get_async_db,
+    get_async_read_db,
+    SessionLocal,
+    AsyncSessionLocal,
+    AsyncReadSessionLocal,
+)
 
 
-# Create in-memory SQLite database for testing
-SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+# Temp-file SQLite database for testing.
+# A file (not :memory:) so the async engine used by the routers and the
+# sync engine used by fixtures and background jobs see the same data.
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="undercut-tests-")  # Removed by remove_test_db
+_TEST_DB_PATH = os.path.join(_TEST_DB_DIR, "test.db")
+SQLALCHEMY_DATABASE_URL = f"sqlite:///{_TEST_DB_PATH}"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
     connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    poolclass=NullPool,
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    f"sqlite+aiosqlite:///{_TEST_DB_PATH}",
+    poolclass=NullPool,
+)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+# Schema is managed by the fixtures below, not the app's startup hook
+app = create_app(init_schema=False)
+
+# Background jobs open their own sessions from the app's factories
+SessionLocal.configure(bind=engine)
+AsyncSessionLocal.configure(bind=async_engine)
+AsyncReadSessionLocal.configure(bind=async_engine)
+
 
 def override_get_db():
     """Override the database dependency with test database."""
@@ -34,6 +70,20 @@ def override_get_db():
         db.close()
 
 
+async def override_get_async_db():
+    """Override the async database dependency with test database."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="session", autouse=True)
+def remove_test_db():
+    """Delete the temp-file test database (and its -wal/-shm files) after the session."""
+    yield
+    engine.dispose()
+    shutil.rmtree(_TEST_DB_DIR, ignore_errors=True)
+
+
 @pytest.fixture(scope="function")
 def test_db():
     """
@@ -60,7 +110,12 @@ def client(test_db):
     
     Uses the test database instead of the real one.
     """
+    from backend.services.trending import trending_cache
+
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    trending_cache.clear()  # In-memory lists must not leak between tests
     
     # Create tables before test
     Base.metadata.create_all(bind=engine)
@@ -84,6 +84,156 @@ class TestCarCRUD:
         
         assert isinstance(data, list)
 
+    def test_trending_refreshes_on_ingest(self, client, sample_car_data):
+        """Test that the cached trending list picks up a new top deal."""
+        first = client.post("/cars/", json={**sample_car_data, "price": 15000.0}).json()
+        assert [c["id"] for c in client.get("/cars/trending").json()] == [first["id"]]
+        
+        second = sample_car_data.copy()
+        second["vin"] = "17CHARVINTREND099"
+        second["listing_url"] = "https://example.com/trend99"
+        second["price"] = 15000.0
+        second = client.post("/cars/", json=second).json()
+        
+        ids = [c["id"] for c in client.get("/cars/trending").json()]
+        assert ids == [second["id"], first["id"]]
+
+    def test_trending_kept_on_rescrape(self, client, sample_car_data):
+        """Test that a scraper re-seeing a trending car doesn't drop the cached list."""
+        from backend.services.trending import trending_cache
+        
+        client.post("/cars/", json={**sample_car_data, "price": 15000.0})
+        client.get("/cars/trending")
+        
+        client.post("/cars/", json={**sample_car_data, "price": 15000.0})
+        assert trending_cache._lists
+        
+        client.post("/cars/", json={**sample_car_data, "image_url": "https://example.com/car.jpg"})
+        assert not trending_cache._lists
+
+    def test_trending_by_segment(self, client, sample_car_data):
+        """Test per-make and per-body-type trending lists."""
+        tesla = client.post(
+            "/cars/", json={**sample_car_data, "price": 15000.0, "body_type": "Sedan"}
+        ).json()
+        
+        honda = sample_car_data.copy()
+        honda.update({
+            "vin": "17CHARVINTREND100",
+            "listing_url": "https://example.com/trend100",
+            "make": "Honda",
+            "model": "CR-V",
+            "price": 10000.0,
+            "body_type": "SUV",
+        })
+        honda = client.post("/cars/", json=honda).json()
+        
+        by_make = client.get("/cars/trending", params={"make": "honda"}).json()
+        assert [c["id"] for c in by_make] == [honda["id"]]
+        
+        by_body = client.get("/cars/trending", params={"body_type": "Sedan"}).json()
+        assert [c["id"] for c in by_body] == [tesla["id"]]
+
+
+class TestCarBatch:
+    """Test batch car lookup."""
+
+    def test_batch_preserves_order_and_reports_missing(self, client, sample_car_data):
+        """Test that cars come back in request order with missing ids listed."""
+        first = client.post("/cars/", json=sample_car_data).json()
+        second = client.post(
+            "/cars/",
+            json={**sample_car_data, "vin": "17CHARVINBATCH002", "listing_url": "https://example.com/b2"},
+        ).json()
+        
+        response = client.get(
+            "/cars/batch",
+            params={"ids": f"{second['id']},nope,{first['id']},{second['id']}"},
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert [car["id"] for car in data["cars"]] == [second["id"], first["id"]]
+        assert data["missing"] == ["nope"]
+        assert data["cars"][0]["make"] == "Tesla"
+
+    def test_batch_too_many_ids(self, client):
+        """Test that oversized batches are rejected."""
+        from backend.routers.cars import BATCH_MAX_IDS
+        
+        ids = ",".join(f"id-{i}" for i in range(BATCH_MAX_IDS + 1))
+        response = client.get("/cars/batch", params={"ids": ids})
+        
+        assert response.status_code == 400
+
+
+class TestSparseFields:
+    """Test ?fields= projections on list endpoints."""
+
+    def test_read_cars_with_fields(self, client, sample_car_data):
+        """Test that only requested fields (plus id) are returned."""
+        client.post("/cars/", json={**sample_car_data, "description": "Long text"})
+        
+        response = client.get("/cars/", params={"fields": "make,price"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert set(data[0]) == {"id", "make", "price"}
+
+    def test_search_with_fields(self, client, sample_car_data):
+        """Test that search accepts the same projection."""
+        client.post("/cars/", json=sample_car_data)
+        
+        response = client.post("/cars/search?fields=model,deal_grade", json={})
+        
+        assert response.status_code == 200
+        assert set(response.json()[0]) == {"id", "model", "deal_grade"}
+
+    def test_unknown_field_rejected(self, client):
+        """Test that unknown field names are a client error."""
+        response = client.get("/cars/", params={"fields": "make,password"})
+        
+        assert response.status_code == 400
+
+
+class TestConditionalGet:
+    """Test ETag / Last-Modified revalidation on read endpoints."""
+
+    def test_read_car_not_modified(self, client, sample_car_data):
+        """Test that a matching If-None-Match returns 304 until the car changes."""
+        car_id = client.post("/cars/", json=sample_car_data).json()["id"]
+        
+        response = client.get(f"/cars/{car_id}")
+        etag = response.headers["etag"]
+        assert "last-modified" in response.headers
+        assert "cache-control" in response.headers
+        
+        response = client.get(f"/cars/{car_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        
+        # Re-ingesting the listing bumps last_seen_at -> new version
+        client.post("/cars/", json=sample_car_data)
+        response = client.get(f"/cars/{car_id}", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+
+    def test_read_cars_not_modified(self, client, sample_car_data):
+        """Test list revalidation against the inventory generation."""
+        client.post("/cars/", json=sample_car_data)
+        etag = client.get("/cars/").headers["etag"]
+        
+        assert client.get("/cars/", headers={"If-None-Match": etag}).status_code == 304
+        # Different page -> different representation
+        assert client.get("/cars/?limit=5", headers={"If-None-Match": etag}).status_code == 200
+
+    def test_trending_not_modified(self, client, sample_car_data):
+        """Test trending revalidation against the cached list version."""
+        client.post("/cars/", json={**sample_car_data, "price": 15000.0})
+        etag = client.get("/cars/trending").headers["etag"]
+        
+        assert client.get("/cars/trending", headers={"If-None-Match": etag}).status_code == 304
+
 
 class TestCarSearch:
     """Test Car search functionality."""
@@ -109,6 +259,25 @@ class TestCarSearch:
         assert len(data) >= 1
         assert all(car["make"] == "Tesla" for car in data)
 
+    def test_search_by_make_alias(self, client, sample_car_data):
+        """Test that make search uses canonical makes, not substrings."""
+        mercedes = sample_car_data.copy()
+        mercedes["make"] = "Mercedes-Benz"
+        mercedes["model"] = "C-Class"
+        client.post("/cars/", json=mercedes)
+        
+        response = client.post("/cars/search", json={"make": ["mercedes"], "model": "c class"})
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert len(data) == 1
+        assert data[0]["make"] == "Mercedes-Benz"
+        
+        # Substrings no longer match
+        response = client.post("/cars/search", json={"make": ["merc-b"]})
+        assert response.json() == []
+
     def test_search_by_price_range(self, client, sample_car_data):
         """Test searching cars by price range."""
         # Create car at $38,000
@@ -145,6 +314,67 @@ class TestCarSearch:
         for car in data:
             assert car["deal_grade"] in ["S", "A"]
 
+    def test_search_red_flags(self, client, sample_car_data):
+        """Test that red flags found at ingestion are stored and filterable."""
+        clean = sample_car_data.copy()
+        clean["description"] = "One owner, no accidents, no rust."
+        client.post("/cars/", json=clean)
+        
+        risky = sample_car_data.copy()
+        risky["vin"] = "4HGBH41JXMN109189"
+        risky["listing_url"] = "https://example.com/car2"
+        risky["description"] = "Rebuilt title, runs rough. Sold as-is."
+        car = client.post("/cars/", json=risky).json()
+        
+        assert car["red_flags"] == ["as_is", "rebuilt_title", "running_rough"]
+        assert car["ai_verdict"].startswith("VERDICT: Pass.")  # No AI call needed
+        
+        response = client.post("/cars/search", json={"red_flags": ["rebuilt_title"]})
+        assert [c["id"] for c in response.json()] == [car["id"]]
+        
+        response = client.post("/cars/search", json={"exclude_red_flags": ["as_is"]})
+        assert [c["red_flags"] for c in response.json()] == [[]]
+        
+        response = client.post("/cars/search", json={"no_red_flags": True})
+        assert len(response.json()) == 1
+        
+        response = client.post("/cars/search", json={"red_flags": ["haunted"]})
+        assert response.status_code == 422
+
+    def test_search_by_monthly_tco(self, client, sample_car_data):
+        """Test filtering and sorting on the stored default-assumption TCO."""
+        ids = {}
+        for name, price, body_type in [("suv", 30000.0, "SUV"), ("sedan", 30000.0, "Sedan"), ("pricey", 90000.0, "Sedan")]:
+            car = dict(sample_car_data, vin=None, fuel_type="gasoline", price=price, body_type=body_type,
+                       listing_url=f"https://example.com/{name}")
+            ids[name] = client.post("/cars/", json=car).json()["id"]
+        
+        cars = client.post("/cars/search", json={"sort_by": "monthly_tco"}).json()
+        assert [c["id"] for c in cars] == [ids["sedan"], ids["suv"], ids["pricey"]]
+        assert cars[0]["monthly_tco_default"] < cars[1]["monthly_tco_default"]
+        
+        tco_max = cars[1]["monthly_tco_default"]
+        response = client.post("/cars/search", json={"tco_max": tco_max, "sort_by": "monthly_tco"})
+        assert [c["id"] for c in response.json()] == [ids["sedan"], ids["suv"]]
+        
+        response = client.post("/cars/search", json={"sort_by": "sticker"})
+        assert response.status_code == 422
+
+    def test_search_by_monthly_tco_uses_index(self, test_db):
+        """Test that the cheapest-to-own query is served from the status/TCO index."""
+        from sqlalchemy import select, text
+        from backend.models.car import Car
+        
+        query = (
+            select(Car.id)
+            .filter(Car.status == "active", Car.monthly_tco_default <= 600)
+            .order_by(Car.monthly_tco_default.asc().nulls_last())
+        )
+        compiled = query.compile(test_db.get_bind(), compile_kwargs={"literal_binds": True})
+        plan = " ".join(str(row) for row in test_db.execute(text(f"EXPLAIN QUERY PLAN {compiled}")))
+        
+        assert "ix_cars_status_monthly_tco_default" in plan
+
     def test_search_empty_filters(self, client, sample_car_data):
         """Test searching with no filters returns all cars."""
         client.post("/cars/", json=sample_car_data)
@@ -155,3 +385,99 @@ class TestCarSearch:
         data = response.json()
         
         assert isinstance(data, list)
+
+
+class TestRecommendations:
+    """Test recommendation ranking."""
+
+    def _create(self, client, sample_car_data, n, **fields):
+        car = sample_car_data.copy()
+        car["vin"] = f"17CHARVINRECO{n:04d}"
+        car["listing_url"] = f"https://example.com/reco{n}"
+        car.update(fields)
+        return client.post("/cars/", json=car).json()
+
+    def test_recommendations_ranked_and_limited(self, client, sample_car_data):
+        """Test that best deals come first and only `limit` cars are returned."""
+        steal = self._create(client, sample_car_data, 1, price=15000.0)   # S grade
+        fair = self._create(client, sample_car_data, 2, price=34000.0)    # B grade
+        self._create(client, sample_car_data, 3, price=60000.0)           # Over budget
+        
+        response = client.post(
+            "/cars/recommendations?limit=1",
+            json={"max_budget": 40000},
+        )
+        
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert [car["id"] for car in data] == [steal["id"]]
+        
+        response = client.post("/cars/recommendations", json={"max_budget": 40000})
+        assert [car["id"] for car in response.json()] == [steal["id"], fair["id"]]
+
+    def test_recommendations_reliability_priority(self, client, sample_car_data):
+        """Test that reliable makes get boosted when priority is reliability."""
+        # Same price and FMV table entry, so only the make differs
+        lexus = self._create(client, sample_car_data, 1, make="LEXUS", model="IS", price=30000.0)
+        kia = self._create(client, sample_car_data, 2, make="Kia", model="Soul", price=30000.0)
+        
+        response = client.post(
+            "/cars/recommendations",
+            json={"max_budget": 40000, "priority": "reliability"},
+        )
+        
+        ids = [car["id"] for car in response.json()]
+        assert ids.index(lexus["id"]) < ids.index(kia["id"])
+
+
+class TestNegotiationStream:
+    """Test the streamed (SSE) negotiation script."""
+
+    def _events(self, body: str):
+        import json
+        
+        events = []
+        for message in body.strip().split("\n\n"):
+            event, data = message.split("\n")
+            events.append((event[len("event: "):], json.loads(data[len("data: "):])))
+        return events
+
+    def test_summary_first_then_script_chunks(self, client, sample_car_data, monkeypatch):
+        """Test that price math arrives before the streamed script."""
+        from backend.services import ai
+        
+        car = client.post("/cars/", json=sample_car_data).json()
+        monkeypatch.setattr(ai, "stream_negotiation_script", lambda **kwargs: iter(["Hi, ", "about the Tesla..."]))
+        
+        response = client.post(f"/cars/{car['id']}/negotiate/stream")
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = self._events(response.text)
+        assert [event for event, _ in events] == ["summary", "script", "script", "done"]
+        summary = events[0][1]
+        assert summary["car_id"] == car["id"]
+        assert summary["quick_tips"]
+        assert "script" not in summary
+        assert events[-1][1] == {"script": "Hi, about the Tesla..."}
+
+    def test_ai_failure_is_an_error_event(self, client, sample_car_data, monkeypatch):
+        """Test that a failed generation still delivers the summary."""
+        from backend.services import ai
+        
+        def failing(**kwargs):
+            yield "Hi, "
+            raise RuntimeError("stream reset")
+        
+        car = client.post("/cars/", json=sample_car_data).json()
+        monkeypatch.setattr(ai, "stream_negotiation_script", failing)
+        
+        events = self._events(client.post(f"/cars/{car['id']}/negotiate/stream").text)
+        
+        assert [event for event, _ in events] == ["summary", "script", "error"]
+        assert events[-1][1]["detail"] == ai.NEGOTIATION_FAILED_SCRIPT
+
+    def test_unknown_car(self, client):
+        """Test 404 before any event is sent."""
+        assert client.post("/cars/nope/negotiate/stream").status_code == 404
@@ -77,6 +77,30 @@ class TestFlowSavedCarsAndTCO:
         assert tco_resp.status_code == 200
         assert "monthly_total" in tco_resp.json()
 
+    def test_comparison_page_batch_tco(self, client, sample_car_data):
+        """Comparison page: TCO for several cars in one request, matching the single-car endpoint."""
+        car_ids = []
+        for i, fuel_type in enumerate(["gasoline", "electric", "hybrid"]):
+            car = dict(sample_car_data, vin=None, fuel_type=fuel_type,
+                       listing_url=f"https://example.com/compare/{i}", price=30000.0 + i * 5000)
+            car_ids.append(client.post("/cars/", json=car).json()["id"])
+        
+        assumptions = {"annual_km": 20000, "vehicle_type": "suv"}
+        resp = client.post("/cars/tco/batch", json={"car_ids": car_ids + ["nope"], **assumptions})
+        
+        assert resp.status_code == 200
+        data = resp.json()
+        assert [item["car_id"] for item in data["results"]] == car_ids
+        assert data["missing"] == ["nope"]
+        assert data["assumptions"]["annual_km"] == 20000
+        
+        single = client.post(f"/cars/{car_ids[1]}/tco", json=assumptions).json()
+        for field in ("monthly_total", "monthly_fuel", "monthly_insurance", "annual_total"):
+            assert data["results"][1][field] == single[field]
+        
+        too_many = client.post("/cars/tco/batch", json={"car_ids": [str(i) for i in range(101)]})
+        assert too_many.status_code == 400
+
 
 class TestFlowAlertsMatching:
     """Tests the flow of alerts being triggered by new listings."""
@@ -131,3 +155,286 @@ class TestFlowAlertsMatching:
         assert "17CHARVINTREND001" in vins
         # Trending logic filters out anything below B usually
         assert "17CHARVINTREND002" not in vins
+
+
+class TestAppFactory:
+    """Test that building the app has no import-time side effects."""
+
+    def test_import_does_not_load_ai_sdk_or_touch_db(self, tmp_path):
+        """Test that importing the app leaves the AI SDK unloaded and no DB file."""
+        import os
+        import subprocess
+        import sys
+        
+        db_path = tmp_path / "cold.db"
+        code = (
+            "import sys, backend.main, backend.services.ai; "
+            "assert 'google.generativeai' not in sys.modules"
+        )
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{db_path}")
+        
+        subprocess.run([sys.executable, "-c", code], env=env, check=True)
+        assert not db_path.exists()
+
+    def test_startup_hook_creates_schema(self, tmp_path):
+        """Test that tables are created when the app starts, not before."""
+        from sqlalchemy import create_engine, inspect
+        from fastapi.testclient import TestClient
+        from backend import database
+        from backend.main import create_app
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'startup.db'}")
+        original = database.engine
+        database.engine = engine
+        try:
+            app = create_app(init_schema=True)
+            assert "cars" not in inspect(engine).get_table_names()
+            with TestClient(app):
+                pass
+            assert "cars" in inspect(engine).get_table_names()
+        finally:
+            database.engine = original
+            engine.dispose()
+
+
+class TestSchemaUpgrade:
+    """Test upgrading a database created with an older schema."""
+
+    # cars / alerts as first deployed, before the columns added since
+    BASELINE_SCHEMA = [
+        """CREATE TABLE cars (
+            id VARCHAR PRIMARY KEY, vin VARCHAR, make VARCHAR, model VARCHAR, year INTEGER,
+            trim VARCHAR, transmission VARCHAR, fuel_type VARCHAR, drivetrain VARCHAR,
+            price FLOAT, currency VARCHAR, mileage INTEGER, postal_code VARCHAR,
+            seller_type VARCHAR, listing_url VARCHAR, image_url VARCHAR, body_type VARCHAR,
+            description VARCHAR, created_at DATETIME, last_seen_at DATETIME, status VARCHAR,
+            fair_market_value FLOAT, deal_grade VARCHAR, ai_verdict VARCHAR
+        )""",
+        """CREATE TABLE alerts (
+            id VARCHAR PRIMARY KEY, user_id VARCHAR, name VARCHAR, make VARCHAR, model VARCHAR,
+            year_min INTEGER, year_max INTEGER, price_max FLOAT, mileage_max INTEGER,
+            transmission VARCHAR, fuel_type VARCHAR, drivetrain VARCHAR, deal_grade_min VARCHAR,
+            is_active BOOLEAN, created_at DATETIME, last_triggered_at DATETIME
+        )""",
+        """INSERT INTO cars (id, make, model, year, price, mileage, body_type, description,
+            created_at, last_seen_at, status, deal_grade)
+            VALUES ('legacy', 'Mercedes', 'C Class', 2019, 30000, 50000, 'Sedan',
+            'Rebuilt title, no accidents since.', '2024-01-01 00:00:00', '2024-02-01 00:00:00',
+            'active', 'B')""",
+        """INSERT INTO cars (id, created_at, last_seen_at, status)
+            VALUES ('bare', '2024-01-01 00:00:00', '2024-03-01 00:00:00', 'sold')""",
+        """INSERT INTO alerts (id, user_id, make, is_active) VALUES ('a1', 'u1', 'Mercedes', 1)""",
+    ]
+
+    def _baseline_engine(self, tmp_path):
+        from sqlalchemy import create_engine
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'baseline.db'}")
+        with engine.begin() as connection:
+            for statement in self.BASELINE_SCHEMA:
+                connection.exec_driver_sql(statement)
+        return engine
+
+    def test_init_db_upgrades_existing_tables(self, tmp_path):
+        """Test that missing columns/indexes are added and legacy rows backfilled."""
+        from sqlalchemy import inspect, text
+        from sqlalchemy.orm import Session
+        from backend import database
+        from backend.models.alert import Alert
+        from backend.models.car import Car
+        from backend.services.tco import default_monthly_tco
+        
+        engine = self._baseline_engine(tmp_path)
+        original = database.engine
+        database.engine = engine
+        try:
+            changes = database.init_db()
+            assert "added column cars.make_normalized" in changes
+            assert "created index ix_cars_status_make_normalized" in changes
+            assert "created table users" in changes
+            assert database.init_db() == []  # Idempotent
+            
+            car_columns = {column["name"] for column in inspect(engine).get_columns("cars")}
+            assert {column.name for column in Car.__table__.columns} <= car_columns
+            
+            with Session(engine) as db:
+                car = db.get(Car, "legacy")
+                assert (car.make_normalized, car.model_normalized) == ("mercedes-benz", "c-class")
+                assert db.get(Alert, "a1").make_normalized == "mercedes-benz"
+                assert car.monthly_tco_default == default_monthly_tco(30000, 2019, None, "Sedan")
+                assert db.get(Car, "bare").monthly_tco_default is None  # No price to cost
+                
+                untouched = db.execute(text("SELECT updated_at FROM cars WHERE id = 'bare'")).scalar()
+                assert untouched.startswith("2024-03-01")  # Backfilled from last_seen_at
+        finally:
+            database.engine = original
+            engine.dispose()
+
+
+class TestPostgresTimestamps:
+    """Test that timestamps reach asyncpg in a form its codec accepts."""
+
+    def test_every_timestamp_column_is_naive_utc(self):
+        """Test that no model declares a plain DateTime (aware values break asyncpg)."""
+        from sqlalchemy import DateTime
+        from backend.database import Base, UTCDateTime
+        from backend.models import alert, car, user  # noqa: F401
+        
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if isinstance(column.type, DateTime):
+                    raise AssertionError(f"{table.name}.{column.name} is a plain DateTime")
+                if "_at" in column.name:
+                    assert isinstance(column.type, UTCDateTime), f"{table.name}.{column.name}"
+
+    def test_aware_values_bound_for_asyncpg(self):
+        """Test the binds of create_car / begin_analysis style writes on the asyncpg dialect."""
+        from datetime import datetime, timedelta, timezone
+        from asyncpg.pgproto import pgproto
+        from sqlalchemy import insert, update
+        from sqlalchemy.dialects.postgresql import asyncpg as asyncpg_dialect
+        from backend.models.car import AnalysisJob, Car
+        
+        dialect = asyncpg_dialect.dialect()
+        now = datetime.now(timezone(timedelta(hours=-5)))
+        statements = [
+            insert(Car).values(id="c1", created_at=now, last_seen_at=now),
+            update(Car).where(Car.analysis_started_at < now).values(analysis_started_at=now),
+            insert(AnalysisJob).values(id="j1", available_at=now),
+        ]
+        
+        checked = 0
+        for statement in statements:
+            compiled = statement.compile(dialect=dialect)
+            assert "TIMESTAMP WITHOUT TIME ZONE" in str(compiled)
+            for bind in compiled.binds.values():
+                if not isinstance(bind.value, datetime):
+                    continue
+                processor = bind.type.bind_processor(dialect)
+                bound = processor(bind.value) if processor else bind.value
+                # asyncpg's timestamp codec does exactly this (raises for aware values)
+                bound - pgproto.pg_epoch_datetime
+                assert bound == now.astimezone(timezone.utc).replace(tzinfo=None)
+                checked += 1
+        assert checked >= 5
+
+
+class TestQueryInstrumentation:
+    """Test per-request SQL counts and timings."""
+
+    def test_server_timing_counts_async_queries(self, client, sample_car_data):
+        """Test that the Server-Timing header reports the request's statements."""
+        car_id = client.post("/cars/", json=sample_car_data).json()["id"]
+        
+        response = client.get(f"/cars/{car_id}")
+        
+        assert response.status_code == 200
+        timing = response.headers["server-timing"]
+        assert timing.startswith("db;dur=")
+        assert 'desc="2 queries"' in timing  # Version probe, then the row
+
+    def test_stats_aggregated_per_route_template(self, client, sample_car_data):
+        """Test that totals are keyed by route template, not concrete path."""
+        from backend.services.query_stats import route_query_stats
+        
+        route_query_stats.clear()
+        car_id = client.post("/cars/", json=sample_car_data).json()["id"]
+        client.get(f"/cars/{car_id}")
+        client.get("/cars/missing-id")
+        
+        stats = client.get("/health/query-stats").json()
+        assert stats["GET /cars/{car_id}"]["requests"] == 2
+        assert stats["GET /cars/{car_id}"]["queries_total"] == 3
+
+    def test_nonstandard_methods_share_one_key(self, client):
+        """Test that arbitrary request methods can't add new route keys."""
+        from backend.services.query_stats import route_query_stats
+        
+        route_query_stats.clear()
+        client.request("FOO", "/cars/")
+        client.request("BAR", "/cars/")
+        
+        stats = client.get("/health/query-stats").json()
+        assert stats["other /cars/"]["requests"] == 2
+        assert not any(key.startswith(("FOO", "BAR")) for key in stats)
+
+    def test_background_task_queries_counted_separately(self, client, sample_car_data):
+        """Test that BackgroundTasks queries don't land on the request's stats."""
+        from backend.services.query_stats import route_query_stats
+        
+        route_query_stats.clear()
+        response = client.post("/cars/", json=sample_car_data)
+        
+        stats = client.get("/health/query-stats").json()
+        reported = int(response.headers["server-timing"].split('desc="')[1].split()[0])
+        assert stats["POST /cars/"]["queries_total"] == reported
+        assert stats["POST /cars/ [background]"]["queries_total"] > 0  # Recommendation merge
+
+    def test_slow_query_logged_with_plan(self, test_db, monkeypatch, capsys):
+        """Test that slow statements print param shapes and an EXPLAIN plan."""
+        from backend.models.car import Car
+        from backend.services import query_stats
+        
+        query_stats.install_query_instrumentation()
+        monkeypatch.setattr(query_stats, "SLOW_QUERY_MS", 0.000001)
+        
+        test_db.query(Car).filter(Car.make_normalized == "tesla").all()
+        
+        out = capsys.readouterr().out
+        assert "SLOW QUERY" in out
+        assert "params: (str" in out
+        assert "ix_cars_" in out  # Plan shows the index it uses
+
+
+class TestMetrics:
+    """Test the Prometheus /metrics endpoint."""
+
+    def _sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+        
+        return REGISTRY.get_sample_value(name, labels) or 0.0
+
+    def test_requests_labelled_by_route_template(self, client, sample_car_data):
+        """Test that per-route counters use the template, not the concrete path."""
+        labels = dict(method="GET", route="/cars/{car_id}", status="200")
+        before = self._sample("undercut_http_requests_total", **labels)
+        
+        car_id = client.post("/cars/", json=sample_car_data).json()["id"]
+        client.get(f"/cars/{car_id}")
+        
+        assert self._sample("undercut_http_requests_total", **labels) == before + 1
+        body = client.get("/metrics").text
+        assert 'undercut_http_request_duration_seconds_bucket{le="0.005",method="GET",route="/cars/{car_id}"}' in body
+        assert car_id not in body
+        assert "undercut_db_pool_checkouts_total" in body
+
+    def test_nonstandard_methods_share_one_label(self, client):
+        """Test that arbitrary request methods can't create new label values."""
+        labels = dict(method="other", route="unmatched", status="404")
+        before = self._sample("undercut_http_requests_total", **labels)
+        
+        client.request("FOO", "/nowhere")
+        client.request("BAR", "/nowhere")
+        
+        assert self._sample("undercut_http_requests_total", **labels) == before + 2
+        assert 'method="FOO"' not in client.get("/metrics").text
+
+    def test_ingestion_created_vs_deduped(self, client, sample_car_data):
+        """Test that repeat listings count as deduped."""
+        created = self._sample("undercut_cars_ingested_total", result="created")
+        deduped = self._sample("undercut_cars_ingested_total", result="deduped")
+        
+        client.post("/cars/", json=sample_car_data)
+        client.post("/cars/", json=sample_car_data)
+        
+        assert self._sample("undercut_cars_ingested_total", result="created") == created + 1
+        assert self._sample("undercut_cars_ingested_total", result="deduped") == deduped + 1
+
+    def test_trending_cache_hits_counted(self, client):
+        """Test that repeat trending reads count as cache hits."""
+        hits = self._sample("undercut_cache_lookups_total", cache="trending", result="hit")
+        
+        client.get("/cars/trending")
+        client.get("/cars/trending")
+        
+        assert self._sample("undercut_cache_lookups_total", cache="trending", result="hit") == hits + 1
@@ -172,6 +172,120 @@ class TestTCOService:
         assert "fuel_type" in result.assumptions
         assert "note" in result.assumptions
 
+    def test_batch_matches_scalar(self):
+        """Test that the vectorized batch gives calculate_tco's numbers for every car."""
+        from backend.services.tco import calculate_tco, calculate_tco_batch
+        
+        prices = [4500, 38000, 62000, 99000, 140000, 25000]
+        years = [2006, 2021, 2026, 2023, 2024, 2015]
+        fuel_types = ["gasoline", "electric", "hybrid", "Diesel", "plugin_hybrid", None]
+        
+        batch = calculate_tco_batch(prices, years, fuel_types, annual_km=22000, fuel_price=1.8, vehicle_type="SUV")
+        
+        for i, (price, year, fuel_type) in enumerate(zip(prices, years, fuel_types)):
+            single = calculate_tco(price, year, 22000, fuel_type or "gasoline", 1.8, "SUV")
+            for field in ("monthly_total", "monthly_fuel", "monthly_depreciation",
+                          "monthly_insurance", "monthly_maintenance", "annual_total"):
+                assert getattr(batch, field)[i] == pytest.approx(getattr(single, field), abs=0.01)
+
+    def test_default_monthly_tco_uses_body_type(self):
+        """Test that the stored default TCO prices insurance by body type."""
+        from backend.services.tco import calculate_tco, default_monthly_tco, vehicle_type_for_body
+        
+        assert vehicle_type_for_body("SUV") == "suv"
+        assert vehicle_type_for_body(" Pickup ") == "truck"
+        assert vehicle_type_for_body("Hatchback") == "sedan"
+        assert vehicle_type_for_body(None) == "sedan"
+        
+        expected = calculate_tco(30000, 2019, vehicle_type="truck").monthly_total
+        assert default_monthly_tco(30000, 2019, None, "Truck") == expected
+        assert default_monthly_tco(30000, 2019, None, "Truck") > default_monthly_tco(30000, 2019, None, "Sedan")
+        assert default_monthly_tco(None, 2019) is None
+
+
+class TestRecommendationMerge:
+    """Test merging new listings into stored recommendation lists."""
+
+    def test_only_lists_the_car_can_enter_are_scored(self, test_db, monkeypatch):
+        """Test that full lists it can't beat and out-of-budget users are skipped in SQL."""
+        from backend.models.car import Car
+        from backend.models.user import User, UserRecommendation
+        from backend.services import recommendations
+        
+        computed = datetime.now(timezone.utc)
+        for user_id, budget in [("full", 40000), ("open", 40000), ("broke", 10000)]:
+            test_db.add(User(
+                id=user_id, email=f"{user_id}@example.com", profile_complete=True,
+                buying_power=budget, recommendations_computed_at=computed,
+            ))
+        test_db.add_all([
+            UserRecommendation(id=f"r{i}", user_id="full", car_id=f"old-{i}", score=500.0)
+            for i in range(recommendations.CANDIDATES_PER_USER)
+        ])
+        car = Car(
+            id="new", make="Honda", model="Civic", year=2020, price=20000.0, mileage=1000,
+            status="active", deal_grade="S", listing_url="https://example.com/new",
+            created_at=datetime.now(timezone.utc),
+        )
+        test_db.add(car)
+        test_db.commit()
+        
+        scored = []
+        candidate_query = recommendations._candidate_query
+        monkeypatch.setattr(
+            recommendations, "_candidate_query",
+            lambda db, scoring: scored.append(scoring["max_budget"]) or candidate_query(db, scoring),
+        )
+        
+        assert recommendations.add_car_to_recommendations(test_db, car) == 1
+        assert len(scored) == 1  # Only "open"
+        assert test_db.query(UserRecommendation).filter_by(user_id="open", car_id="new").count() == 1
+        assert recommendations.add_car_to_recommendations(test_db, car) == 0  # Already listed
+
+    def test_never_built_list_left_for_cold_start(self, test_db):
+        """Test that a list that was never computed isn't started with one car."""
+        from backend.models.car import Car
+        from backend.models.user import User, UserRecommendation
+        from backend.services import recommendations
+        
+        test_db.add(User(id="legacy", email="legacy@example.com", profile_complete=True, buying_power=40000))
+        car = Car(
+            id="new", make="Honda", model="Civic", year=2020, price=20000.0, mileage=1000,
+            status="active", deal_grade="S", listing_url="https://example.com/new",
+            created_at=datetime.now(timezone.utc),
+        )
+        test_db.add(car)
+        test_db.commit()
+        
+        assert recommendations.add_car_to_recommendations(test_db, car) == 0
+        assert test_db.query(UserRecommendation).filter_by(user_id="legacy").count() == 0
+
+
+class TestRegrade:
+    """Test the regrade job."""
+
+    def test_regrade_recomputes_derived_values(self, test_db):
+        """Test that stale grades/TCOs are recomputed and unchanged rows left alone."""
+        from backend.models.car import Car
+        from backend.services.regrade import regrade_cars
+        from backend.services.tco import default_monthly_tco
+        
+        for i in range(5):
+            test_db.add(Car(
+                id=f"car-{i}", make="Honda", model="Civic", year=2018, price=15000.0 + i * 1000,
+                mileage=80000, body_type="Sedan", listing_url=f"https://example.com/{i}",
+                status="sold" if i == 4 else "active", created_at=datetime.now(timezone.utc),
+            ))
+        test_db.commit()
+        
+        assert regrade_cars(test_db, batch_size=2) == 4  # Sold car skipped
+        assert regrade_cars(test_db, batch_size=2) == 0  # Nothing changed since
+        
+        car = test_db.get(Car, "car-1")
+        assert car.deal_grade in {"S", "A", "B", "C", "F"}
+        assert car.monthly_tco_default == default_monthly_tco(16000.0, 2018, None, "Sedan")
+        assert test_db.get(Car, "car-4").monthly_tco_default is None
+
 
 class TestAlertMatcher:
     """Test the alert matching service."""
@@ -344,3 +458,926 @@ class TestAlertMatcher:
         
         # Toyota doesn't match Tesla alert
         assert _car_matches_alert(car, alert) == False
+
+    def test_car_matches_alert_by_make_alias(self):
+        """Test that make aliases match their canonical make."""
+        from backend.services.alerts import _car_matches_alert
+        from unittest.mock import MagicMock
+        
+        car = MagicMock()
+        car.make = "Mercedes-Benz"
+        car.model = "C-Class"
+        car.year = 2020
+        car.price = 30000
+        car.mileage = 50000
+        car.transmission = None
+        car.fuel_type = None
+        car.drivetrain = None
+        car.deal_grade = None
+        
+        alert = MagicMock()
+        alert.make = "mercedes"
+        alert.model = "C Class"
+        alert.year_min = None
+        alert.year_max = None
+        alert.price_max = None
+        alert.mileage_max = None
+        alert.transmission = None
+        alert.fuel_type = None
+        alert.drivetrain = None
+        alert.deal_grade_min = None
+        
+        assert _car_matches_alert(car, alert) == True
+
+
+class TestCatalog:
+    """Test make/model canonicalization."""
+
+    def test_canonicalize_make_aliases(self):
+        """Test case folding and alias resolution for makes."""
+        from backend.services.catalog import canonicalize_make
+        
+        assert canonicalize_make("Mercedes") == "mercedes-benz"
+        assert canonicalize_make("  MERCEDES   Benz ") == "mercedes-benz"
+        assert canonicalize_make("Toyota") == "toyota"
+        assert canonicalize_make("") is None
+        assert canonicalize_make(None) is None
+
+    def test_canonicalize_model_aliases(self):
+        """Test model aliases resolve per make and without a make."""
+        from backend.services.catalog import canonicalize_model
+        
+        assert canonicalize_model("CRV", "Honda") == "cr-v"
+        assert canonicalize_model("crv") == "cr-v"
+        assert canonicalize_model("Model 3", "Tesla") == "model 3"
+        assert canonicalize_model("Camry", "Toyota") == "camry"
+
+
+class TestTrendingCache:
+    """Test the in-memory trending lists."""
+
+    def _car(self, car_id, grade, **fields):
+        from backend.models.car import Car
+        
+        data = dict(
+            id=car_id, make="Tesla", model="Model 3", make_normalized="tesla",
+            year=2021, price=30000.0, mileage=30000, listing_url=f"https://example.com/{car_id}",
+            status="active", deal_grade=grade, created_at=datetime.now(timezone.utc),
+        )
+        data.update(fields)
+        return Car(**data)
+
+    def test_served_from_memory_until_top_changes(self, test_db):
+        """Test that reads skip the DB until a qualifying car arrives."""
+        from backend.services.trending import TrendingCache
+        
+        cache = TrendingCache(size=2, max_age=3600)
+        test_db.add_all([self._car("s1", "S"), self._car("a1", "A"), self._car("f1", "F")])
+        test_db.commit()
+        
+        assert [c.id for c in cache.get(test_db, 2)] == ["s1", "a1"]
+        
+        # No DB needed while the list is fresh
+        assert [c.id for c in cache.get(None, 2)] == ["s1", "a1"]
+        
+        # A B-grade car doesn't change a full S/A list
+        cache.notify_car_changed(self._car("b1", "B"))
+        assert [c.id for c in cache.get(None, 2)] == ["s1", "a1"]
+        
+        # A new S-grade car does
+        new_s = self._car("s2", "S")
+        test_db.add(new_s)
+        test_db.commit()
+        cache.notify_car_changed(new_s)
+        assert [c.id for c in cache.get(test_db, 2)] == ["s2", "s1"]
+
+    def test_concurrent_async_rebuilds_do_not_deadlock(self, tmp_path):
+        """Test cold-cache reads from several run_sync calls on one event loop."""
+        import asyncio
+        import threading
+        from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+        from backend.database import Base
+        from backend.services.trending import TrendingCache
+        
+        cache = TrendingCache(size=5, max_age=3600)
+        results = []
+        
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'trending.db'}")
+            async with engine.begin() as connection:
+                await connection.run_sync(Base.metadata.create_all)
+            async with AsyncSession(engine) as db:
+                db.add_all([self._car(f"s{i}", "S") for i in range(3)])
+                await db.commit()
+            
+            async def read():
+                async with AsyncSession(engine) as db:
+                    cars, _ = await db.run_sync(cache.get_versioned, 5)
+                    cache.notify_car_changed(self._car("x", "F"))  # Sync invalidation on the loop
+                    results.append(len(cars))
+            
+            await asyncio.gather(*(read() for _ in range(5)))
+            await engine.dispose()
+        
+        thread = threading.Thread(target=asyncio.run, args=(main(),), daemon=True)
+        thread.start()
+        thread.join(timeout=10)
+        
+        assert not thread.is_alive(), "trending rebuild deadlocked"
+        assert results == [3] * 5
+
+    def test_rebuild_overtaken_by_invalidation_not_stored(self, test_db, monkeypatch):
+        """Test that a list queried before an invalidation isn't cached."""
+        from backend.services import trending
+        
+        cache = trending.TrendingCache(size=2, max_age=3600)
+        test_db.add(self._car("s1", "S"))
+        test_db.commit()
+        
+        query_trending = trending.query_trending
+        def query_then_invalidate(*args):
+            cars = query_trending(*args)
+            cache.notify_car_changed(self._car("s2", "S"))  # Lands while the list is built
+            return cars
+        monkeypatch.setattr(trending, "query_trending", query_then_invalidate)
+        
+        assert [c.id for c in cache.get(test_db, 2)] == ["s1"]
+        assert cache._lists == {}
+
+
+class TestSerialization:
+    """Test the fast list serialization path."""
+
+    def test_fast_path_matches_response_model(self, test_db):
+        """Test that orjson row encoding equals CarResponse serialization."""
+        import json
+        from backend.models.car import Car, CarResponse
+        from backend.services.serialization import car_response_columns, dump_car_rows
+        
+        test_db.add(Car(
+            id="car-1", make="Tesla", model="Model 3", year=2021, price=38000.0,
+            mileage=32000, listing_url="https://example.com/car1", description="Clean",
+            created_at=datetime.now(timezone.utc), status="active", deal_grade="A",
+        ))
+        test_db.commit()
+        
+        expected = [
+            CarResponse.model_validate(car).model_dump(mode="json")
+            for car in test_db.query(Car).all()
+        ]
+        rows = test_db.query(*car_response_columns()).all()
+        
+        assert json.loads(dump_car_rows(rows)) == expected
+
+    def test_sparse_fields_narrow_select(self):
+        """Test that unrequested columns are not selected."""
+        from backend.models.car import Car
+        from backend.services.serialization import car_response_columns, parse_fields
+        from sqlalchemy import select
+        
+        fields = parse_fields("price,make")
+        sql = str(select(*car_response_columns(fields)))
+        
+        assert fields == ("make", "price", "id")
+        assert "description" not in sql
+        assert "ai_verdict" not in sql
+
+
+class TestConnectionPool:
+    """Test pool configuration and checkout metrics."""
+
+    def test_server_engines_get_configured_pool(self):
+        """Test that Postgres URLs get the env pool settings; SQLite doesn't."""
+        from backend.database import _engine_kwargs, DB_POOL_SIZE, DB_POOL_PRE_PING
+        
+        kwargs = _engine_kwargs("postgresql://u:p@db/app", "test_pg", is_async=False)
+        assert kwargs["pool_size"] == DB_POOL_SIZE
+        assert kwargs["pool_pre_ping"] == DB_POOL_PRE_PING
+        assert kwargs["poolclass"].__name__ == "TimedQueuePool"
+        
+        assert "poolclass" not in _engine_kwargs("sqlite:///./x.db", "test_sqlite", is_async=False)
+
+    def test_timed_pool_records_checkouts(self, tmp_path):
+        """Test that checkouts through a timed pool are counted."""
+        from sqlalchemy import create_engine, text
+        from sqlalchemy.pool import QueuePool
+        from backend.database import PoolMetrics, _timed_pool
+        
+        metrics = PoolMetrics()
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=_timed_pool(QueuePool, metrics),
+            pool_size=1,
+        )
+        for _ in range(3):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+        
+        assert metrics.checkouts == 3
+        assert metrics.timeouts == 0
+        assert engine.pool.checkedout() == 0
+        engine.dispose()
+
+    def test_timed_pool_counts_only_queue_timeouts(self, tmp_path):
+        """Test that connect errors aren't timeouts and the timing survives a pool rebuild."""
+        import sqlite3
+        from sqlalchemy import create_engine, exc
+        from sqlalchemy.pool import QueuePool
+        from backend.database import PoolMetrics, _timed_pool
+        
+        metrics = PoolMetrics()
+        pool_class = _timed_pool(QueuePool, metrics)
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=pool_class, pool_size=1, max_overflow=0, pool_timeout=0.05,
+        )
+        with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+        assert metrics.timeouts == 1
+        
+        engine.dispose()  # Rebuilds the pool
+        assert type(engine.pool) is pool_class
+        
+        broken = create_engine(
+            "sqlite://", poolclass=pool_class,
+            creator=lambda: (_ for _ in ()).throw(sqlite3.OperationalError("refused")),
+        )
+        with pytest.raises(exc.OperationalError):
+            broken.connect()
+        assert metrics.timeouts == 1
+
+    def test_sqlite_pragmas_applied_on_connect(self, tmp_path):
+        """Test that the tuned SQLite profile is set on new connections."""
+        from sqlalchemy import create_engine, text
+        from backend.database import install_sqlite_pragmas, SQLITE_BUSY_TIMEOUT_MS
+        
+        engine = create_engine(f"sqlite:///{tmp_path / 'tuned.db'}")
+        install_sqlite_pragmas(engine)
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1  # NORMAL
+            assert conn.execute(text("PRAGMA busy_timeout")).scalar() == SQLITE_BUSY_TIMEOUT_MS
+            assert conn.execute(text("PRAGMA foreign_keys")).scalar() == 1
+        engine.dispose()
+
+
+class TestAIResponseCache:
+    """Test the persistent Gemini response cache."""
+
+    def test_fingerprint_normalizes_inputs(self):
+        """Test that formatting differences share a key; template bumps don't."""
+        from backend.services.ai_cache import prompt_fingerprint
+        
+        key = prompt_fingerprint("analyze", "1", make="Honda", price=20000.0, description="Clean  title")
+        assert key == prompt_fingerprint("analyze", "1", make=" honda ", price=20000.001, description="clean title")
+        assert key != prompt_fingerprint("analyze", "2", make="Honda", price=20000.0, description="Clean  title")
+        assert key != prompt_fingerprint("analyze", "1", make="Honda", price=20000.0, description="Rebuilt title")
+
+    def test_ttl_and_lru_eviction(self, tmp_path):
+        """Test that expired entries miss and the least recently used go first."""
+        from backend.services.ai_cache import AIResponseCache
+        
+        cache = AIResponseCache(path=str(tmp_path / "ai.db"), ttl=3600, max_entries=2)
+        cache.set("a", "verdict a")
+        cache.set("b", "verdict b")
+        assert cache.get("a") == "verdict a"  # a is now more recent than b
+        cache.set("c", "verdict c")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "verdict a"
+        assert cache.get("c") == "verdict c"
+        
+        expired = AIResponseCache(path=str(tmp_path / "ai.db"), ttl=0, max_entries=2)
+        assert expired.get("a") is None
+
+    def test_repeat_analysis_served_from_cache(self, tmp_path, monkeypatch):
+        """Test that identical analyses call Gemini once; failures aren't stored."""
+        from backend.services import ai
+        from backend.services.ai_cache import AIResponseCache
+        
+        calls = []
+        
+        def fake_generate(operation, prompt):
+            calls.append(operation)
+            if len(calls) == 1:
+                raise RuntimeError("quota")
+            return "VERDICT: Pass."
+        
+        monkeypatch.setattr(ai, "_ai_configured", lambda: True)
+        monkeypatch.setattr(ai, "_generate", fake_generate)
+        monkeypatch.setattr(ai, "ai_cache", AIResponseCache(path=str(tmp_path / "ai.db")))
+        
+        args = dict(make="Honda", model_name="Civic", year=2019, price=18000.0,
+                    mileage=60000, description="Clean title")
+        
+        assert ai.analyze_car_listing(**args) == "AI Analysis Failed"
+        assert ai.analyze_car_listing(**args) == "VERDICT: Pass."
+        assert ai.analyze_car_listing(**args) == "VERDICT: Pass."
+        assert len(calls) == 2
+
+
+class TestAIProviders:
+    """Test AI provider selection and the load-testing stub."""
+
+    def test_provider_selected_by_env(self, monkeypatch):
+        """Test that AI_PROVIDER picks the implementation."""
+        from backend.services.ai_providers import GeminiProvider, StubProvider, get_provider
+        
+        try:
+            monkeypatch.setenv("AI_PROVIDER", "stub")
+            get_provider.cache_clear()
+            assert isinstance(get_provider(), StubProvider)
+            
+            monkeypatch.setenv("AI_PROVIDER", "gemini")
+            get_provider.cache_clear()
+            assert isinstance(get_provider(), GeminiProvider)
+            
+            monkeypatch.setenv("AI_PROVIDER", "gpt-9")
+            get_provider.cache_clear()
+            with pytest.raises(ValueError, match="Unknown AI_PROVIDER"):
+                get_provider()
+        finally:
+            get_provider.cache_clear()
+
+    def test_missing_key_warned_once(self, monkeypatch, caplog):
+        """Test that an unconfigured provider is logged when resolved, not per call."""
+        from backend.services import ai
+        from backend.services.ai_providers import GeminiProvider, get_provider
+        
+        monkeypatch.setenv("AI_PROVIDER", "gemini")
+        monkeypatch.setattr(GeminiProvider, "configured", lambda self: False)
+        get_provider.cache_clear()
+        try:
+            args = dict(make="Honda", model_name="Civic", year=2019, price=18000.0,
+                        mileage=60000, description="Clean, one owner.")
+            with caplog.at_level("WARNING", logger="backend.services.ai_providers"):
+                assert ai.analyze_car_listing(**args) == ai.NO_API_KEY_VERDICT
+                assert ai.analyze_car_listing(**args) == ai.NO_API_KEY_VERDICT
+        finally:
+            get_provider.cache_clear()
+        
+        assert [record.message for record in caplog.records].count(
+            "AI provider 'gemini' is not configured (GEMINI_API_KEY not found). AI features will fail."
+        ) == 1
+
+    def test_incomplete_provider_fails_on_creation(self):
+        """Test that a provider without generate() can't be instantiated."""
+        from backend.services.ai_providers import AIProvider
+        
+        class Incomplete(AIProvider):
+            name = "incomplete"
+        
+        with pytest.raises(TypeError, match="generate"):
+            Incomplete()
+
+    def test_stub_is_deterministic_per_prompt(self):
+        """Test that the stub answers the same prompt the same way, streamed or not."""
+        from backend.services.ai_providers import StubProvider
+        
+        stub = StubProvider(latency_ms=0, distribution="fixed")
+        
+        assert stub.generate("analyze", "prompt A", timeout=1) == stub.generate("analyze", "prompt A", timeout=1)
+        assert stub.generate("analyze", "prompt A", timeout=1) != stub.generate("analyze", "prompt B", timeout=1)
+        assert stub.generate("analyze", "prompt A", timeout=1).startswith("VERDICT:")
+        chunks = list(stub.generate_stream("negotiate", "prompt A", timeout=1))
+        assert len(chunks) > 1
+        assert "".join(chunks) == stub.generate("negotiate", "prompt A", timeout=1)
+
+    def test_stub_latency_and_failures(self):
+        """Test the configured latency distribution and failure rate."""
+        import statistics
+        from backend.services.ai_providers import StubProvider, StubProviderError
+        
+        stub = StubProvider(latency_ms=100, distribution="lognormal", sigma=0.5, seed=7)
+        samples = [stub.sample_latency() for _ in range(2000)]
+        assert 0.09 < statistics.median(samples) < 0.11
+        assert max(samples) > 0.2  # Long tail
+        
+        assert StubProvider(latency_ms=100, distribution="fixed").sample_latency() == 0.1
+        
+        failing = StubProvider(latency_ms=0, distribution="fixed", failure_rate=1.0)
+        with pytest.raises(StubProviderError):
+            failing.generate("analyze", "prompt", timeout=1)
+        
+        slow = StubProvider(latency_ms=50, distribution="fixed")
+        with pytest.raises(StubProviderError, match="timeout"):
+            slow.generate("analyze", "prompt", timeout=0.01)
+
+    def test_analysis_through_stub_provider(self, tmp_path, monkeypatch):
+        """Test that the AI service runs end to end on the stub, without an API key."""
+        from backend.services import ai
+        from backend.services.ai_cache import AIResponseCache
+        from backend.services.ai_providers import StubProvider
+        
+        monkeypatch.setattr(ai, "get_provider", lambda: StubProvider(latency_ms=0, distribution="fixed"))
+        monkeypatch.setattr(ai, "ai_cache", AIResponseCache(path=str(tmp_path / "ai.db")))
+        
+        verdict = ai.analyze_car_listing(
+            make="Honda", model_name="Civic", year=2019, price=18000.0, mileage=60000,
+            description="Clean title",
+        )
+        assert verdict.startswith("VERDICT: Risky. Stub analysis")
+
+
+class TestAICircuitBreaker:
+    """Test the AI circuit breaker and its rule-based fallback."""
+
+    def _breaker(self, now):
+        from backend.services.ai_breaker import CircuitBreaker
+        
+        return CircuitBreaker(
+            latency_budget=5, window=60, min_calls=4, error_rate=0.5, slow_rate=0.5,
+            cooldown=30, clock=lambda: now[0],
+        )
+
+    def test_trips_on_errors_and_recovers_after_probe(self):
+        """Test closed -> open -> half-open -> closed."""
+        from backend.services.ai_breaker import AICircuitOpenError
+        from backend.services.metrics import AI_BREAKER_STATE
+        
+        now = [0.0]
+        breaker = self._breaker(now)
+        for failed in (False, True, False, True):
+            breaker.record(breaker.before_call(), failed, 1.0)
+        
+        assert breaker.state == "open"
+        assert AI_BREAKER_STATE._value.get() == 2
+        with pytest.raises(AICircuitOpenError):
+            breaker.before_call()  # Fails fast
+        
+        now[0] = 31
+        assert breaker.state == "half_open"
+        probe = breaker.before_call()
+        with pytest.raises(AICircuitOpenError, match="probe"):
+            breaker.before_call()  # Only one at a time
+        breaker.record(probe, False, 1.0)
+        
+        assert breaker.state == "closed"
+        assert AI_BREAKER_STATE._value.get() == 0
+        breaker.before_call()
+
+    def test_trips_on_latency_and_failed_probe_reopens(self):
+        """Test that calls over the latency budget trip it too."""
+        now = [0.0]
+        breaker = self._breaker(now)
+        for seconds in (1.0, 6.0, 7.0, 8.0):
+            breaker.record(breaker.before_call(), False, seconds)
+        assert breaker.state == "open"
+        
+        now[0] = 31
+        breaker.record(breaker.before_call(), False, 9.0)  # Probe still slow
+        assert breaker.state == "open"
+
+    def test_only_the_probe_decides_half_open(self):
+        """Test that a call admitted before the trip can't close the breaker."""
+        from backend.services.ai_breaker import AICircuitOpenError
+        
+        now = [0.0]
+        breaker = self._breaker(now)
+        straggler = breaker.before_call()  # Still running when it trips
+        for _ in range(4):
+            breaker.record(breaker.before_call(), True, 1.0)
+        assert breaker.state == "open"
+        
+        now[0] = 31
+        probe = breaker.before_call()
+        breaker.record(straggler, False, 1.0)  # Finishes during the probe
+        assert breaker.state == "half_open"
+        with pytest.raises(AICircuitOpenError, match="probe"):
+            breaker.before_call()
+        
+        breaker.record(probe, True, 1.0)
+        assert breaker.state == "open"
+
+    def test_abandoned_stream_not_recorded(self, monkeypatch):
+        """Test that a stream closed early frees the probe without closing the breaker."""
+        from backend.services import ai
+        from backend.services.ai_providers import StubProvider
+        
+        now = [0.0]
+        breaker = self._breaker(now)
+        breaker._trip("errors")
+        monkeypatch.setattr(ai, "ai_breaker", breaker)
+        monkeypatch.setattr(ai, "get_provider", lambda: StubProvider(latency_ms=0, distribution="fixed"))
+        
+        now[0] = 31
+        stream = ai._generate_stream("negotiate", "prompt")
+        next(stream)
+        stream.close()  # Client went away mid-stream
+        
+        assert breaker.state == "half_open"
+        breaker.record(breaker.before_call(), False, 1.0)  # The next call probes
+        assert breaker.state == "closed"
+
+    def test_needs_min_calls_in_window(self):
+        """Test that a few old failures don't trip it."""
+        now = [0.0]
+        breaker = self._breaker(now)
+        for _ in range(3):
+            breaker.record(breaker.before_call(), True, 1.0)
+        now[0] = 120  # Those fell out of the window
+        breaker.record(breaker.before_call(), True, 1.0)
+        assert breaker.state == "closed"
+
+    def test_open_breaker_serves_negotiation_outline(self, tmp_path, monkeypatch):
+        """Test the FMV-based outline instead of a failed AI call."""
+        from backend.services import ai
+        from backend.services.ai_cache import AIResponseCache
+        from backend.services.ai_providers import StubProvider
+        
+        now = [0.0]
+        breaker = self._breaker(now)
+        breaker._trip("errors")
+        monkeypatch.setattr(ai, "ai_breaker", breaker)
+        monkeypatch.setattr(ai, "get_provider", lambda: StubProvider(latency_ms=0, distribution="fixed"))
+        monkeypatch.setattr(ai, "ai_cache", AIResponseCache(path=str(tmp_path / "ai.db")))
+        
+        args = dict(make="Honda", model_name="Civic", year=2019, listed_price=20000.0,
+                    fair_market_value=18000.0, mileage=60000, deal_grade="C")
+        script = ai.generate_negotiation_script(**args)
+        
+        assert script.startswith("Negotiation outline")
+        assert "Target offer: $17,500" in script
+        assert list(ai.stream_negotiation_script(**args)) == [script]
+        
+        now[0] = 31  # Cooldown over: the probe reaches the provider
+        assert "[Stub negotiate" in ai.generate_negotiation_script(**args)
+        assert breaker.state == "closed"
+
+
+class TestRedFlags:
+    """Test the red-flag pre-screener."""
+
+    def test_scan_finds_tags_on_word_boundaries(self):
+        """Test phrase matching across case, punctuation and word boundaries."""
+        from backend.services.red_flags import scan_description
+        
+        assert scan_description("REBUILT TITLE. Doesn't start; mechanic's special") == [
+            "needs_work", "not_running", "rebuilt_title",
+        ]
+        assert scan_description("Trusty commuter, new rotors") == []  # Not "rust" / "rot"
+        assert scan_description(None) == []
+
+    def test_negated_phrases_are_ignored(self):
+        """Test that "no rust" / "never flooded" don't raise flags."""
+        from backend.services.red_flags import scan_description
+        
+        assert scan_description("Clean title, no rust, never flooded, isn't salvage") == []
+        assert scan_description("No accidents but heavy rust") == ["rust"]
+
+    def test_negation_stops_at_clause_punctuation(self):
+        """Test that a negation doesn't cancel a phrase in the next clause."""
+        from backend.services.red_flags import scan_description
+        
+        assert scan_description("No rust. Rebuilt title.") == ["rebuilt_title"]
+        assert scan_description(
+            "Clean interior, no accidents. Salvage title, flood damaged."
+        ) == ["flood_damage", "salvage_title"]
+
+    def test_qualified_negation_phrases_are_ignored(self):
+        """Test that "no start issues" / "not running rough" aren't not_running."""
+        from backend.services.red_flags import scan_description
+        
+        assert scan_description("Starts and drives great, no start issues.") == []
+        assert scan_description("Not running rough at all") == []
+        assert scan_description("No start, needs battery") == ["not_running"]
+
+    def test_negation_covers_lists_and_free(self):
+        """Test "never X or Y" lists and "rust free" / "free of rust"."""
+        from backend.services.red_flags import scan_description
+        
+        assert scan_description("Never been flooded or salvaged.") == []
+        assert scan_description("no rust or rot") == []
+        assert scan_description("Rust free body") == []
+        assert scan_description("Free of rust") == []
+        assert scan_description("No accidents, rust and rot on the rockers") == ["rust"]
+
+    def test_rule_based_verdict_only_for_severe_flags(self):
+        """Test that only severe flags decide the verdict without the AI."""
+        from backend.services.red_flags import rule_based_verdict
+        
+        assert rule_based_verdict(["rust", "needs_work"]) is None
+        verdict = rule_based_verdict(["flood_damage", "rust"])
+        assert verdict.startswith("VERDICT: Pass.")
+        assert "flood damage" in verdict
+
+    def test_analysis_skips_ai_for_clear_cut_listings(self, monkeypatch):
+        """Test that severe flags short-circuit analyze_car_listing."""
+        from backend.services import ai
+        
+        monkeypatch.setattr(ai, "_generate_cached", lambda *args: pytest.fail("unexpected AI call"))
+        
+        verdict = ai.analyze_car_listing(
+            make="Honda", model_name="Civic", year=2015, price=4000, mileage=210000,
+            description="Salvage title, engine seized",
+        )
+        assert verdict.startswith("VERDICT: Pass.")
+
+
+class TestAIWorkerPool:
+    """Test the bounded pool for blocking AI calls."""
+
+    def test_blocking_call_does_not_block_event_loop(self):
+        """Test that other coroutines keep running during an AI call."""
+        import asyncio
+        import time
+        from backend.services.ai_pool import AIWorkerPool
+        
+        pool = AIWorkerPool(max_concurrency=1, max_queue=4, timeout=5)
+        ticks = []
+        
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.perf_counter())
+                await asyncio.sleep(0.02)
+        
+        async def scenario():
+            return await asyncio.gather(pool.run("test", time.sleep, 0.2), ticker())
+        
+        asyncio.run(scenario())
+        assert len(ticks) == 5
+        assert ticks[-1] - ticks[0] < 0.2  # Ticked while the call was still sleeping
+
+    def test_timeout_and_queue_limit(self):
+        """Test that slow calls time out and a full queue rejects immediately."""
+        import asyncio
+        import threading
+        from backend.services.ai_pool import AIWorkerPool, AIUnavailableError
+        
+        pool = AIWorkerPool(max_concurrency=1, max_queue=1, timeout=0.1)
+        release = threading.Event()
+        
+        async def scenario():
+            running = asyncio.ensure_future(pool.run("test", release.wait, 5))
+            await asyncio.sleep(0.02)  # Occupies the only worker
+            queued = asyncio.ensure_future(pool.run("test", lambda: "done"))
+            await asyncio.sleep(0)
+            with pytest.raises(AIUnavailableError, match="busy"):
+                await pool.run("test", lambda: "rejected")
+            with pytest.raises(AIUnavailableError, match="timed out"):
+                await running
+            release.set()
+            assert await queued == "done"  # Ran once the worker freed up
+        
+        asyncio.run(scenario())
+
+    def test_stream_yields_items_as_produced(self):
+        """Test that a blocking generator's items reach the loop one by one."""
+        import asyncio
+        import time
+        from backend.services.ai_pool import AIWorkerPool
+        
+        pool = AIWorkerPool(max_concurrency=1, max_queue=4, timeout=5)
+        produced = []
+        
+        def chunks():
+            for i in range(3):
+                produced.append(i)
+                yield i
+                time.sleep(0.05)
+        
+        async def scenario():
+            received = []
+            async for item in pool.stream("test", chunks):
+                received.append((item, len(produced)))
+            return received
+        
+        # Each item arrived before the next one was produced
+        assert asyncio.run(scenario()) == [(0, 1), (1, 2), (2, 3)]
+
+    def test_identical_calls_are_coalesced(self):
+        """Test that concurrent identical calls share one execution."""
+        import asyncio
+        import time
+        from backend.services.ai_pool import AIWorkerPool
+        
+        pool = AIWorkerPool(max_concurrency=4, max_queue=4, timeout=5)
+        calls = []
+        
+        def slow_verdict(car_id):
+            calls.append(car_id)
+            time.sleep(0.1)
+            return f"verdict for {car_id}"
+        
+        async def scenario():
+            return await asyncio.gather(
+                *(pool.run("analyze", slow_verdict, car_id="c1") for _ in range(5)),
+                pool.run("analyze", slow_verdict, car_id="c2"),
+            )
+        
+        results = asyncio.run(scenario())
+        assert results == ["verdict for c1"] * 5 + ["verdict for c2"]
+        assert sorted(calls) == ["c1", "c2"]
+        assert pool._in_flight == {}
+
+    def test_timed_out_caller_leaves_shared_call_to_joiners(self):
+        """Test that a queued call survives its first caller's timeout while others wait."""
+        import asyncio
+        import threading
+        from backend.services.ai_pool import AIWorkerPool, AIUnavailableError
+        
+        pool = AIWorkerPool(max_concurrency=1, max_queue=4, timeout=0.3)
+        release = threading.Event()
+        
+        def verdict(car_id):
+            return f"verdict for {car_id}"
+        
+        async def scenario():
+            blocker = asyncio.ensure_future(pool.run("test", release.wait, 5))
+            await asyncio.sleep(0.02)  # Occupies the only worker, so the next call queues
+            first = asyncio.ensure_future(pool.run("analyze", verdict, car_id="c1"))
+            await asyncio.sleep(0.1)
+            joiner = asyncio.ensure_future(pool.run("analyze", verdict, car_id="c1"))
+            
+            with pytest.raises(AIUnavailableError, match="timed out"):
+                await first
+            release.set()
+            assert await joiner == "verdict for c1"  # Not cancelled by the first timeout
+            
+            # Once the last caller times out, the queued call is dropped; still a 503
+            release.clear()
+            blocker = asyncio.ensure_future(pool.run("test", release.wait, 5))
+            await asyncio.sleep(0.02)
+            results = await asyncio.gather(
+                pool.run("analyze", verdict, car_id="c2"),
+                pool.run("analyze", verdict, car_id="c2"),
+                return_exceptions=True,
+            )
+            release.set()
+            await asyncio.gather(blocker, return_exceptions=True)
+            return results
+        
+        results = asyncio.run(scenario())
+        assert all(isinstance(result, AIUnavailableError) for result in results)
+        assert pool._waiters == {}
+
+
+class TestAnalysisQueue:
+    """Test the background AI pre-analysis queue."""
+
+    def _car(self, test_db, car_id, grade):
+        from backend.models.car import Car
+        
+        car = Car(
+            id=car_id, make="Honda", model="Civic", year=2019, price=18000.0, mileage=60000,
+            listing_url=f"https://example.com/{car_id}", status="active", deal_grade=grade,
+            ai_verdict="Pending Analysis", created_at=datetime.now(timezone.utc),
+        )
+        test_db.add(car)
+        return car
+
+    def test_lease_order_and_exclusive_claims(self, test_db):
+        """Test that S/A jobs lease first and a leased job isn't handed out twice."""
+        from backend.services.analysis_queue import enqueue_analysis, lease_jobs
+        
+        for car_id, grade in [("c1", "C"), ("a1", "A"), ("s1", "S")]:
+            enqueue_analysis(test_db, self._car(test_db, car_id, grade))
+        test_db.commit()
+        
+        first = lease_jobs(test_db, "worker-1", limit=2)
+        second = lease_jobs(test_db, "worker-2", limit=5)
+        
+        assert [job.car_id for job in first] == ["s1", "a1"]
+        assert [job.car_id for job in second] == ["c1"]
+        assert lease_jobs(test_db, "worker-3") == []
+
+    def test_success_sets_verdict(self, test_db, monkeypatch):
+        """Test that a processed job fills in the car's verdict."""
+        from backend.services import ai
+        from backend.services.analysis_queue import enqueue_analysis, lease_jobs, process_job
+        
+        car = self._car(test_db, "s1", "S")
+        enqueue_analysis(test_db, car)
+        test_db.commit()
+        monkeypatch.setattr(ai, "analyze_car_listing", lambda **kwargs: "VERDICT: Flip Potential.")
+        
+        (job,) = lease_jobs(test_db, "worker-1")
+        assert process_job(test_db, job) == "done"
+        test_db.refresh(car)
+        assert car.ai_verdict == "VERDICT: Flip Potential."
+
+    def test_failure_backs_off_then_fails(self, test_db, monkeypatch):
+        """Test retries with backoff, then a terminal failure."""
+        from backend.services import ai, analysis_queue
+        from backend.services.analysis_queue import enqueue_analysis, lease_jobs, process_job
+        
+        enqueue_analysis(test_db, self._car(test_db, "s1", "S"))
+        test_db.commit()
+        monkeypatch.setattr(ai, "analyze_car_listing", lambda **kwargs: ai.ANALYSIS_FAILED_VERDICT)
+        monkeypatch.setattr(analysis_queue, "AI_QUEUE_MAX_ATTEMPTS", 2)
+        
+        (job,) = lease_jobs(test_db, "worker-1")
+        assert process_job(test_db, job) == "queued"
+        assert job.attempts == 1
+        assert lease_jobs(test_db, "worker-1") == []  # Backing off
+        
+        monkeypatch.setattr(analysis_queue, "AI_QUEUE_BACKOFF_SECONDS", 0)
+        job.available_at = datetime.now(timezone.utc)
+        test_db.commit()
+        (job,) = lease_jobs(test_db, "worker-1")
+        assert process_job(test_db, job) == "failed"
+
+    def test_in_progress_marker_is_exclusive(self, test_db, monkeypatch):
+        """Test that a car being analyzed elsewhere isn't analyzed twice."""
+        from backend.services import ai
+        from backend.services.analysis_queue import (
+            begin_analysis, enqueue_analysis, finish_analysis, lease_jobs, process_job,
+        )
+        
+        car = self._car(test_db, "s1", "S")
+        enqueue_analysis(test_db, car)
+        test_db.commit()
+        monkeypatch.setattr(ai, "analyze_car_listing", lambda **kwargs: pytest.fail("duplicate AI call"))
+        
+        assert begin_analysis(test_db, "s1") is True
+        assert begin_analysis(test_db, "s1") is False  # Another worker holds it
+        
+        (job,) = lease_jobs(test_db, "worker-1")
+        assert process_job(test_db, job) == "queued"
+        assert job.attempts == 0  # Deferred, not a failed attempt
+        
+        finish_analysis(test_db, "s1", "VERDICT: Pass.")
+        test_db.refresh(car)
+        assert car.ai_verdict == "VERDICT: Pass."
+        assert car.analysis_started_at is None
+        assert begin_analysis(test_db, "s1") is True
+
+    def test_budget_wait_happens_before_marker(self, test_db, monkeypatch):
+        """Test that the rate wait doesn't hold the marker, and the car is re-checked after it."""
+        from backend.models.car import Car
+        from backend.services import ai
+        from backend.services.analysis_queue import (
+            enqueue_analysis, finish_analysis, lease_jobs, process_job,
+        )
+        
+        enqueue_analysis(test_db, self._car(test_db, "s1", "S"))
+        test_db.commit()
+        monkeypatch.setattr(ai, "analyze_car_listing", lambda **kwargs: pytest.fail("AI call after on-demand"))
+        
+        class Budget:
+            def acquire(self):
+                # Nobody holds the marker while the worker waits its turn
+                assert test_db.query(Car).filter(Car.analysis_started_at.isnot(None)).count() == 0
+                finish_analysis(test_db, "s1", "VERDICT: Pass.")  # Analyzed on demand meanwhile
+        
+        (job,) = lease_jobs(test_db, "worker-1")
+        assert process_job(test_db, job, Budget()) == "done"
+        assert test_db.get(Car, "s1").ai_verdict == "VERDICT: Pass."
+
+    def test_analyze_endpoint_waits_for_in_progress_analysis(self, client, test_db, monkeypatch):
+        """Test that /analyze returns another worker's verdict instead of calling the AI."""
+        from backend.routers import cars
+        from backend.services import ai
+        from backend.services.ai_pool import ai_pool
+        
+        car = self._car(test_db, "s1", "S")
+        car.analysis_started_at = datetime.now(timezone.utc)
+        test_db.commit()
+        monkeypatch.setattr(ai, "analyze_car_listing", lambda **kwargs: pytest.fail("duplicate AI call"))
+        monkeypatch.setattr(cars, "ANALYSIS_POLL_SECONDS", 0.01)
+        monkeypatch.setattr(ai_pool, "timeout", 0.1)
+        
+        response = client.post("/cars/s1/analyze")
+        assert response.status_code == 503  # Still in progress after the AI timeout
+        
+        # The other worker finishes while this request waits
+        car.ai_verdict = "VERDICT: Pass."
+        car.analysis_started_at = None
+        test_db.commit()
+        from backend.services import analysis_queue
+        monkeypatch.setattr(analysis_queue, "begin_analysis", lambda session, car_id: False)
+        
+        response = client.post("/cars/s1/analyze")
+        assert response.status_code == 200
+        assert response.json()["ai_verdict"] == "VERDICT: Pass."
+
+    def test_rate_budget_spaces_calls(self):
+        """Test that the budget sleeps to keep calls under the RPM."""
+        from backend.services.analysis_queue import RateBudget
+        
+        now = [0.0]
+        slept = []
+        
+        def sleep(seconds):
+            slept.append(seconds)
+            now[0] += seconds
+        
+        budget = RateBudget(rpm=30, clock=lambda: now[0], sleep=sleep)
+        for _ in range(3):
+            budget.acquire()
+        
+        assert slept == [2.0, 2.0]
+
+    def test_ingest_enqueues_new_cars_only(self, client, test_db, sample_car_data):
+        """Test that create_car queues one job per new listing."""
+        from backend.models.car import AnalysisJob
+        from backend.services.analysis_queue import GRADE_PRIORITY, DEFAULT_PRIORITY
+        
+        car = client.post("/cars/", json=sample_car_data).json()
+        client.post("/cars/", json=sample_car_data)  # Deduped
+        
+        jobs = test_db.query(AnalysisJob).all()
+        assert len(jobs) == 1
+        assert jobs[0].car_id == car["id"]
+        assert jobs[0].priority == GRADE_PRIORITY.get(car["deal_grade"], DEFAULT_PRIORITY)
@@ -220,3 +220,110 @@ class TestSavedCars:
         
         # Should return the same saved car entry
         assert response1.json()["id"] == response2.json()["id"]
+
+    def test_saved_cars_paginated_newest_first(self, client, sample_user_data, sample_car_data):
+        """Test cursor pagination in save order."""
+        headers = {"X-User-Id": sample_user_data["id"]}
+        client.post("/users/", json=sample_user_data)
+        
+        car_ids = []
+        for n in range(3):
+            car = {**sample_car_data, "vin": f"17CHARVINSAVED{n:03d}", "listing_url": f"https://example.com/s{n}"}
+            car_id = client.post("/cars/", json=car).json()["id"]
+            client.post(f"/users/saved-cars/{car_id}", headers=headers)
+            car_ids.append(car_id)
+        
+        page1 = client.get("/users/saved-cars?limit=2", headers=headers)
+        assert [c["id"] for c in page1.json()] == [car_ids[2], car_ids[1]]
+        cursor = page1.headers["x-next-cursor"]
+        
+        page2 = client.get("/users/saved-cars", params={"limit": 2, "cursor": cursor}, headers=headers)
+        assert [c["id"] for c in page2.json()] == [car_ids[0]]
+        assert "x-next-cursor" not in page2.headers
+        
+        everything = client.get("/users/saved-cars", headers=headers)
+        assert [c["id"] for c in everything.json()] == car_ids[::-1]
+        assert "x-next-cursor" not in everything.headers
+
+    def test_saved_cars_lookup(self, client, sample_user_data, sample_car_data):
+        """Test bulk "is saved" lookup for a results page."""
+        headers = {"X-User-Id": sample_user_data["id"]}
+        client.post("/users/", json=sample_user_data)
+        car_id = client.post("/cars/", json=sample_car_data).json()["id"]
+        client.post(f"/users/saved-cars/{car_id}", headers=headers)
+        
+        response = client.get(
+            "/users/saved-cars/lookup",
+            params={"car_ids": f"other-car,{car_id}"},
+            headers=headers,
+        )
+        
+        assert response.status_code == 200
+        assert response.json() == {"saved_car_ids": [car_id]}
+
+
+class TestUserRecommendations:
+    """Test profile-driven precomputed recommendations."""
+
+    def _create_car(self, client, sample_car_data, n, **fields):
+        car = sample_car_data.copy()
+        car["vin"] = f"17CHARVINUREC{n:04d}"
+        car["listing_url"] = f"https://example.com/user-reco{n}"
+        car.update(fields)
+        return client.post("/cars/", json=car).json()
+
+    def test_recommendations_empty_without_profile(self, client, sample_user_data):
+        """Test that an incomplete profile gets no recommendations."""
+        client.post("/users/", json=sample_user_data)
+        
+        response = client.get(
+            "/users/me/recommendations",
+            headers={"X-User-Id": sample_user_data["id"]}
+        )
+        
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_empty_recommendations_not_rebuilt_per_request(
+        self, client, sample_user_data, sample_car_data, monkeypatch
+    ):
+        """Test that a list built empty is served as empty without a rebuild."""
+        from backend.services import recommendations
+        
+        headers = {"X-User-Id": sample_user_data["id"]}
+        client.post("/users/", json=sample_user_data)
+        self._create_car(client, sample_car_data, 1, price=80000.0)  # Over budget
+        client.patch("/users/me", json={"first_name": "Ada", "buying_power": 20000}, headers=headers)
+        
+        def fail(*args):
+            raise AssertionError("recommendations rebuilt")
+        monkeypatch.setattr(recommendations, "refresh_user_recommendations", fail)
+        
+        response = client.get("/users/me/recommendations", headers=headers)
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_recommendations_follow_profile_and_new_cars(
+        self, client, sample_user_data, sample_car_data
+    ):
+        """Test that profile changes and new listings update the stored list."""
+        headers = {"X-User-Id": sample_user_data["id"]}
+        client.post("/users/", json=sample_user_data)
+        
+        in_budget = self._create_car(client, sample_car_data, 1, price=30000.0)
+        self._create_car(client, sample_car_data, 2, price=80000.0)
+        
+        client.patch(
+            "/users/me",
+            json={"first_name": "Ada", "buying_power": 40000, "preferred_brands": ["tesla"]},
+            headers=headers,
+        )
+        
+        response = client.get("/users/me/recommendations", headers=headers)
+        assert [car["id"] for car in response.json()] == [in_budget["id"]]
+        
+        # A new S-grade listing is merged in incrementally, ahead of the existing one
+        steal = self._create_car(client, sample_car_data, 3, price=15000.0)
+        
+        response = client.get("/users/me/recommendations", headers=headers)
+        assert [car["id"] for car in response.json()] == [steal["id"], in_budget["id"]]
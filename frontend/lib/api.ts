@@ -55,6 +55,11 @@ export const carService = {
     getById: (id: string) => 
         fetchJson<any>(`/cars/${id}`),
 
+    getBatch: (ids: string[]) =>
+        fetchJson<{ cars: any[]; missing: string[] }>(
+            `/cars/batch?ids=${ids.map(encodeURIComponent).join(',')}`
+        ),
+
     search: (filters: any) => 
         fetchJson<any[]>('/cars/search', {
             method: 'POST',